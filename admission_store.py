@@ -0,0 +1,539 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# === Store Layout ===
+# Each application is one row. The full record lives in `data` as JSON and the
+# fields we filter on are copied into indexed columns when the row is written.
+SETTINGS_KEYS = (
+    "eligibility_criteria",
+    "university_capacity",
+    "loan_budget",
+    "fee_amount",
+    "criteria_file_path",
+    # Set by criteria.CriteriaRegistry when a criteria PDF is parsed.
+    "criteria_version",
+    "criteria_sha256",
+)
+
+
+def normalize_aadhaar(number):
+    """The 12 Aadhaar digits without spaces/dashes, or None if it is not a full number."""
+    digits = "".join(ch for ch in str(number or "") if ch.isdigit())
+    return digits if len(digits) == 12 else None
+
+def normalize_email(email):
+    email = (email or "").strip().lower()
+    return email or None
+
+
+INDEXED_COLUMNS = [
+    ("validation_status", "TEXT", lambda app: app.get("validation_status")),
+    ("loan_status", "TEXT", lambda app: app.get("loan_status")),
+    ("communication_status", "TEXT", lambda app: app.get("communication_status")),
+    # Duplicate detection keys (see dedup.py).
+    ("aadhaar_key", "TEXT", lambda app: normalize_aadhaar(app.get("aadhaar_number"))),
+    ("email_key", "TEXT", lambda app: normalize_email(app.get("applicant_email"))),
+    ("marksheet_sha256", "TEXT", lambda app: app.get("marksheet_sha256")),
+    ("aadhaar_sha256", "TEXT", lambda app: app.get("aadhaar_sha256")),
+    ("duplicate_of", "TEXT", lambda app: app.get("duplicate_of")),
+]
+
+# Applied in order; PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS applications (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        app_id TEXT NOT NULL UNIQUE,
+        validation_status TEXT,
+        loan_status TEXT,
+        updated_at TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_applications_validation_status ON applications(validation_status);
+    CREATE INDEX IF NOT EXISTS idx_applications_loan_status ON applications(loan_status);
+    CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS director_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT,
+        entry TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """,
+    """
+    ALTER TABLE applications ADD COLUMN communication_status TEXT;
+    CREATE INDEX IF NOT EXISTS idx_applications_communication_status ON applications(communication_status);
+    """,
+    """
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', '0');
+    """,
+    """
+    ALTER TABLE applications ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0;
+    CREATE INDEX IF NOT EXISTS idx_applications_row_version ON applications(row_version);
+    """,
+    # Mutation journal (see journal.py): triggers record every application,
+    # settings and director_log write in the writing transaction itself, once
+    # meta.journal_enabled is '1'.
+    """
+    CREATE TABLE IF NOT EXISTS journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        event TEXT NOT NULL
+    );
+    CREATE TRIGGER IF NOT EXISTS journal_application_insert AFTER INSERT ON applications
+    WHEN (SELECT value FROM meta WHERE key = 'journal_enabled') = '1'
+    BEGIN
+        INSERT INTO journal (created_at, event) VALUES (
+            strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'),
+            json_object('type', 'app', 'app_id', NEW.app_id, 'data', json(NEW.data))
+        );
+    END;
+    CREATE TRIGGER IF NOT EXISTS journal_application_update AFTER UPDATE OF data ON applications
+    WHEN NEW.data IS NOT OLD.data AND (SELECT value FROM meta WHERE key = 'journal_enabled') = '1'
+    BEGIN
+        INSERT INTO journal (created_at, event) VALUES (
+            strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'),
+            json_object('type', 'app', 'app_id', NEW.app_id, 'data', json(NEW.data))
+        );
+    END;
+    CREATE TRIGGER IF NOT EXISTS journal_setting_insert AFTER INSERT ON settings
+    WHEN (SELECT value FROM meta WHERE key = 'journal_enabled') = '1'
+    BEGIN
+        INSERT INTO journal (created_at, event) VALUES (
+            strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'),
+            json_object('type', 'setting', 'key', NEW.key, 'value', json(NEW.value))
+        );
+    END;
+    CREATE TRIGGER IF NOT EXISTS journal_setting_update AFTER UPDATE ON settings
+    WHEN NEW.value IS NOT OLD.value AND (SELECT value FROM meta WHERE key = 'journal_enabled') = '1'
+    BEGIN
+        INSERT INTO journal (created_at, event) VALUES (
+            strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'),
+            json_object('type', 'setting', 'key', NEW.key, 'value', json(NEW.value), 'old', json(OLD.value))
+        );
+    END;
+    CREATE TRIGGER IF NOT EXISTS journal_director_log_insert AFTER INSERT ON director_log
+    WHEN (SELECT value FROM meta WHERE key = 'journal_enabled') = '1'
+    BEGIN
+        INSERT INTO journal (created_at, event) VALUES (
+            NEW.created_at, json_object('type', 'log', 'entry', NEW.entry)
+        );
+    END;
+    """,
+    # Duplicate detection keys; the partial indexes only cover original
+    # applications, which are the only rows a new submission is matched against.
+    """
+    ALTER TABLE applications ADD COLUMN aadhaar_key TEXT;
+    ALTER TABLE applications ADD COLUMN email_key TEXT;
+    ALTER TABLE applications ADD COLUMN marksheet_sha256 TEXT;
+    ALTER TABLE applications ADD COLUMN aadhaar_sha256 TEXT;
+    ALTER TABLE applications ADD COLUMN duplicate_of TEXT;
+    CREATE INDEX IF NOT EXISTS idx_applications_aadhaar_key ON applications(aadhaar_key) WHERE duplicate_of IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_applications_email_key ON applications(email_key) WHERE duplicate_of IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_applications_marksheet_sha256 ON applications(marksheet_sha256) WHERE duplicate_of IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_applications_aadhaar_sha256 ON applications(aadhaar_sha256) WHERE duplicate_of IS NULL;
+    """,
+]
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _statements(script):
+    # Split on ";" but keep trigger bodies (which contain ";") in one piece.
+    buffer = ""
+    for piece in script.split(";"):
+        buffer += piece + ";"
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \n;"):
+                yield buffer
+            buffer = ""
+
+
+def write_json_atomic(path, data):
+    """
+    Write JSON to a temp file in the same directory, fsync it, then rename it
+    over `path`, so readers never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class AdmissionStore:
+    """
+    SQLite (WAL mode) backend for admission data, one row per application.
+    """
+
+    def __init__(self, db_path, defaults):
+        self.db_path = str(db_path)
+        self.defaults = defaults
+        self._local = threading.local()
+        self._commit_hooks = []
+        self._migrate_schema()
+
+    # === Connections & Transactions ===
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate=True, bump_version=True):
+        """
+        bump_version=False is for bookkeeping writes (e.g. the journal) that do
+        not change admission data; they neither move data_version nor run the
+        commit hooks.
+        """
+        conn = self._connect()
+        if conn.in_transaction:  # nested call joins the outer transaction
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        changes_before = conn.total_changes
+        changed = False
+        try:
+            yield conn
+            changed = bump_version and conn.total_changes != changes_before
+            if changed:
+                # Any committed write moves data_version, which caches key on.
+                conn.execute(
+                    "UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'data_version'"
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        if changed:
+            self._run_commit_hooks()
+
+    def add_commit_hook(self, hook):
+        """Call hook() after every committed transaction that changed data."""
+        self._commit_hooks.append(hook)
+
+    def _run_commit_hooks(self):
+        for hook in self._commit_hooks:
+            try:
+                hook()
+            except Exception as e:  # the write itself has already committed
+                print(f"⚠️ Commit hook failed: {e}")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _migrate_schema(self):
+        with self.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in _statements(script):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {i}")
+            if version and version < len(MIGRATIONS):
+                self._reindex(conn)
+            conn.executemany(
+                "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(self.defaults.get(key))) for key in SETTINGS_KEYS],
+            )
+
+    def _reindex(self, conn):
+        """Recompute indexed columns after a migration added new ones."""
+        rows = conn.execute("SELECT app_id, data FROM applications").fetchall()
+        assignments = ", ".join(f"{name} = ?" for name, _, _ in INDEXED_COLUMNS)
+        conn.executemany(
+            f"UPDATE applications SET {assignments} WHERE app_id = ?",
+            [
+                tuple(getter(app) for _, _, getter in INDEXED_COLUMNS) + (app_id,)
+                for app_id, app in ((r[0], json.loads(r[1])) for r in rows)
+            ],
+        )
+
+    # === Applications ===
+    def _row(self, app):
+        return (
+            (app["app_id"],)
+            + tuple(getter(app) for _, _, getter in INDEXED_COLUMNS)
+            + (_now(), json.dumps(app))
+        )
+
+    def upsert_applications(self, apps):
+        """
+        Insert or update applications; unchanged rows are not rewritten. Written
+        rows are stamped with the data_version this transaction commits as, so
+        readers can fetch only rows changed since a version they have seen.
+        """
+        columns = [name for name, _, _ in INDEXED_COLUMNS]
+        placeholders = ", ".join("?" for _ in range(len(columns) + 4))
+        updates = ", ".join(
+            f"{c} = excluded.{c}" for c in columns + ["updated_at", "data", "row_version"]
+        )
+        sql = (
+            f"INSERT INTO applications (app_id, {', '.join(columns)}, updated_at, data, row_version) "
+            f"VALUES ({placeholders}) "
+            f"ON CONFLICT(app_id) DO UPDATE SET {updates} "
+            "WHERE applications.data IS NOT excluded.data"
+        )
+        with self.transaction() as conn:
+            row_version = self.data_version() + 1
+            conn.executemany(sql, [self._row(app) + (row_version,) for app in apps])
+
+    def upsert_application(self, app):
+        self.upsert_applications([app])
+
+    def patch_applications(self, updates):
+        """
+        Set top-level fields on many applications without round-tripping their
+        JSON through Python. `updates` maps app_id -> {field: value}.
+        """
+        indexed = {name for name, _, _ in INDEXED_COLUMNS}
+        groups = {}
+        for app_id, fields in updates.items():
+            groups.setdefault(tuple(sorted(fields)), []).append((app_id, fields))
+        with self.transaction() as conn:
+            row_version = self.data_version() + 1
+            now = _now()
+            for names, items in groups.items():
+                json_args = ", ".join(f"'$.{name}', json(?)" for name in names)
+                column_sets = "".join(f", {name} = ?" for name in names if name in indexed)
+                sql = (
+                    f"UPDATE applications SET data = json_set(data, {json_args}){column_sets}, "
+                    "row_version = ?, updated_at = ? WHERE app_id = ?"
+                )
+                conn.executemany(sql, [
+                    tuple(json.dumps(fields[name]) for name in names)
+                    + tuple(fields[name] for name in names if name in indexed)
+                    + (row_version, now, app_id)
+                    for app_id, fields in items
+                ])
+
+    def update_application_fields(self, app_id, **fields):
+        """Read-modify-write of a few fields on one application. Returns the new record."""
+        with self.transaction():
+            app = self.get_application(app_id)
+            if app is None:
+                return None
+            app.update(fields)
+            self.upsert_application(app)
+        return app
+
+    def get_application(self, app_id):
+        row = self._connect().execute(
+            "SELECT data FROM applications WHERE app_id = ?", (app_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _where(self, filters):
+        known = {name for name, _, _ in INDEXED_COLUMNS} | {"app_id"}
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in known:
+                raise ValueError(f"Cannot filter on unindexed field: {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def list_applications(self, limit=None, newest_first=False, **filters):
+        where, params = self._where(filters)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT data FROM applications{where} ORDER BY seq {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(data) for (data,) in self._connect().execute(sql, params)]
+
+    SEARCH_FIELDS = ("applicant_name_marksheet", "aadhaar_name", "name", "applicant_email")
+
+    def search_applications(self, terms, limit=50):
+        """Applications whose app_id equals, or whose name/email contains, any term."""
+        if not terms:
+            return []
+        field_match = " OR ".join(f"json_extract(data, '$.{f}') LIKE ?" for f in self.SEARCH_FIELDS)
+        clauses = " OR ".join(f"app_id = ? OR {field_match}" for _ in terms)
+        params = [
+            p for term in terms
+            for p in [term] + [f"%{term}%"] * len(self.SEARCH_FIELDS)
+        ]
+        rows = self._connect().execute(
+            f"SELECT data FROM applications WHERE {clauses} ORDER BY seq LIMIT ?", params + [limit]
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def count_applications(self, **filters):
+        where, params = self._where(filters)
+        return self._connect().execute(
+            f"SELECT COUNT(*) FROM applications{where}", params
+        ).fetchone()[0]
+
+    def fetch_columns(self, fields, since_version=0, **filters):
+        """
+        Flat rows for analytics: `fields` maps output names to JSON paths in the
+        record (e.g. {"rank": "$.wbjee_rank"}). SQLite does the JSON extraction,
+        so no per-record Python dicts are built. Each row starts with seq and
+        row_version, and only rows written after `since_version` are returned.
+        """
+        where, params = self._where(filters)
+        where += (" AND " if where else " WHERE ") + "row_version > ?"
+        params.append(since_version)
+        selects = ", ".join(f"json_extract(data, ?) AS {name}" for name in fields)
+        rows = self._connect().execute(
+            f"SELECT seq, row_version, {selects} FROM applications{where} ORDER BY seq",
+            list(fields.values()) + params,
+        )
+        return rows.fetchall()
+
+    def count_by(self, column):
+        """{value: count} over one indexed column, e.g. count_by("loan_status")."""
+        if column not in {name for name, _, _ in INDEXED_COLUMNS}:
+            raise ValueError(f"Cannot group by unindexed field: {column}")
+        rows = self._connect().execute(
+            f"SELECT {column}, COUNT(*) FROM applications GROUP BY {column}"
+        )
+        return dict(rows.fetchall())
+
+    # === Settings & Director Log ===
+    def get_settings(self):
+        rows = self._connect().execute("SELECT key, value FROM settings")
+        return {key: json.loads(value) for key, value in rows}
+
+    def get_setting(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM settings WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else self.defaults.get(key)
+
+    def update_settings(self, **values):
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value)) for key, value in values.items()],
+            )
+
+    def debit_loan_budget(self, amount):
+        """
+        Atomically take `amount` from loan_budget (a negative amount credits it
+        back). Returns False, leaving the budget untouched, if less than
+        `amount` is left.
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE settings SET value = CAST(value AS NUMERIC) - ? "
+                "WHERE key = 'loan_budget' AND CAST(value AS NUMERIC) >= ?",
+                (amount, amount),
+            )
+        return cursor.rowcount == 1
+
+    def director_log(self):
+        rows = self._connect().execute("SELECT entry FROM director_log ORDER BY id")
+        return [entry for (entry,) in rows]
+
+    def append_director_log(self, *entries):
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO director_log (created_at, entry) VALUES (?, ?)",
+                [(_now(), entry) for entry in entries],
+            )
+
+    # === Whole-document Compatibility ===
+    def load_all(self):
+        """Assemble the legacy admission_data dict from the store."""
+        with self.transaction(immediate=False):  # one consistent snapshot across tables
+            data = {"applications": self.list_applications()}
+            data.update(self.get_settings())
+            data["director_log"] = self.director_log()
+        return data
+
+    def save_all(self, data):
+        """
+        Write a legacy admission_data dict back. Applications are upserted (never
+        deleted) and director_log entries beyond those already stored are appended.
+        Settings are overwritten as given, so concurrent writers should prefer
+        upsert_application/debit_loan_budget over load_all + save_all.
+        """
+        with self.transaction() as conn:
+            self.upsert_applications(data.get("applications", []))
+            self.update_settings(**{k: data[k] for k in SETTINGS_KEYS if k in data})
+            stored = conn.execute("SELECT COUNT(*) FROM director_log").fetchone()[0]
+            new_entries = data.get("director_log", [])[stored:]
+            if new_entries:
+                self.append_director_log(*new_entries)
+
+    def export_json(self, json_path):
+        """Atomically write the whole store out as a legacy JSON document."""
+        write_json_atomic(json_path, self.load_all())
+
+    def data_version(self):
+        """Counter bumped by every committed write; cheap to poll for cache invalidation."""
+        return int(self.get_meta("data_version") or 0)
+
+    # === JSON Migration ===
+    def get_meta(self, key):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def migrate_from_json(self, json_path, force=False):
+        """
+        One-shot import of a legacy admission_data JSON file. Returns the number
+        of applications imported, or 0 if this store was already migrated.
+        """
+        if self.get_meta("migrated_from") and not force:
+            return 0
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        with self.transaction():
+            self.save_all(data)
+            self.set_meta("migrated_from", os.path.abspath(json_path))
+        return len(data.get("applications", []))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from gen_ai_project import DB_FILE, DATA_FILE, DEFAULT_DATA_STRUCTURE
+
+    parser = argparse.ArgumentParser(description="Move admission data between JSON and the SQLite store.")
+    parser.add_argument("--db", default=DB_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = commands.add_parser("migrate", help="Import a legacy JSON file once")
+    migrate_cmd.add_argument("json_path", nargs="?", default=DATA_FILE)
+    migrate_cmd.add_argument("--force", action="store_true", help="Re-import even if already migrated")
+    export_cmd = commands.add_parser("export", help="Write the store out as JSON")
+    export_cmd.add_argument("json_path")
+    args = parser.parse_args()
+
+    store = AdmissionStore(args.db, DEFAULT_DATA_STRUCTURE)
+    if args.command == "migrate":
+        count = store.migrate_from_json(args.json_path, force=args.force)
+        print(f"✅ Migrated {count} applications from {args.json_path} into {args.db}.")
+    else:
+        store.export_json(args.json_path)
+        print(f"✅ Exported {args.db} to {args.json_path}.")
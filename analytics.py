@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from admission_store import write_json_atomic
+
+# === Columnar Layout ===
+# Column -> JSON path in the application record. Status columns are stored as
+# categoricals (dictionary-encoded in Arrow/Parquet).
+ANALYTICS_FIELDS = {
+    "app_id": "$.app_id",
+    "name": "$.name",
+    "name_marksheet": "$.applicant_name_marksheet",
+    "email": "$.applicant_email",
+    "marks10": "$.marks.class10_pcm_perc",
+    "marks12": "$.marks.class12_pcm_perc",
+    "rank": "$.wbjee_rank",
+    "income": "$.family_income_lpa",
+    "loan_requested": "$.loan_requested",
+    "aadhaar_number": "$.aadhaar_number",
+    "extraction": "$.extraction_status",
+    "validation": "$.validation_status",
+    "loan": "$.loan_status",
+    "communication": "$.communication_status",
+    "fee_slip": "$.fee_slip_status",
+}
+STATUS_COLUMNS = ("extraction", "validation", "loan", "communication", "fee_slip")
+
+INCOME_BANDS = (0, 2.5, 5, 8, np.inf)
+INCOME_BAND_LABELS = ("<2.5", "2.5-5", "5-8", "8+")
+RANK_BINS = (0, 1000, 2500, 5000, 10000, 20000, np.inf)
+RANK_BIN_LABELS = ("1-1000", "1001-2500", "2501-5000", "5001-10000", "10001-20000", "20000+")
+
+
+def _categorize(df):
+    for column in STATUS_COLUMNS:
+        df[column] = df[column].astype("category")
+    return df
+
+def typed_frame(rows):
+    """Typed DataFrame (indexed by app_id) from store.fetch_columns(ANALYTICS_FIELDS) rows."""
+    df = pd.DataFrame.from_records(rows, columns=["seq", "row_version"] + list(ANALYTICS_FIELDS))
+    df["display_name"] = df["name"].fillna(df["name_marksheet"])
+    df["aadhaar_name"] = df["display_name"]
+    df["aadhaar_number"] = df["aadhaar_number"].fillna("").astype(str)
+    for column in ("marks10", "marks12", "income"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["rank"] = pd.to_numeric(df["rank"], errors="coerce").astype("Int64")
+    df["loan_requested"] = df["loan_requested"].fillna(False).astype(bool)
+    return _categorize(df).set_index("app_id", drop=False)
+
+
+# === Aggregates ===
+def validation_funnel(df):
+    """Applications remaining at each stage, submitted -> email sent."""
+    valid = df["validation"] == "Valid"
+    return {
+        "submitted": int(len(df)),
+        "extracted": int(df["extraction"].isin(["Extracted", "Partial"]).sum()),
+        "valid": int(valid.sum()),
+        "loan_requested": int((valid & df["loan_requested"]).sum()),
+        "loan_approved": int((df["loan"] == "Approved").sum()),
+        "email_sent": int((df["communication"] == "Email Sent").sum()),
+    }
+
+def loan_approval_by_income(df):
+    """Per income band (LPA): loan requests decided, approved and approval rate."""
+    decided = df[df["loan"].isin(["Approved", "Rejected"])]
+    bands = pd.cut(decided["income"], INCOME_BANDS, labels=INCOME_BAND_LABELS, right=False)
+    grouped = (decided["loan"] == "Approved").groupby(bands, observed=False).agg(["count", "sum"])
+    return {
+        str(band): {
+            "requests": int(row["count"]),
+            "approved": int(row["sum"]),
+            "approval_rate": round(row["sum"] / row["count"], 3) if row["count"] else None,
+        }
+        for band, row in grouped.iterrows()
+    }
+
+def rank_histogram(df):
+    counts = pd.cut(df["rank"].astype(float), RANK_BINS, labels=RANK_BIN_LABELS).value_counts(sort=False)
+    return {str(label): int(count) for label, count in counts.items()}
+
+
+class ApplicationTable:
+    """
+    In-memory typed table of all applications, refreshed incrementally: when
+    the store's data_version moves only rows written since the last refresh are
+    fetched and merged. Aggregates are cached per data_version.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._df = None
+        self._version = -1
+        self._aggregates = None
+        self._lock = threading.Lock()
+
+    def frame(self):
+        with self._lock:
+            version = self.store.data_version()
+            if version != self._version:
+                since = 0 if self._df is None else self._version
+                changed = typed_frame(self.store.fetch_columns(ANALYTICS_FIELDS, since_version=since))
+                if self._df is None or since == 0:
+                    self._df = changed
+                elif len(changed):
+                    kept = self._df.drop(index=changed.index, errors="ignore")
+                    # concat drops mismatched categories, so re-categorize
+                    self._df = _categorize(pd.concat([kept, changed])).sort_values("seq")
+                self._version = version
+                self._aggregates = None
+            return self._df
+
+    def aggregates(self):
+        df = self.frame()
+        with self._lock:
+            if self._aggregates is None:
+                self._aggregates = {
+                    "funnel": validation_funnel(df),
+                    "loan_approval_by_income_lpa": loan_approval_by_income(df),
+                    "rank_histogram": rank_histogram(df),
+                }
+            return self._aggregates
+
+
+# === Columnar Export ===
+# <dir>/part-<from>-<to>.<ext> holds rows written in data versions (from, to];
+# <dir>/manifest.json lists the parts and the last exported version.
+EXPORT_FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+
+def _manifest_path(directory):
+    return os.path.join(directory, "manifest.json")
+
+def _read_manifest(directory):
+    path = _manifest_path(directory)
+    if not os.path.exists(path):
+        return {"version": 0, "parts": []}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _write_part(df, path, fmt):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+
+def export_columnar(store, directory, fmt="parquet", full=False):
+    """
+    Write rows changed since the previous export (everything with full=True)
+    as a new part. Returns the manifest entry for the part, or None if nothing
+    changed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"version": 0, "parts": []} if full else _read_manifest(directory)
+    since = manifest["version"]
+    with store.transaction(immediate=False):  # rows and version from one snapshot
+        until = store.data_version()
+        rows = store.fetch_columns(ANALYTICS_FIELDS, since_version=since)
+    if not rows and not full:
+        return None
+    part = {
+        "file": f"part-{since:010d}-{until:010d}.{EXPORT_FORMATS[fmt]}",
+        "format": fmt,
+        "since": since,
+        "until": until,
+        "rows": len(rows),
+    }
+    _write_part(typed_frame(rows), os.path.join(directory, part["file"]), fmt)
+    replaced = _read_manifest(directory)["parts"] if full else []
+    manifest["parts"].append(part)
+    manifest["version"] = until
+    write_json_atomic(_manifest_path(directory), manifest)
+    for old in replaced:  # only once the new manifest no longer lists them
+        path = os.path.join(directory, old["file"])
+        if old["file"] != part["file"] and os.path.exists(path):
+            os.remove(path)
+    return part
+
+def read_export(directory):
+    """Current state from an export directory: the latest version of every application."""
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    frames = []
+    for part in _read_manifest(directory)["parts"]:
+        path = os.path.join(directory, part["file"])
+        table = pq.read_table(path) if part["format"] == "parquet" else feather.read_table(path)
+        frames.append(table.to_pandas())
+    if not frames:
+        return typed_frame([])
+    df = pd.concat(frames).drop_duplicates("app_id", keep="last")
+    return _categorize(df).set_index("app_id", drop=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from gen_ai_project import get_store
+
+    parser = argparse.ArgumentParser(description="Columnar export and aggregate reports over applications.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="Export changed applications as Parquet/Arrow")
+    export_cmd.add_argument("directory")
+    export_cmd.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet")
+    export_cmd.add_argument("--full", action="store_true", help="Rewrite everything as a single part")
+    commands.add_parser("report", help="Print the funnel, loan approval by income and rank histogram")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        part = export_columnar(get_store(), args.directory, fmt=args.format, full=args.full)
+        print(f"✅ Exported {part['rows']} applications to {part['file']}." if part else "✅ Nothing changed.")
+    else:
+        print(json.dumps(ApplicationTable(get_store()).aggregates(), indent=2))
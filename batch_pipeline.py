@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import gen_ai_project as backend
+from dedup import OriginalIndex, duplicate_keys, find_duplicate, mark_duplicate
+from pdf_cache import file_sha256
+
+# === Loading Pending Applications ===
+def load_pending(source):
+    """
+    Read pending applications from a manifest (.json list / {"applications": [...]}
+    or .jsonl, one student_data dict per entry) or from a directory laid out like
+    UPLOAD_DIR: <app_id>_marksheet.pdf, <app_id>_aadhaar.pdf and an optional
+    <app_id>.json holding the remaining form fields.
+    """
+    source = Path(source)
+    if source.is_dir():
+        records = []
+        for marksheet in sorted(source.glob("*_marksheet.pdf")):
+            app_id = marksheet.name[: -len("_marksheet.pdf")]
+            record = {"app_id": app_id}
+            extra = source / f"{app_id}.json"
+            if extra.exists():
+                with open(extra, "r") as f:
+                    record.update(json.load(f))
+            record["marksheet_pdf_path"] = str(marksheet)
+            aadhaar = source / f"{app_id}_aadhaar.pdf"
+            record["aadhaar_pdf_path"] = str(aadhaar) if aadhaar.exists() else None
+            records.append(record)
+        return records
+
+    with open(source, "r") as f:
+        if source.suffix == ".jsonl":
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data["applications"] if isinstance(data, dict) else data
+
+
+# === Stage Workers ===
+def _init_worker():
+    # The batch pool already spreads applications over CPUs, so each worker
+    # OCRs its pages inline instead of starting a nested OCR pool.
+    backend.OCR_WORKERS = 1
+
+def _single_app_state(app, criteria):
+    from process_graph import ProcessAppState
+    return ProcessAppState(app=app, criteria=criteria)
+
+def _extract_and_validate(app, criteria):
+    # Runs in a worker process: PDF parsing/OCR plus the (pure) validation node.
+    state = _single_app_state(app, criteria)
+    state = backend.data_extraction_node(state)
+    state = backend.validation_node(state)
+    return state.app
+
+def _communicate(app, criteria):
+    state = backend.communication_node(_single_app_state(app, criteria))
+    return state.app
+
+
+class _Progress:
+    def __init__(self, stage, total, every):
+        self.stage, self.total, self.every = stage, total, max(1, every)
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def tick(self):
+        self.done += 1
+        if self.done % self.every == 0 or self.done == self.total:
+            elapsed = time.perf_counter() - self.started
+            rate = self.done / elapsed if elapsed else 0.0
+            print(f"⏱️ {self.stage}: {self.done}/{self.total} ({rate:.1f} apps/s)")
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "seconds": round(elapsed, 3),
+            "apps_per_second": round(self.done / elapsed, 2) if elapsed else None,
+        }
+
+
+# === Batch Entry Point ===
+def run_batch(student_records, workers=None, io_threads=8, progress_every=25, skip_processed=True):
+    """
+    Run extract → validate → communicate → loan over many applications.
+
+    Extraction fans out over a process pool and email over a thread pool. Loans
+    are then decided for the whole batch in priority order against the remaining
+    budget (backend.decide_loans), so the outcome does not depend on which
+    worker finished first, and all results are committed in one store
+    transaction. Returns a report dict.
+    """
+    store = backend.get_store()
+    criteria = backend.current_criteria().as_dict()
+    report = {"total": len(student_records), "skipped": 0, "duplicates": 0, "failed": 0, "stages": {}}
+
+    apps = []
+    duplicates = []
+    in_batch = OriginalIndex()
+    for seq, record in enumerate(student_records):
+        existing = store.get_application(record["app_id"]) if skip_processed else None
+        if existing and existing.get("validation_status") != "Pending":
+            report["skipped"] += 1
+            continue
+        app = backend.new_application(record)
+        if backend.DUPLICATE_POLICY:
+            for kind in ("marksheet", "aadhaar"):
+                path = app[f"{kind}_pdf_path"]
+                if not app[f"{kind}_sha256"] and path and os.path.exists(path):
+                    app[f"{kind}_sha256"] = file_sha256(path)
+            keys = duplicate_keys(app)
+            original = find_duplicate(store, app) or in_batch.match(keys)
+            if original is not None:
+                duplicates.append(mark_duplicate(app, original))
+                continue
+            in_batch.add(keys, {"app_id": app["app_id"], "seq": seq})
+        apps.append(app)
+    report["duplicates"] = len(duplicates)
+
+    errors = []
+    progress = _Progress("extract+validate", len(apps), progress_every)
+    processed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_extract_and_validate, app, criteria): app for app in apps}
+        for future in as_completed(futures):
+            try:
+                processed.append(future.result())
+            except Exception as e:
+                errors.append((futures[future], e))
+            progress.tick()
+    report["stages"]["extract_validate"] = progress.summary()
+
+    progress = _Progress("communicate", len(processed), progress_every)
+    communicated = []
+    with ThreadPoolExecutor(max_workers=io_threads) as pool:
+        for app in pool.map(lambda a: _communicate(a, criteria), processed):
+            communicated.append(app)
+            progress.tick()
+    report["stages"]["communicate"] = progress.summary()
+
+    progress = _Progress("loan+commit", len(communicated), progress_every)
+    final_apps = communicated
+    with store.transaction():
+        backend.decide_loans(final_apps)
+        store.upsert_applications(final_apps + duplicates + [app for app, _ in errors])
+        if errors:
+            store.append_director_log(*(f"ERROR: {app['app_id']}: {e}" for app, e in errors))
+    progress.done = len(final_apps)
+    report["stages"]["loan_commit"] = progress.summary()
+    backend.flush_metrics()
+
+    report["processed"] = len(final_apps)
+    report["failed"] = len(errors)
+    report["loans_approved"] = sum(1 for a in final_apps if a.get("loan_status") == "Approved")
+    total_seconds = sum(stage["seconds"] for stage in report["stages"].values())
+    report["apps_per_second"] = round(len(apps) / total_seconds, 2) if total_seconds else None
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process many pending admission applications in parallel.")
+    parser.add_argument("source", help="Directory of uploaded PDFs or a .json/.jsonl manifest")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes for PDF/OCR extraction")
+    parser.add_argument("--io-threads", type=int, default=8, help="Threads for email delivery")
+    parser.add_argument("--progress-every", type=int, default=25)
+    parser.add_argument("--reprocess", action="store_true", help="Also re-run applications already processed")
+    args = parser.parse_args()
+
+    records = load_pending(args.source)
+    result = run_batch(
+        records,
+        workers=args.workers,
+        io_threads=args.io_threads,
+        progress_every=args.progress_every,
+        skip_processed=not args.reprocess,
+    )
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,443 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from admission_store import AdmissionStore, write_json_atomic
+
+# === Synthetic Data ===
+FIRST_NAMES = ["Anjali", "Riya", "Arjun", "Sourav", "Priya", "Rahul", "Sneha", "Aditya",
+               "Ishita", "Kunal", "Moumita", "Debjit", "Tanvi", "Rohan", "Ananya", "Sayan"]
+LAST_NAMES = ["Sharma", "Sen", "Das", "Ganguly", "Bose", "Chatterjee", "Mukherjee", "Roy",
+              "Banerjee", "Ghosh", "Dutta", "Paul", "Saha", "Mondal", "Kumar", "Sinha"]
+
+
+def synthetic_student(i, rng):
+    """Form fields plus the values printed on the synthetic PDFs for student i."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        "app_id": f"bench-{i:07d}",
+        "name": name,
+        "email": f"{name.lower().replace(' ', '.')}.{i}@example.com",
+        "aadhaar_number": " ".join(f"{rng.randint(0, 9999):04d}" for _ in range(3)),
+        "dob": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2004, 2007)}",
+        "class10_pcm_perc": round(rng.uniform(45, 99), 2),
+        "class12_pcm_perc": round(rng.uniform(45, 99), 2),
+        "wbjee_rank": rng.randint(1, 40000),
+        "family_income_lpa": round(rng.uniform(1, 12), 1),
+        "loan_requested": rng.random() < 0.4,
+    }
+
+def synthetic_application(student, rng):
+    """A processed application record, as the graph would have stored it."""
+    import gen_ai_project as backend
+
+    app = copy.deepcopy(backend.DEFAULT_APPLICATION_STRUCTURE)
+    valid = (student["class10_pcm_perc"] >= 60 and student["class12_pcm_perc"] >= 60
+             and student["wbjee_rank"] <= 10000)
+    app.update({
+        "app_id": student["app_id"],
+        "name": student["name"],
+        "applicant_name_marksheet": student["name"],
+        "applicant_email": student["email"],
+        "marks": {"class10_pcm_perc": student["class10_pcm_perc"],
+                  "class12_pcm_perc": student["class12_pcm_perc"]},
+        "wbjee_rank": student["wbjee_rank"],
+        "aadhaar_name": student["name"],
+        "aadhaar_number": student["aadhaar_number"],
+        "family_income_lpa": student["family_income_lpa"],
+        "loan_requested": student["loan_requested"],
+        "extraction_status": "Extracted",
+        "validation_status": "Valid" if valid else "Invalid",
+        "validation_reason": None if valid else "Marks or WBJEE rank did not meet criteria",
+        "communication_status": rng.choice(["Email Sent", "Email Sent", "Queued", "Failed to send"]),
+        "loan_status": "Not Requested",
+    })
+    if student["loan_requested"]:
+        approved = valid and student["family_income_lpa"] <= 5.0 and rng.random() < 0.5
+        app["loan_status"] = "Approved" if approved else "Rejected"
+    return app
+
+
+# === Synthetic PDFs ===
+def write_lines_pdf(path, lines):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path), pagesize=A4)
+    y = A4[1] - 72
+    for line in lines:
+        c.drawString(72, y, line)
+        y -= 20
+    c.save()
+
+def _rasterize_pdf(path, dpi=150):
+    # Replaces the PDF with image-only pages so extraction has to fall back to OCR.
+    import fitz  # PyMuPDF
+
+    with fitz.open(str(path)) as doc, fitz.open() as out:
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi)
+            out.new_page(width=page.rect.width, height=page.rect.height).insert_image(page.rect, pixmap=pix)
+        data = out.tobytes()
+    with open(path, "wb") as f:
+        f.write(data)
+
+def write_marksheet_pdf(path, student, rasterized=False):
+    write_lines_pdf(path, [
+        "WEST BENGAL COUNCIL OF HIGHER SECONDARY EDUCATION",
+        f"Name: {student['name']}",
+        f"Class 10 PCM Percentage: {student['class10_pcm_perc']}",
+        f"Class 12 PCM Percentage: {student['class12_pcm_perc']}",
+        f"WBJEE Rank: {student['wbjee_rank']}",
+    ])
+    if rasterized:
+        _rasterize_pdf(path)
+
+def write_aadhaar_pdf(path, student, rasterized=False):
+    write_lines_pdf(path, [
+        "Government of India",
+        student["name"],
+        f"DOB: {student['dob']}",
+        student["aadhaar_number"],
+    ])
+    if rasterized:
+        _rasterize_pdf(path)
+
+def generate_corpus(out_dir, count, rasterized_share=0.0, seed=7):
+    """
+    Write `count` synthetic submissions laid out like UPLOAD_DIR (see
+    batch_pipeline.load_pending). A `rasterized_share` of them get image-only
+    PDFs. Returns the student_data records.
+    """
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    records = []
+    for i in range(count):
+        student = synthetic_student(i, rng)
+        rasterized = rng.random() < rasterized_share
+        marksheet = out_dir / f"{student['app_id']}_marksheet.pdf"
+        aadhaar = out_dir / f"{student['app_id']}_aadhaar.pdf"
+        write_marksheet_pdf(marksheet, student, rasterized)
+        write_aadhaar_pdf(aadhaar, student, rasterized)
+        record = {
+            "app_id": student["app_id"],
+            "email": student["email"],
+            "aadhaar_number": student["aadhaar_number"],
+            "family_income_lpa": student["family_income_lpa"],
+            "loan_requested": student["loan_requested"],
+        }
+        with open(out_dir / f"{student['app_id']}.json", "w") as f:
+            json.dump(record, f)
+        records.append(dict(record, marksheet_pdf_path=str(marksheet), aadhaar_pdf_path=str(aadhaar)))
+    return records
+
+def build_store(db_path, count, seed=7, chunk=5000):
+    """An AdmissionStore pre-filled with `count` processed applications."""
+    import gen_ai_project as backend
+
+    rng = random.Random(seed)
+    store = AdmissionStore(db_path, backend.DEFAULT_DATA_STRUCTURE)
+    for start in range(0, count, chunk):
+        store.upsert_applications([
+            synthetic_application(synthetic_student(i, rng), rng)
+            for i in range(start, min(start + chunk, count))
+        ])
+    return store
+
+
+# === Timing ===
+def _stats(runs):
+    return {
+        "runs": len(runs),
+        "min_s": round(min(runs), 6),
+        "median_s": round(statistics.median(runs), 6),
+        "mean_s": round(statistics.mean(runs), 6),
+    }
+
+def _time(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return _stats(runs)
+
+
+class _StubLLM:
+    """Stands in for ChatOpenAI and records the size of each prompt."""
+
+    def __init__(self):
+        self.prompt_chars = []
+
+    def invoke(self, messages):
+        self.prompt_chars.append(sum(len(m.content) for m in messages))
+        return SimpleNamespace(content="stub answer")
+
+
+# Module state in gen_ai_project that is bound to one store or database file.
+# The benchmark swaps all of it for its own and restores it afterwards.
+BACKEND_STATE = (
+    "_store", "_journal", "_outbox", "_email_sender", "_pdf_cache", "_criteria_registry",
+    "_loan_allocator", "_job_queue", "_job_pool", "_process_app_graph", "_graph_checkpointer",
+    "_director_engine", "_application_table",
+    "GRAPH_CHECKPOINT_DB", "START_EMAIL_SENDER", "START_JOB_WORKERS",
+)
+
+def _save_backend(backend):
+    return {name: getattr(backend, name) for name in BACKEND_STATE}
+
+def _restore_backend(backend, saved):
+    for name, value in saved.items():
+        setattr(backend, name, value)
+
+def _use_store(backend, store, pdf_cache, checkpoint_db):
+    # Point the backend at the benchmark store: cached singletons are dropped
+    # so they are rebuilt against it, graph checkpoints go to checkpoint_db, and
+    # email delivery (SMTP) and job workers are never started.
+    for name in BACKEND_STATE:
+        if name.startswith("_"):
+            setattr(backend, name, None)
+    backend._store = store
+    backend._pdf_cache = pdf_cache
+    backend.GRAPH_CHECKPOINT_DB = str(checkpoint_db)
+    backend.START_EMAIL_SENDER = False
+    backend.START_JOB_WORKERS = False
+
+def bench_pdfs(backend, work_dir, repeat):
+    from pdf_cache import PdfTextCache
+    from process_graph import ProcessAppState
+
+    results, paths = {}, {}
+    rng = random.Random(11)
+    student = synthetic_student(0, rng)
+    for kind, rasterized in (("text", False), ("rasterized", True)):
+        marksheet = work_dir / f"bench_{kind}_marksheet.pdf"
+        aadhaar = work_dir / f"bench_{kind}_aadhaar.pdf"
+        try:
+            write_marksheet_pdf(marksheet, student, rasterized)
+            write_aadhaar_pdf(aadhaar, student, rasterized)
+        except Exception as e:  # rasterizing needs PyMuPDF
+            results[f"pdf.{kind}"] = {"skipped": str(e)}
+            continue
+        paths[kind] = (marksheet, aadhaar)
+        backend._pdf_cache = PdfTextCache(work_dir / f"pdf_cache_{kind}.sqlite3")
+        # OCR is slow, so image-only PDFs are timed fewer times.
+        n = repeat if not rasterized else max(1, repeat // 5)
+        results[f"extract_text_from_pdf.{kind}.uncached"] = _time(
+            lambda: backend._extract_text_uncached(marksheet), n)
+        backend.extract_text_from_pdf(marksheet)
+        results[f"extract_text_from_pdf.{kind}.cached"] = _time(
+            lambda: backend.extract_text_from_pdf(marksheet), repeat)
+        app = backend.new_application({"app_id": "bench", "marksheet_pdf_path": str(marksheet),
+                                       "aadhaar_pdf_path": str(aadhaar)})
+        results[f"data_extraction_node.{kind}"] = _time(
+            lambda: backend.data_extraction_node(ProcessAppState(app=copy.deepcopy(app))), repeat)
+    return results, paths["text"]
+
+def bench_store(backend, store, size, marksheet, aadhaar, repeat):
+    from dashboard_model import DashboardModel
+    from director_query import DirectorQueryEngine, build_prompt, compute_summary, relevant_records
+
+    results = {}
+    heavy = max(1, repeat // 5) if size >= 100000 else repeat
+    data = store.load_all()
+    results["load_data"] = _time(backend.load_data, heavy)
+    results["save_data"] = _time(lambda: backend.save_data(data), heavy)
+    del data
+
+    results["dashboard.build"] = _time(lambda: DashboardModel(store).frame(), heavy)
+    model = DashboardModel(store)
+    model.frame()
+    results["dashboard.page"] = _time(lambda: model.page(page=2, validation="Valid"), repeat)
+
+    llm = _StubLLM()
+    engine = DirectorQueryEngine(store, llm_factory=lambda: llm, model="stub")
+    query = "Which students named Riya Sen have a rejected loan?"
+    results["director_query"] = _time(lambda: engine.answer(query), repeat)
+    summary = compute_summary(store)
+    records = relevant_records(store, query)
+    results["director_query.prompt"] = {
+        "chars": len(build_prompt(query, summary, records)),
+        "records": len(records),
+        "llm_calls": len(llm.prompt_chars),
+    }
+
+    counter = iter(range(10 ** 9))
+    def run_graph():
+        # A fresh email and Aadhaar per run, so no run is short-circuited as a duplicate.
+        n = next(counter)
+        backend.run_single_application_graph({
+            "app_id": f"bench-graph-{n}",
+            "marksheet_pdf_path": str(marksheet),
+            "aadhaar_pdf_path": str(aadhaar),
+            "email": f"bench-graph-{n}@example.com",
+            "aadhaar_number": f"{900000000000 + n}",
+            "loan_requested": True,
+            "family_income_lpa": 3.0,
+        })
+    results["graph.run"] = _time(run_graph, repeat)
+    return results
+
+def bench_documents(store, work_dir, repeat, count=2000):
+    """Fee slips for `count` applications, one file each and merged, as documents per minute."""
+    from documents import render_documents
+
+    results = {}
+    apps = store.list_applications(limit=count)
+    context = {"batch_id": "bench", "issued_on": "01 Jan 2025", "due_on": "15 Jan 2025",
+               "fee_amount": 5000, "loan_amount": 5000}
+    for mode, merged in (("files", False), ("merged", True)):
+        runs = []
+        try:
+            for i in range(repeat):
+                out_dir = Path(work_dir) / f"documents_{mode}_{i}"
+                started = time.perf_counter()
+                render_documents("fee_slip", apps, str(out_dir), context, merged=merged)
+                runs.append(time.perf_counter() - started)
+        except ImportError as e:  # reportlab (and PyMuPDF for merging)
+            results[f"documents.fee_slip.{mode}"] = {"skipped": str(e)}
+            continue
+        result = _stats(runs)
+        result["documents"] = len(apps)
+        result["documents_per_minute"] = round(len(apps) / result["median_s"] * 60)
+        results[f"documents.fee_slip.{mode}"] = result
+    return results
+
+# Cold-start scenarios, each timed in a fresh interpreter. "backend+graph+llm"
+# is what importing gen_ai_project used to cost before those stacks were
+# loaded lazily.
+IMPORT_SCENARIOS = {
+    "backend": "import gen_ai_project",
+    "backend+graph": "import gen_ai_project; gen_ai_project.get_process_app_graph()",
+    "backend+graph+llm": "import gen_ai_project; gen_ai_project.get_process_app_graph(); import langchain_openai",
+}
+
+def bench_imports(repeat, work_dir):
+    results = {}
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    for name, statement in IMPORT_SCENARIOS.items():
+        code = ("import time; started = time.perf_counter(); "
+                f"{statement}; print(time.perf_counter() - started)")
+        runs = []
+        try:
+            for _ in range(repeat):
+                out = subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env,
+                                     capture_output=True, text=True, check=True)
+                runs.append(float(out.stdout.strip().splitlines()[-1]))
+        except subprocess.CalledProcessError as e:
+            results[f"import.{name}"] = {"skipped": (e.stderr.strip().splitlines() or ["failed"])[-1]}
+            continue
+        results[f"import.{name}"] = _stats(runs)
+    return results
+
+def run_benchmarks(sizes=(1000, 10000, 100000), repeat=5, work_dir=None):
+    """Run every benchmark; returns a JSON-serializable results document."""
+    import gen_ai_project as backend
+    from pdf_cache import PdfTextCache
+
+    started = time.perf_counter()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        saved = _save_backend(backend)
+        try:
+            report["results"].update(bench_imports(repeat, tmp))
+            pdf_results, (marksheet, aadhaar) = bench_pdfs(backend, tmp, repeat)
+            report["results"].update(pdf_results)
+            for size in sizes:
+                print(f"⏱️ Building a store with {size} applications...")
+                store = build_store(tmp / f"store_{size}.sqlite3", size)
+                _use_store(backend, store, PdfTextCache(tmp / "pdf_cache_text.sqlite3"), tmp / f"graph_checkpoints_{size}.sqlite3")
+                for name, result in bench_store(backend, store, size, marksheet, aadhaar, repeat).items():
+                    report["results"][f"{name}@{size}"] = result
+                if size == min(sizes):
+                    report["results"].update(bench_documents(store, tmp, max(1, repeat // 5)))
+                store.close()
+        finally:
+            _restore_backend(backend, saved)
+    report["meta"]["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+def compare(report, baseline, tolerance=1.25):
+    """Returns (name, baseline median, current median) for every timing slower than tolerance x baseline."""
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "median_s" not in result or "median_s" not in base:
+            continue
+        if result["median_s"] > base["median_s"] * tolerance:
+            regressions.append((name, base["median_s"], result["median_s"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Admission pipeline benchmarks and synthetic data.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    corpus = sub.add_parser("corpus", help="Write synthetic marksheet/Aadhaar PDFs for batch_pipeline.py")
+    corpus.add_argument("out_dir")
+    corpus.add_argument("--count", type=int, default=100)
+    corpus.add_argument("--rasterized", type=float, default=0.2, help="Share of image-only PDFs")
+
+    run = sub.add_parser("run", help="Run the benchmarks and write JSON results")
+    run.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated store sizes")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--output", default="benchmark_results.json")
+    run.add_argument("--baseline", help="Earlier results file to compare against")
+    run.add_argument("--tolerance", type=float, default=1.25, help="Allowed slowdown vs the baseline")
+
+    imports = sub.add_parser("imports", help="Only time cold imports of the backend")
+    imports.add_argument("--repeat", type=int, default=5)
+
+    documents = sub.add_parser("documents", help="Only time bulk fee-slip generation")
+    documents.add_argument("--count", type=int, default=2000)
+    documents.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "documents":
+        with tempfile.TemporaryDirectory() as tmp:
+            store = build_store(Path(tmp) / "store.sqlite3", args.count)
+            print(json.dumps(bench_documents(store, tmp, args.repeat, args.count), indent=2))
+        sys.exit(0)
+
+    if args.command == "imports":
+        with tempfile.TemporaryDirectory() as tmp:
+            print(json.dumps(bench_imports(args.repeat, tmp), indent=2))
+        sys.exit(0)
+
+    if args.command == "corpus":
+        records = generate_corpus(args.out_dir, args.count, args.rasterized)
+        print(f"✅ Wrote {len(records)} synthetic submissions to {args.out_dir}.")
+        sys.exit(0)
+
+    report = run_benchmarks([int(s) for s in args.sizes.split(",")], repeat=args.repeat)
+    write_json_atomic(args.output, report)
+    print(json.dumps(report["results"], indent=2))
+    print(f"✅ Results written to {args.output}.")
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"❌ {name}: {before:.6f}s -> {after:.6f}s")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,165 @@
+import json
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+
+# Bump when the patterns change so cached parses of old PDFs are redone.
+CRITERIA_PARSER_VERSION = "1"
+
+# === Criteria Spec ===
+# (criteria key, type, pattern); each pattern's first group is the value.
+# Numbers may not be followed by further digits, so "2024" in "WBJEE 2024"
+# cannot be read as the rank limit when a rank follows.
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+CRITERIA_SPEC = [
+    ("min_class10_pcm_perc", float,
+     r"(?i:class\s*10|10th|\bx\b)[^\n\d%]*?(?:pcm)?[^\n\d%]*?" + _NUMBER + r"\s*%"),
+    ("min_class12_pcm_perc", float,
+     r"(?i:class\s*12|12th|\bxii\b)[^\n\d%]*?(?:pcm)?[^\n\d%]*?" + _NUMBER + r"\s*%"),
+    ("max_wbjee_rank", int, r"(?i:wbjee)[^\n]*?(?i:rank)[^\n\d]*?" + _NUMBER + r"(?!\.?\d)"),
+    ("max_income_for_loan_lpa", float,
+     r"(?i:income)[^\n\d]*?" + _NUMBER + r"\s*(?i:lpa|lakhs?(?:\s+per\s+annum)?)"),
+]
+_COMPILED_SPEC = [(key, kind, re.compile(pattern)) for key, kind, pattern in CRITERIA_SPEC]
+
+
+def _to_number(raw, kind):
+    value = float(raw.replace(",", ""))
+    return int(value) if kind is int else value
+
+def parse_criteria_text(text):
+    """Criteria values found in the text, typed; keys that are not mentioned are left out."""
+    found = {}
+    for key, kind, pattern in _COMPILED_SPEC:
+        match = pattern.search(text or "")
+        if match:
+            found[key] = _to_number(match.group(1), kind)
+    return found
+
+
+@dataclass(frozen=True)
+class EligibilityCriteria:
+    """The active criteria: typed values plus the version and source PDF they came from."""
+    min_class10_pcm_perc: float = 60
+    min_class12_pcm_perc: float = 60
+    max_wbjee_rank: int = 10000
+    max_income_for_loan_lpa: float = 5.0
+    required_docs: tuple = ("Marksheet", "Aadhaar")
+    version: int = 0
+    source_sha256: str = None
+    _dict: dict = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_settings(cls, criteria, version=0, source_sha256=None):
+        known = {f.name for f in fields(cls)} - {"version", "source_sha256", "_dict"}
+        values = {k: v for k, v in (criteria or {}).items() if k in known}
+        if "required_docs" in values:
+            values["required_docs"] = tuple(values["required_docs"])
+        return cls(**values, version=version, source_sha256=source_sha256)
+
+    def as_dict(self):
+        """The legacy eligibility_criteria dict (built once per object)."""
+        if self._dict is None:
+            values = {k: v for k, v in asdict(self).items() if k not in ("version", "source_sha256", "_dict")}
+            values["required_docs"] = list(values["required_docs"])
+            object.__setattr__(self, "_dict", values)
+        return dict(self._dict)
+
+
+# === Registry ===
+CRITERIA_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS criteria_documents (
+        sha256 TEXT NOT NULL,
+        parser_version TEXT NOT NULL,
+        found TEXT NOT NULL,
+        parsed_at REAL NOT NULL,
+        PRIMARY KEY (sha256, parser_version)
+    )
+    """,
+]
+
+
+class CriteriaRegistry:
+    """
+    Parsed criteria PDFs cached in the AdmissionStore by content hash, and the
+    active criteria (settings: eligibility_criteria, criteria_version,
+    criteria_sha256) with an in-memory snapshot shared by all callers.
+    """
+
+    def __init__(self, store, defaults):
+        self.store = store
+        self.defaults = defaults
+        self._snapshot = None
+        self._snapshot_data_version = None
+        self._lock = threading.Lock()
+        with store.transaction() as conn:
+            for statement in CRITERIA_SCHEMA:
+                conn.execute(statement)
+
+    def parse(self, sha256, extract_text):
+        """
+        Criteria found in the PDF with this hash; extract_text() is only called
+        when the document has not been parsed by this parser version before.
+        Returns (found, cached).
+        """
+        with self.store.transaction(immediate=False) as conn:
+            row = conn.execute(
+                "SELECT found FROM criteria_documents WHERE sha256 = ? AND parser_version = ?",
+                (sha256, CRITERIA_PARSER_VERSION),
+            ).fetchone()
+        if row is not None:
+            return json.loads(row[0]), True
+        found = parse_criteria_text(extract_text())
+        with self.store.transaction(bump_version=False) as conn:  # parse cache, not settings
+            conn.execute(
+                "INSERT OR REPLACE INTO criteria_documents (sha256, parser_version, found, parsed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (sha256, CRITERIA_PARSER_VERSION, json.dumps(found), time.time()),
+            )
+        return found, False
+
+    def activate(self, sha256, found, source_path=None):
+        """
+        Apply parsed values over the current criteria. The version only moves
+        when the values change. Returns (criteria, changed).
+        """
+        with self.store.transaction():
+            settings = self.store.get_settings()
+            current = settings.get("eligibility_criteria") or self.defaults
+            merged = {**current, **found}
+            version = settings.get("criteria_version") or 0
+            changed = merged != current
+            if changed:
+                version += 1
+            self.store.update_settings(
+                eligibility_criteria=merged,
+                criteria_version=version,
+                criteria_sha256=sha256,
+                criteria_file_path=str(source_path) if source_path else settings.get("criteria_file_path"),
+            )
+        return EligibilityCriteria.from_settings(merged, version, sha256), changed
+
+    def current(self):
+        """
+        The active criteria as an immutable object. Settings are re-read only
+        after some write has moved data_version, and the cached object is kept
+        unless criteria_version itself changed.
+        """
+        data_version = self.store.data_version()
+        with self._lock:
+            if self._snapshot is not None and data_version == self._snapshot_data_version:
+                return self._snapshot
+        with self.store.transaction(immediate=False):
+            criteria = self.store.get_setting("eligibility_criteria") or self.defaults
+            version = self.store.get_setting("criteria_version") or 0
+            sha256 = self.store.get_setting("criteria_sha256")
+        with self._lock:
+            if self._snapshot is None or (self._snapshot.version, self._snapshot.source_sha256) != (version, sha256):
+                self._snapshot = EligibilityCriteria.from_settings(criteria, version, sha256)
+            self._snapshot_data_version = data_version
+            return self._snapshot
+
+    def has_uploaded_criteria(self):
+        return self.store.get_setting("criteria_sha256") is not None
@@ -0,0 +1,87 @@
+import pandas as pd
+
+from analytics import ApplicationTable
+
+DISPLAY_COLUMNS = {
+    "app_id": "App ID",
+    "display_name": "Name",
+    "email": "Email",
+    "marks10": "10th %",
+    "marks12": "12th %",
+    "rank": "WBJEE Rank",
+    "aadhaar_name": "Aadhaar Name",
+    "aadhaar_number": "Aadhaar Number",
+    "validation": "Validation",
+    "loan": "Loan",
+}
+
+SORTABLE = {"WBJEE Rank": "rank", "10th %": "marks10", "12th %": "marks12", "Name": "display_name"}
+
+
+class DashboardModel:
+    """
+    Admin dashboard view over the shared, incrementally refreshed
+    ApplicationTable: server-side filtering, sorting and paging plus the
+    analytics aggregates.
+    """
+
+    def __init__(self, store, table=None):
+        self.store = store
+        self.table = table if table is not None else ApplicationTable(store)
+
+    def frame(self):
+        return self.table.frame()
+
+    def analytics(self):
+        return self.table.aggregates()
+
+    def charts(self):
+        """The aggregates as labelled DataFrames, ready for st.bar_chart."""
+        a = self.analytics()
+        income = a["loan_approval_by_income_lpa"]
+        return {
+            "funnel": pd.DataFrame({"applications": a["funnel"]}),
+            "loan_approval_by_income": pd.DataFrame(
+                {"approval rate": {band: b["approval_rate"] or 0.0 for band, b in income.items()}}
+            ),
+            "rank_histogram": pd.DataFrame({"applications": a["rank_histogram"]}),
+        }
+
+    def metrics(self):
+        df = self.frame()
+        return {
+            "total": len(df),
+            "loans_approved": int((df["loan"] == "Approved").sum()),
+            "valid": int((df["validation"] == "Valid").sum()),
+        }
+
+    def status_options(self, column):
+        return sorted(self.frame()[column].dropna().unique().tolist())
+
+    def page(self, page=1, page_size=50, validation=None, loan=None, min_rank=None, max_rank=None,
+             min_marks12=None, sort_by="WBJEE Rank", ascending=True):
+        """
+        Filter, sort and slice server-side. Returns (display DataFrame, number of
+        matching rows).
+        """
+        df = self.frame()
+        conditions = []
+        if validation:
+            conditions.append(df["validation"] == validation)
+        if loan:
+            conditions.append(df["loan"] == loan)
+        if min_rank is not None:
+            conditions.append(df["rank"] >= min_rank)
+        if max_rank is not None:
+            conditions.append(df["rank"] <= max_rank)
+        if min_marks12 is not None:
+            conditions.append(df["marks12"] >= min_marks12)
+        mask = pd.Series(True, index=df.index)
+        for condition in conditions:
+            mask &= condition.fillna(False).astype(bool)  # missing ranks/marks never match
+        matching = df[mask]
+        if sort_by in SORTABLE:
+            matching = matching.sort_values(SORTABLE[sort_by], ascending=ascending, na_position="last")
+        start = max(page - 1, 0) * page_size
+        view = matching.iloc[start:start + page_size]
+        return view[list(DISPLAY_COLUMNS)].rename(columns=DISPLAY_COLUMNS).reset_index(drop=True), len(matching)
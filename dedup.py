@@ -0,0 +1,193 @@
+import json
+import time
+
+from admission_store import normalize_aadhaar, normalize_email
+
+# === Matching Rules ===
+# A submission duplicates an earlier, original application (duplicate_of IS
+# NULL) when it has the same Aadhaar number or the same marksheet/Aadhaar PDF.
+# A shared email only counts when the Aadhaar numbers do not contradict each
+# other: families and test accounts reuse one address for several students.
+# Only decided applications (Valid/Invalid) are originals: a Pending row may be
+# a run that failed, and the student's resubmission must still be processed.
+DOCUMENT_KEYS = ("aadhaar_key", "marksheet_sha256", "aadhaar_sha256")
+DUPLICATE_STATUS = "Duplicate"
+DECIDED_STATUSES = ("Valid", "Invalid")
+
+# Fields a duplicate may fill in on the original when they are missing there.
+# Decisions (validation, loan, email) are never changed by a merge.
+MERGE_FIELDS = (
+    "applicant_email",
+    "aadhaar_number",
+    "marksheet_pdf_path",
+    "aadhaar_pdf_path",
+    "marksheet_sha256",
+    "aadhaar_sha256",
+    "family_income_lpa",
+)
+
+DEDUP_FIELDS = {
+    "app_id": "$.app_id",
+    "duplicate_of": "$.duplicate_of",
+    "validation_status": "$.validation_status",
+    "loan_status": "$.loan_status",
+    **{name: f"$.{name}" for name in MERGE_FIELDS},
+}
+
+
+def duplicate_keys(app):
+    return {
+        "aadhaar_key": normalize_aadhaar(app.get("aadhaar_number")),
+        "email_key": normalize_email(app.get("applicant_email")),
+        "marksheet_sha256": app.get("marksheet_sha256"),
+        "aadhaar_sha256": app.get("aadhaar_sha256"),
+    }
+
+def find_duplicate(store, app):
+    """
+    The earliest decided original application that `app` duplicates, or None. Each key
+    is one lookup in a partial index, so the cost does not grow with the store.
+    Rows written after `app` (e.g. a later identical submission still in the
+    queue) never count as its original.
+    """
+    keys = duplicate_keys(app)
+    probes, params = [], []
+    for column in DOCUMENT_KEYS:
+        if keys[column]:
+            probes.append(f"{column} = ?")
+            params.append(keys[column])
+    if keys["email_key"]:
+        probes.append("email_key = ? AND (aadhaar_key IS NULL OR ? IS NULL OR aadhaar_key = ?)")
+        params += [keys["email_key"], keys["aadhaar_key"], keys["aadhaar_key"]]
+    if not probes:
+        return None
+    # One partial-index probe per key (an OR would let SQLite scan by seq).
+    union = " UNION ALL ".join(
+        f"SELECT seq, data FROM applications WHERE {probe} AND duplicate_of IS NULL "
+        f"AND validation_status IN ('Valid', 'Invalid')" for probe in probes
+    )
+    with store.transaction(immediate=False) as conn:
+        own_seq = conn.execute("SELECT seq FROM applications WHERE app_id = ?", (app["app_id"],)).fetchone()
+        row = conn.execute(
+            f"SELECT data FROM ({union}) WHERE seq < ? ORDER BY seq LIMIT 1",
+            params + [own_seq[0] if own_seq else 2 ** 63 - 1],
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def mark_duplicate(app, original):
+    app["validation_status"] = DUPLICATE_STATUS
+    app["validation_reason"] = f"Duplicate of application {original['app_id']}"
+    app["duplicate_of"] = original["app_id"]
+    return app
+
+def merged_fields(original, duplicate):
+    """{field: value} the duplicate adds to the original (only fields missing there)."""
+    return {
+        name: duplicate[name]
+        for name in MERGE_FIELDS
+        if original.get(name) is None and duplicate.get(name) is not None
+    }
+
+def record_duplicate(store, app, original, merge=True):
+    """
+    Save `app` as a duplicate of `original` instead of processing it, and with
+    merge=True fill in fields the original is missing, in one transaction.
+    Returns the saved duplicate.
+    """
+    mark_duplicate(app, original)
+    with store.transaction():
+        store.upsert_application(app)
+        fields = merged_fields(original, app) if merge else {}
+        if fields:
+            store.update_application_fields(original["app_id"], **fields)
+    return app
+
+
+# === Bulk Dedup ===
+class OriginalIndex:
+    # In-memory version of find_duplicate's lookups for one pass in seq order.
+    def __init__(self):
+        self.by_key = {column: {} for column in DOCUMENT_KEYS}
+        self.by_email = {}
+
+    def match(self, keys):
+        candidates = [self.by_key[column].get(keys[column]) for column in DOCUMENT_KEYS if keys[column]]
+        for aadhaar_key, original in self.by_email.get(keys["email_key"], ()):
+            if aadhaar_key is None or keys["aadhaar_key"] is None or aadhaar_key == keys["aadhaar_key"]:
+                candidates.append(original)
+                break
+        candidates = [c for c in candidates if c is not None]
+        return min(candidates, key=lambda c: c["seq"]) if candidates else None
+
+    def add(self, keys, original):
+        for column in DOCUMENT_KEYS:
+            if keys[column]:
+                self.by_key[column].setdefault(keys[column], original)
+        if keys["email_key"]:
+            self.by_email.setdefault(keys["email_key"], []).append((keys["aadhaar_key"], original))
+
+def dedup_applications(store, merge=True, dry_run=False):
+    """
+    Mark every stored application that duplicates an earlier one (same rules
+    as find_duplicate) and, with merge=True, fill missing fields on the
+    originals. Loan decisions are not changed; approved loans on duplicates are
+    reported because their budget was debited twice. Returns a report dict.
+    """
+    started = time.perf_counter()
+    columns = ["seq", "row_version"] + list(DEDUP_FIELDS)
+    rows = [dict(zip(columns, row)) for row in store.fetch_columns(DEDUP_FIELDS)]
+    originals = OriginalIndex()
+    updates = {}
+    merges = {}
+    groups = {}
+    for row in rows:
+        if row["duplicate_of"]:
+            continue
+        keys = duplicate_keys(row)
+        original = originals.match(keys)
+        if original is None:
+            if row["validation_status"] in DECIDED_STATUSES:
+                originals.add(keys, row)
+            continue
+        updates[row["app_id"]] = mark_duplicate({}, original)
+        groups.setdefault(original["app_id"], []).append(row["app_id"])
+        if merge:
+            fields = merged_fields(original, row)
+            if fields:
+                original.update(fields)
+                merges.setdefault(original["app_id"], {}).update(fields)
+
+    if not dry_run and updates:
+        with store.transaction():
+            store.patch_applications(updates)
+            # Full upserts, so derived key columns (aadhaar_key, ...) follow the merge.
+            for app_id, fields in merges.items():
+                store.update_application_fields(app_id, **fields)
+
+    duplicates = [app_id for ids in groups.values() for app_id in ids]
+    by_id = {row["app_id"]: row for row in rows}
+    return {
+        "checked": len(rows),
+        "duplicates": len(duplicates),
+        "groups": groups,
+        "merged": len(merges),
+        "duplicate_loans_approved": [i for i in duplicates if by_id[i]["loan_status"] == "Approved"],
+        "dry_run": dry_run,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from gen_ai_project import DUPLICATE_POLICY, get_store
+
+    parser = argparse.ArgumentParser(description="Find and mark duplicate applications in the store.")
+    parser.add_argument("--dry-run", action="store_true", help="Report duplicates without writing")
+    parser.add_argument("--no-merge", action="store_true", help="Do not fill missing fields on the originals")
+    args = parser.parse_args()
+
+    report = dedup_applications(get_store(), merge=not args.no_merge and DUPLICATE_POLICY != "skip",
+                                dry_run=args.dry_run)
+    print(json.dumps(report, indent=2))
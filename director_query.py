@@ -0,0 +1,292 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import span
+
+MAX_CONTEXT_RECORDS = 50
+
+# === Summary ===
+def compute_summary(store):
+    """Pre-computed aggregates, answered from indexed columns without loading records."""
+    with store.transaction(immediate=False):
+        settings = store.get_settings()
+        return {
+            "total_applications": store.count_applications(),
+            "validation_status": store.count_by("validation_status"),
+            "loan_status": store.count_by("loan_status"),
+            "communication_status": store.count_by("communication_status"),
+            "loan_budget_remaining": settings.get("loan_budget"),
+            "university_capacity": settings.get("university_capacity"),
+            "fee_amount": settings.get("fee_amount"),
+            "eligibility_criteria": settings.get("eligibility_criteria"),
+        }
+
+
+# === Direct (LLM-free) Answers ===
+# A question is answered directly only when the whole question is one of the
+# templates below (a subject plus a status). Anything else - an extra condition,
+# a different subject ("loans are pending"), a status the summary does not count
+# ("approved applications", "female students") - goes to the LLM.
+_SUBJECT = r"(?:applications?|applicants?|students?)"
+_BE = r"(?:(?:are|were|is|have been|has been) )?"
+_HOW_MANY = r"(?:how many|number of|what is the number of|total number of|what is the total number of)"
+
+def _status_count(summary, group, status):
+    return summary[group].get(status, 0)
+
+def _template(pattern):
+    return re.compile(pattern.replace("{subject}", _SUBJECT).replace("{be}", _BE).replace("{how_many}", _HOW_MANY))
+
+DIRECT_ANSWERS = [
+    (_template(r"(?:how much|what is the) (?:remaining )?loan budget(?: is)?(?: remaining| left| available)?"),
+     lambda s: f"💰 Loan budget remaining: {s['loan_budget_remaining']}."),
+    (_template(r"{how_many} loans {be}approved"),
+     lambda s: f"🏦 {_status_count(s, 'loan_status', 'Approved')} loans approved."),
+    (_template(r"{how_many} loans {be}rejected"),
+     lambda s: f"❌ {_status_count(s, 'loan_status', 'Rejected')} loans rejected."),
+    (_template(r"{how_many} (?:loans {be}requested|loan requests|{subject} (?:requested|applied for) (?:a )?loans?)"),
+     lambda s: f"🏦 {_status_count(s, 'loan_status', 'Approved') + _status_count(s, 'loan_status', 'Rejected')} applicants requested a loan."),
+    (_template(r"{how_many} (?:invalid {subject}|{subject} {be}invalid)"),
+     lambda s: f"❌ {_status_count(s, 'validation_status', 'Invalid')} applications are invalid."),
+    (_template(r"{how_many} (?:valid {subject}|{subject} {be}valid(?:ated)?)"),
+     lambda s: f"✅ {_status_count(s, 'validation_status', 'Valid')} applications are valid."),
+    (_template(r"{how_many} (?:pending {subject}|{subject} {be}pending(?: validation)?)"),
+     lambda s: f"⏳ {_status_count(s, 'validation_status', 'Pending')} applications are pending."),
+    (_template(r"{how_many} emails {be}(?:sent|delivered)"),
+     lambda s: f"📧 {_status_count(s, 'communication_status', 'Email Sent')} emails sent."),
+    (_template(r"(?:what is the (?:university )?capacity|how many seats (?:are there|does the university have))"),
+     lambda s: f"🏫 University capacity: {s['university_capacity']}."),
+    (_template(r"(?:{how_many} {subject}|{how_many} {subject} {be}(?:received|submitted)|"
+               r"how many {subject} (?:are there|have we received|did we receive))"),
+     lambda s: f"📋 {s['total_applications']} applications received."),
+]
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+def _question_text(query):
+    # Normalized, without trailing punctuation, for whole-question template matches.
+    return normalize_query(query).rstrip("?.! ")
+
+def _format_funnel(a):
+    return "📊 Funnel: " + " → ".join(f"{stage.replace('_', ' ')} {n}" for stage, n in a["funnel"].items()) + "."
+
+def _format_income_bands(a):
+    parts = [
+        f"{band} LPA: {b['approved']}/{b['requests']}"
+        + (f" ({b['approval_rate']:.0%})" if b["approval_rate"] is not None else "")
+        for band, b in a["loan_approval_by_income_lpa"].items()
+    ]
+    return "🏦 Loan approvals by income band — " + "; ".join(parts) + "."
+
+def _format_rank_histogram(a):
+    return "📈 WBJEE rank distribution — " + "; ".join(f"{r}: {n}" for r, n in a["rank_histogram"].items()) + "."
+
+# Answered from summary["analytics"] (see analytics.ApplicationTable) when present;
+# these questions are about breakdowns, not single counts. Like DIRECT_ANSWERS
+# they must be the whole question, so "why did Riya drop off?" goes to the LLM.
+_SHOW = r"(?:(?:show|show me|give me|what is|what's|what are) )?(?:the )?"
+
+ANALYTICS_ANSWERS = [
+    (_template(_SHOW + r"(?:admission |application |validation )?"
+               r"(?:funnel|conversion(?: funnel| rates?)?|drop[- ]?offs?)(?: by stage| per stage| at each stage)?"),
+     _format_funnel),
+    (_template(_SHOW + r"loan approvals?(?: rates?)? (?:by|per|for each|across) income(?: bands?| levels?)?|"
+               + _SHOW + r"approval rates? (?:of loans )?(?:by|per|across) income(?: bands?)?|"
+               r"how (?:many|are) loans approved (?:by|per|across) income(?: bands?)?"),
+     _format_income_bands),
+    (_template(_SHOW + r"(?:wbjee )?ranks? (?:distribution|histogram|spread|breakdown)|"
+               + _SHOW + r"(?:distribution|histogram|spread|breakdown) of (?:wbjee )?ranks?|"
+               r"how are (?:wbjee )?ranks distributed"),
+     _format_rank_histogram),
+]
+
+def direct_answer(query, summary):
+    """Answer a templated aggregate or analytics question from the summary, or None."""
+    question = _question_text(query)
+    if summary.get("analytics"):
+        for pattern, answer in ANALYTICS_ANSWERS:
+            if pattern.fullmatch(question):
+                return answer(summary["analytics"])
+    for pattern, answer in DIRECT_ANSWERS:
+        if pattern.fullmatch(question):
+            return answer(summary)
+    return None
+
+
+# === Relevant Subset for the LLM ===
+_UUID = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_NAME = re.compile(r"(?<!^)(?<![.?!] )\b[A-Z][a-z]{2,}\b")
+_STATUS_FILTERS = [
+    (re.compile(r"\binvalid\b"), {"validation_status": "Invalid"}),
+    (re.compile(r"\bvalid\b"), {"validation_status": "Valid"}),
+    (re.compile(r"\bpending\b"), {"validation_status": "Pending"}),
+    (re.compile(r"\bloans?\b.*\bapproved\b|\bapproved\b"), {"loan_status": "Approved"}),
+    (re.compile(r"\bloans?\b.*\brejected\b"), {"loan_status": "Rejected"}),
+]
+
+def compact_record(app):
+    marks = app.get("marks") or {}
+    return {
+        "id": app.get("app_id"),
+        "name": app.get("name") or app.get("applicant_name_marksheet"),
+        "email": app.get("applicant_email"),
+        "m10": marks.get("class10_pcm_perc"),
+        "m12": marks.get("class12_pcm_perc"),
+        "rank": app.get("wbjee_rank"),
+        "income_lpa": app.get("family_income_lpa"),
+        "loan_requested": app.get("loan_requested"),
+        "validation": app.get("validation_status"),
+        "loan": app.get("loan_status"),
+        "email_status": app.get("communication_status"),
+    }
+
+def relevant_records(store, query, limit=MAX_CONTEXT_RECORDS):
+    """Applications the question refers to: by ID/email/name, else by status, else the newest."""
+    terms = _UUID.findall(query) + _EMAIL.findall(query) + _NAME.findall(query)
+    if terms:
+        found = store.search_applications(terms, limit=limit)
+        if found:
+            return found
+    q = normalize_query(query)
+    for pattern, filters in _STATUS_FILTERS:
+        if pattern.search(q):
+            return store.list_applications(limit=limit, newest_first=True, **filters)
+    return store.list_applications(limit=limit, newest_first=True)
+
+def build_prompt(query, summary, records):
+    lines = "\n".join(json.dumps(compact_record(app), separators=(",", ":")) for app in records)
+    return f"""
+    You are a smart assistant for a university.
+    Here is a summary of the current admission data:
+    {json.dumps(summary, separators=(",", ":"))}
+
+    Relevant applications ({len(records)} of {summary["total_applications"]}, one JSON object per line):
+    {lines}
+
+    Now answer this question:
+    {query}
+    """
+
+
+# === Response Cache ===
+class QueryCache:
+    """
+    In-memory LRU cache of LLM answers with a TTL. Keys include the store's
+    data_version, so any committed write makes older answers unreachable.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = 0
+
+    @staticmethod
+    def make_key(query, model, data_version):
+        raw = json.dumps([normalize_query(query), model, data_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+
+# === Engine ===
+class DirectorQueryEngine:
+    """
+    Answers director questions: aggregates straight from the store, anything else
+    through the LLM with only the summary and a bounded set of compact records.
+    `llm` is any object with invoke(messages) -> response with .content, so a
+    fake can stand in for ChatOpenAI. An `analytics` ApplicationTable adds its
+    funnel / income-band / rank aggregates to the summary.
+    """
+
+    def __init__(self, store, llm_factory, model=None, cache=None, max_records=MAX_CONTEXT_RECORDS,
+                 analytics=None):
+        self.store = store
+        self.analytics = analytics
+        self.llm_factory = llm_factory
+        self.model = model
+        self.cache = cache
+        self.max_records = max_records
+        self._llm = None
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = self.llm_factory()
+        return self._llm
+
+    def answer(self, query):
+        try:
+            summary = compute_summary(self.store)
+            if self.analytics is not None:
+                summary["analytics"] = self.analytics.aggregates()
+        except Exception:
+            return "⚠️ Unable to load admission data."
+
+        direct = direct_answer(query, summary)
+        if direct is not None:
+            return direct
+
+        key = None
+        if self.cache is not None:
+            key = QueryCache.make_key(query, self.model, self.store.data_version())
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            from langchain_core.messages import HumanMessage
+            records = relevant_records(self.store, query, limit=self.max_records)
+            prompt = build_prompt(query, summary, records)
+            with span("llm.invoke", model=self.model, prompt_chars=len(prompt), records=len(records)):
+                response = self.llm.invoke([HumanMessage(content=prompt)])
+        except Exception as e:
+            return f"⚠️ Error generating response: {e}"  # errors are not cached
+
+        if key is not None:
+            self.cache.put(key, response.content)
+        return response.content
@@ -0,0 +1,312 @@
+import os
+import string
+import textwrap
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+from admission_store import write_json_atomic
+
+# === Decision Text ===
+# Shared by the status email (communication_node) and the decision letter PDF.
+DECISION_PARAGRAPHS = {
+    "loan_approved": string.Template(
+        "Your education loan has been approved. Please mail your last year ITR file and income certificate "
+        "to the loan sanction cell to complete your loan processing."
+    ),
+    "loan_documents": string.Template(
+        "Since your family income is within the $max_income LPA limit, please mail your last year ITR file "
+        "and income certificate to the loan sanction cell to complete your loan processing."
+    ),
+    "loan_ineligible": string.Template("You are not eligible for a loan due to income being above $max_income LPA."),
+    "loan_rejected": string.Template("Unfortunately, your loan request could not be approved ($reason)."),
+    "no_loan": string.Template("Thank you for submitting your application. You have not requested a loan."),
+    "invalid": string.Template(
+        "Unfortunately, your application could not be validated due to missing or incorrect information."
+    ),
+}
+# Same reason loan_allocator records.
+LOAN_INCOME_REASON = "Income too high"
+DEFAULT_MAX_INCOME_LPA = 5.0
+EMAIL_SUBJECT = string.Template("Application Status - ID $app_id")
+EMAIL_HEADER = string.Template("Hello $name,\n\nYour application (ID: $app_id) has been $validation_status.\n")
+EMAIL_FOOTER = "\n\nThank you,\nAdmissions Team"
+
+
+def decision_outcome(app, max_income=DEFAULT_MAX_INCOME_LPA):
+    """
+    Key into DECISION_PARAGRAPHS for this application, or None. A decided loan
+    (loan_status/loan_rejection_reason) wins; before the decision the income is
+    checked against max_income, the active max_income_for_loan_lpa.
+    """
+    status = app.get("validation_status")
+    if status == "Valid" and app.get("loan_requested"):
+        loan_status = app.get("loan_status")
+        if loan_status == "Approved":
+            return "loan_approved"
+        if loan_status == "Rejected":
+            return "loan_ineligible" if app.get("loan_rejection_reason") == LOAN_INCOME_REASON else "loan_rejected"
+        income = app.get("family_income_lpa")
+        if income is None:
+            return None
+        return "loan_documents" if income <= max_income else "loan_ineligible"
+    if status == "Valid":
+        return "no_loan"
+    if status == "Invalid":
+        return "invalid"
+    return None
+
+def decision_paragraph(app, max_income=DEFAULT_MAX_INCOME_LPA):
+    """The decision paragraph for this application, or None."""
+    outcome = decision_outcome(app, max_income)
+    if outcome is None:
+        return None
+    return DECISION_PARAGRAPHS[outcome].substitute(
+        max_income=f"{max_income:g}", reason=app.get("loan_rejection_reason") or "no reason recorded"
+    )
+
+def _applicant_name(app):
+    return app.get("name") or app.get("applicant_name_marksheet")
+
+def decision_email(app, max_income=DEFAULT_MAX_INCOME_LPA):
+    """(subject, body) of the status email."""
+    fields = {"name": _applicant_name(app), "app_id": app["app_id"], "validation_status": app["validation_status"]}
+    body = EMAIL_HEADER.substitute(fields)
+    paragraph = decision_paragraph(app, max_income)
+    if paragraph:
+        body += "\n" + paragraph
+    return EMAIL_SUBJECT.substitute(fields), body + EMAIL_FOOTER
+
+
+# === PDF Templates ===
+# A template is a static letterhead plus (x, y, font, size, text) slots whose
+# text is a string.Template compiled once per process. In a merged PDF the
+# letterhead is drawn once as a form XObject and only referenced per page.
+PAGE_SIZE = (595.27, 841.89)  # A4 in points
+MARGIN = 56
+LINE_HEIGHT = 16
+INSTITUTION = "Admissions Office"
+
+
+class DocumentTemplate:
+    def __init__(self, title, slots):
+        self.title = title
+        self.form_name = f"letterhead_{title.lower().replace(' ', '_')}"
+        self.slots = [(x, y, font, size, string.Template(text)) for x, y, font, size, text in slots]
+
+    def draw_letterhead(self, c):
+        width, height = PAGE_SIZE
+        c.setFont("Helvetica-Bold", 18)
+        c.drawString(MARGIN, height - MARGIN, INSTITUTION)
+        c.setFont("Helvetica", 12)
+        c.drawString(MARGIN, height - MARGIN - 20, self.title)
+        c.line(MARGIN, height - MARGIN - 30, width - MARGIN, height - MARGIN - 30)
+        c.setFont("Helvetica-Oblique", 8)
+        c.drawString(MARGIN, MARGIN / 2, "This document was generated electronically and needs no signature.")
+
+    def draw(self, c, fields, letterhead_form=False):
+        if letterhead_form:
+            c.doForm(self.form_name)
+        else:
+            self.draw_letterhead(c)
+        for x, y, font, size, template in self.slots:
+            c.setFont(font, size)
+            for i, line in enumerate(template.substitute(fields).split("\n")):
+                c.drawString(x, y - i * LINE_HEIGHT, line)
+
+
+_TOP = PAGE_SIZE[1] - MARGIN - 60
+TEMPLATES = {
+    "fee_slip": DocumentTemplate("Admission Fee Slip", [
+        (MARGIN, _TOP, "Helvetica", 11, "Batch: $batch_id        Issued: $issued_on"),
+        (MARGIN, _TOP - 30, "Helvetica", 11, "Application ID: $app_id\nName: $name\nEmail: $email"),
+        (MARGIN, _TOP - 100, "Helvetica-Bold", 11, "Particulars"),
+        (MARGIN, _TOP - 120, "Helvetica", 11, "Admission fee\nLess: education loan sanctioned\nAmount payable"),
+        (PAGE_SIZE[0] - MARGIN - 120, _TOP - 120, "Helvetica", 11, "Rs $fee_amount\nRs $loan_amount\nRs $payable"),
+        (MARGIN, _TOP - 190, "Helvetica", 11, "Please pay the amount payable by $due_on."),
+    ]),
+    "decision_letter": DocumentTemplate("Admission Decision", [
+        (MARGIN, _TOP, "Helvetica", 11, "Date: $issued_on"),
+        (MARGIN, _TOP - 30, "Helvetica", 11, "Dear $name,"),
+        (MARGIN, _TOP - 60, "Helvetica", 11, "Your application (ID: $app_id) has been $validation_status.\n\n$paragraph"),
+        (MARGIN, _TOP - 220, "Helvetica", 11, "Thank you,\nAdmissions Team"),
+    ]),
+}
+PARAGRAPH_WIDTH = 88  # characters per line at 11pt Helvetica within the margins
+
+
+def document_fields(kind, app, context):
+    """Template fields for one application; `context` holds batch-wide values."""
+    fields = {
+        "app_id": app["app_id"],
+        "name": _applicant_name(app) or "Applicant",
+        "email": app.get("applicant_email") or "-",
+        "issued_on": context["issued_on"],
+    }
+    if kind == "fee_slip":
+        loan = context["loan_amount"] if app.get("loan_status") == "Approved" else 0
+        fields.update(
+            batch_id=context["batch_id"],
+            fee_amount=f"{context['fee_amount']:,}",
+            loan_amount=f"{loan:,}",
+            payable=f"{max(context['fee_amount'] - loan, 0):,}",
+            due_on=context["due_on"],
+        )
+    else:
+        paragraph = decision_paragraph(app, context.get("max_income", DEFAULT_MAX_INCOME_LPA))
+        fields.update(
+            validation_status=app.get("validation_status"),
+            paragraph="\n".join(textwrap.wrap(paragraph, PARAGRAPH_WIDTH)) if paragraph else "",
+        )
+    return fields
+
+def _render_chunk(kind, apps, context, target):
+    """
+    Render apps into `target`: a directory (one PDF per application) or a .pdf
+    path (one page per application). Runs in pool workers. Returns
+    [(app_id, file, page)].
+    """
+    from reportlab.pdfgen import canvas
+
+    template = TEMPLATES[kind]
+    rendered = []
+    if target.endswith(".pdf"):
+        c = canvas.Canvas(target, pagesize=PAGE_SIZE)
+        c.beginForm(template.form_name)
+        template.draw_letterhead(c)
+        c.endForm()
+        for page, app in enumerate(apps, start=1):
+            template.draw(c, document_fields(kind, app, context), letterhead_form=True)
+            c.showPage()
+            rendered.append((app["app_id"], os.path.basename(target), page))
+        c.save()
+        return rendered
+    for app in apps:
+        name = f"{app['app_id']}_{kind}.pdf"
+        c = canvas.Canvas(os.path.join(target, name), pagesize=PAGE_SIZE)
+        template.draw(c, document_fields(kind, app, context))
+        c.save()
+        rendered.append((app["app_id"], name, 1))
+    return rendered
+
+def _merge_parts(parts, merged_path):
+    import fitz  # PyMuPDF
+
+    with fitz.open() as out:
+        for part in parts:
+            with fitz.open(part) as doc:
+                out.insert_pdf(doc)
+        out.save(merged_path, garbage=1)
+
+def render_documents(kind, apps, out_dir, context, merged=False, workers=None, chunk_size=250):
+    """
+    Render `kind` documents for apps into out_dir, in chunks over a process
+    pool (inline when there is only one chunk). With merged=True the result
+    is a single <kind>.pdf. Returns [(app_id, file, page)].
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = [apps[i:i + chunk_size] for i in range(0, len(apps), chunk_size)]
+    targets = [os.path.join(out_dir, f".part-{i:05d}.pdf") if merged else out_dir for i in range(len(chunks))]
+    if len(chunks) <= 1:
+        results = [_render_chunk(kind, chunk, context, target) for chunk, target in zip(chunks, targets)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_chunk, [kind] * len(chunks), chunks, [context] * len(chunks), targets))
+    if not merged:
+        return [entry for result in results for entry in result]
+
+    merged_name = f"{kind}.pdf"
+    if len(targets) == 1:
+        os.replace(targets[0], os.path.join(out_dir, merged_name))
+    elif targets:
+        _merge_parts(targets, os.path.join(out_dir, merged_name))
+        for part in targets:
+            os.remove(part)
+    rendered, page = [], 0
+    for result in results:
+        for app_id, _, _ in result:
+            page += 1
+            rendered.append((app_id, merged_name, page))
+    return rendered
+
+
+# === Bulk Generation ===
+DOCUMENT_KINDS = tuple(TEMPLATES)
+FEE_SLIP_GENERATED = "Generated"
+
+def select_applications(store, kind, validation_status="Valid", loan_status=None, force=False):
+    """Applications in the given status(es); fee slips already generated are left out unless force."""
+    apps = store.list_applications(validation_status=validation_status, loan_status=loan_status)
+    if kind == "fee_slip" and not force:
+        apps = [app for app in apps if app.get("fee_slip_status") != FEE_SLIP_GENERATED]
+    return apps
+
+def generate_documents(store, kind, out_root, validation_status="Valid", loan_status=None, merged=False,
+                       force=False, workers=None, loan_amount=0, due_days=15):
+    """
+    Render `kind` documents for every application in the given status into a
+    new batch directory under out_root (with a manifest.json mapping app_id to
+    file and page). For fee slips, fee_slip_status of every rendered
+    application is set in one commit. Returns the manifest.
+    """
+    started = time.perf_counter()
+    apps = select_applications(store, kind, validation_status, loan_status, force)
+    issued = date.today()
+    batch_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    out_dir = os.path.join(str(out_root), f"{kind}-{batch_id}")
+    context = {
+        "batch_id": batch_id,
+        "issued_on": issued.strftime("%d %b %Y"),
+        "due_on": (issued + timedelta(days=due_days)).strftime("%d %b %Y"),
+        "fee_amount": store.get_setting("fee_amount") or 0,
+        "loan_amount": loan_amount,
+        "max_income": (store.get_setting("eligibility_criteria") or {}).get(
+            "max_income_for_loan_lpa", DEFAULT_MAX_INCOME_LPA),
+    }
+    rendered = render_documents(kind, apps, out_dir, context, merged=merged, workers=workers) if apps else []
+
+    if kind == "fee_slip" and rendered:
+        store.patch_applications({app_id: {"fee_slip_status": FEE_SLIP_GENERATED} for app_id, _, _ in rendered})
+    seconds = time.perf_counter() - started
+    manifest = {
+        "batch_id": batch_id,
+        "kind": kind,
+        "directory": out_dir,
+        "filters": {"validation_status": validation_status, "loan_status": loan_status},
+        "count": len(rendered),
+        "documents": [{"app_id": a, "file": f, "page": p} for a, f, p in rendered],
+        "seconds": round(seconds, 3),
+        "documents_per_minute": round(len(rendered) / seconds * 60) if rendered else 0,
+    }
+    if rendered:
+        write_json_atomic(os.path.join(out_dir, "manifest.json"), manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import gen_ai_project as backend
+
+    parser = argparse.ArgumentParser(description="Bulk-generate fee slips or decision letters as PDFs.")
+    parser.add_argument("kind", choices=DOCUMENT_KINDS)
+    parser.add_argument("--validation", default="Valid", help="validation_status to select (default: Valid)")
+    parser.add_argument("--loan", help="Only applications with this loan_status")
+    parser.add_argument("--out", default=backend.DOCUMENTS_DIR)
+    parser.add_argument("--merged", action="store_true", help="Write one merged PDF instead of one file each")
+    parser.add_argument("--force", action="store_true", help="Regenerate fee slips that were already generated")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    manifest = generate_documents(
+        backend.get_store(), args.kind, args.out,
+        validation_status=args.validation, loan_status=args.loan, merged=args.merged,
+        force=args.force, workers=args.workers, loan_amount=backend.LOAN_AMOUNT,
+        due_days=backend.FEE_DUE_DAYS,
+    )
+    if manifest["count"]:
+        print(f"✅ {manifest['count']} {args.kind} documents in {manifest['directory']} "
+              f"({manifest['documents_per_minute']}/min).")
+    else:
+        print("✅ No applications to generate documents for.")
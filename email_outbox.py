@@ -0,0 +1,247 @@
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from instrumentation import span
+
+# === Outbox Schema ===
+# Messages are delivered only once their application row has been committed
+# with communication_status "Queued"; that way the sender's "Email Sent" update
+# always lands after the graph's own write of the record.
+OUTBOX_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        app_id TEXT NOT NULL,
+        sender TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claimed_at REAL,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        sent_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_email_outbox_status ON email_outbox(status, next_attempt_at)",
+]
+
+
+class SmtpSettings:
+    def __init__(self, host, port, username=None, password=None, use_ssl=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+
+    def connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = smtp_class(self.host, self.port, timeout=self.timeout)
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+
+class EmailOutbox:
+    """
+    Persistent email queue stored next to the applications in the AdmissionStore.
+    Writes that only touch the outbox use bump_version=False.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        with store.transaction() as conn:
+            for statement in OUTBOX_SCHEMA:
+                conn.execute(statement)
+
+    def enqueue(self, app_id, sender, recipient, subject, body):
+        now = time.time()
+        with self.store.transaction(bump_version=False) as conn:
+            cursor = conn.execute(
+                "INSERT INTO email_outbox (app_id, sender, recipient, subject, body, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (app_id, sender, recipient, subject, body, now, now),
+            )
+        return cursor.lastrowid
+
+    def claim(self, limit=20, stale_after=300):
+        """
+        Mark up to `limit` due messages as 'sending' and return them. Claims older
+        than `stale_after` seconds (a sender died mid-send) are picked up again.
+        """
+        now = time.time()
+        with self.store.transaction(bump_version=False) as conn:
+            rows = conn.execute(
+                "SELECT o.id, o.app_id, o.sender, o.recipient, o.subject, o.body, o.attempts "
+                "FROM email_outbox o JOIN applications a ON a.app_id = o.app_id "
+                "WHERE a.communication_status = 'Queued' AND ("
+                "  (o.status = 'queued' AND o.next_attempt_at <= ?) OR "
+                "  (o.status = 'sending' AND o.claimed_at < ?)"
+                ") ORDER BY o.next_attempt_at, o.id LIMIT ?",
+                (now, now - stale_after, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                [(now, row[0]) for row in rows],
+            )
+        keys = ("id", "app_id", "sender", "recipient", "subject", "body", "attempts")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def mark_sent(self, message):
+        with self.store.transaction() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                (time.time(), message["id"]),
+            )
+            self.store.update_application_fields(message["app_id"], communication_status="Email Sent")
+
+    def mark_failed(self, message, error, max_attempts, backoff_seconds):
+        attempts = message["attempts"] + 1
+        # Only giving up changes the application (communication_status).
+        with self.store.transaction(bump_version=attempts >= max_attempts) as conn:
+            if attempts >= max_attempts:
+                conn.execute(
+                    "UPDATE email_outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, str(error), message["id"]),
+                )
+                self.store.update_application_fields(message["app_id"], communication_status="Failed to send")
+            else:
+                retry_at = time.time() + backoff_seconds * (2 ** (attempts - 1))
+                conn.execute(
+                    "UPDATE email_outbox SET status = 'queued', attempts = ?, last_error = ?, "
+                    "next_attempt_at = ?, claimed_at = NULL WHERE id = ?",
+                    (attempts, str(error), retry_at, message["id"]),
+                )
+
+    def counts(self):
+        with self.store.transaction(immediate=False) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")
+            return dict(rows.fetchall())
+
+
+class OutboxSender:
+    """
+    Delivers queued messages over one reused SMTP connection, with exponential
+    backoff on failure and at most `rate_per_minute` messages per minute.
+
+    For local runs point the SmtpSettings at an aiosmtpd stand-in, e.g.
+    `python -m aiosmtpd -n -l localhost:8025` with use_ssl=False and no login.
+    """
+
+    def __init__(self, outbox, smtp_settings, rate_per_minute=60, max_attempts=5,
+                 backoff_seconds=30, poll_interval=2.0, batch_size=20):
+        self.outbox = outbox
+        self.smtp_settings = smtp_settings
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._server = None
+        self._last_send = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connection(self):
+        if self._server is None:
+            with span("smtp.connect", host=self.smtp_settings.host):
+                self._server = self.smtp_settings.connect()
+        return self._server
+
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def _send(self, message):
+        msg = EmailMessage()
+        msg["Subject"] = message["subject"]
+        msg["From"] = message["sender"]
+        msg["To"] = message["recipient"]
+        msg.set_content(message["body"])
+
+        wait = self._last_send + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        with span("smtp.send", app_id=message["app_id"]):
+            try:
+                self._connection().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The reused connection timed out on the server side; retry once fresh.
+                self._server = None
+                self._connection().send_message(msg)
+        self._last_send = time.monotonic()
+
+    def run_once(self):
+        """Deliver one batch of due messages. Returns how many were sent."""
+        sent = 0
+        for message in self.outbox.claim(limit=self.batch_size):
+            try:
+                self._send(message)
+            except Exception as e:
+                print(f"❌ Email failed: {e}")
+                self._disconnect()
+                self.outbox.mark_failed(message, e, self.max_attempts, self.backoff_seconds)
+                continue
+            self.outbox.mark_sent(message)
+            sent += 1
+        return sent
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if not self.run_once():
+                    self._disconnect()  # don't hold an idle connection open
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                print(f"⚠️ Outbox sender error: {e}")
+                self._stop.wait(self.poll_interval)
+        self._disconnect()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="email-outbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import gen_ai_project as backend
+
+    parser = argparse.ArgumentParser(description="Run the email outbox sender in the foreground.")
+    parser.add_argument("--host", default=backend.SMTP_HOST)
+    parser.add_argument("--port", type=int, default=backend.SMTP_PORT)
+    parser.add_argument("--no-ssl", action="store_true", help="Plain SMTP (e.g. a local aiosmtpd)")
+    parser.add_argument("--no-login", action="store_true")
+    parser.add_argument("--once", action="store_true", help="Send one batch and exit")
+    args = parser.parse_args()
+
+    settings = SmtpSettings(
+        args.host,
+        args.port,
+        username=None if args.no_login else backend.SENDER_EMAIL,
+        password=None if args.no_login else backend.SENDER_PASSWORD,
+        use_ssl=not args.no_ssl,
+    )
+    sender = OutboxSender(backend.get_outbox(), settings, rate_per_minute=backend.EMAIL_RATE_PER_MINUTE)
+    if args.once:
+        print(f"📧 Sent {sender.run_once()} messages.")
+    else:
+        sender.run_forever()
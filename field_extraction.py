@@ -0,0 +1,175 @@
+import re
+
+# === Extraction Spec ===
+# Declarative table of (field, confidence, scope, pattern). "start" patterns
+# are tried at the beginning of each line, "search" patterns anywhere in a line,
+# and "line_above" patterns take their value from the previous non-empty line.
+# Each scope is one compiled multiline alternation run with finditer, so the
+# per-line work happens inside the regex engine. When several patterns find a
+# field the most confident wins (earliest on ties), and a scope's scan stops
+# as soon as each of its fields has its best possible match. Patterns must not
+# match across lines: use [ \t], not \s.
+#
+# Name words are separated by single spaces; a name ends at 2+ spaces, a tab,
+# or the next label on the line ("Name: Riya Sen Roll No: 1234" -> "Riya Sen").
+_WORD = r"[A-Z][A-Za-z.'-]*"
+_LABEL = r"[A-Za-z][A-Za-z.'-]*(?: [a-z][A-Za-z.'-]*)*(?: [A-Za-z][A-Za-z.'-]*)?[ \t]*:"
+_NAME_WORDS = _WORD + r"(?: (?!" + _LABEL + r")" + _WORD + r")*"
+_PERCENT = r"(\d{1,3}(?:\.\d+)?)[ \t]*%?"
+
+MARKSHEET_SPEC = [
+    ("applicant_name", 0.95, "start",
+     r"(?i:(?:student'?s?|candidate'?s?)[ \t]+)?(?i:name)[ \t]*[:\-][ \t]*(" + _NAME_WORDS + r")"),
+    ("class10_pcm_perc", 0.95, "start",
+     r"(?i:class[ \t]*10|10th|x)[ \t]*(?i:pcm)[ \t]*(?i:percentage|%|marks)?[ \t]*[:\-]?[ \t]*" + _PERCENT),
+    ("class12_pcm_perc", 0.95, "start",
+     r"(?i:class[ \t]*12|12th|xii)[ \t]*(?i:pcm)[ \t]*(?i:percentage|%|marks)?[ \t]*[:\-]?[ \t]*" + _PERCENT),
+    ("wbjee_rank", 0.95, "start", r"(?i:wbjee)[ \t]*(?i:rank)[ \t]*[:\-]?[ \t]*(\d+)"),
+]
+
+AADHAAR_SPEC = [
+    ("aadhaar_name", 0.95, "start", r"(?i:name)[ \t]*[:\-][ \t]*(" + _NAME_WORDS + r")"),
+    # On the card the holder's name sits on the line above DOB / Year of Birth.
+    ("aadhaar_name", 0.85, "line_above", r"(?i:dob|date of birth|year of birth)"),
+    ("aadhaar_number", 0.95, "search", r"(?<!\d)(\d{4}[ \t]\d{4}[ \t]\d{4})(?!\d)"),
+    ("aadhaar_number", 0.8, "search", r"(?<!\d)(\d{12})(?!\d)"),
+]
+
+_NAME_LINE = re.compile(_NAME_WORDS)
+_NOT_NAMES = {"government of india", "unique identification authority of india", "aadhaar"}
+
+
+def _to_percent(raw):
+    value = float(raw)
+    return value if 0 <= value <= 100 else None
+
+def _to_rank(raw):
+    value = int(raw)
+    return value if value > 0 else None
+
+def _to_name(raw):
+    name = " ".join(raw.split())
+    if not _NAME_LINE.fullmatch(name) or name.lower() in _NOT_NAMES:
+        return None
+    return name
+
+CONVERTERS = {
+    "applicant_name": _to_name,
+    "aadhaar_name": _to_name,
+    "class10_pcm_perc": _to_percent,
+    "class12_pcm_perc": _to_percent,
+    "wbjee_rank": _to_rank,
+    "aadhaar_number": lambda raw: " ".join(raw.split()),
+}
+
+
+class FieldScanner:
+    """Precompiled scanner for one extraction spec: one finditer pass per scope."""
+
+    # How each scope's alternation is anchored; "prev" is the line above.
+    SCOPES = (
+        ("start", r"^[ \t]*(?:{})"),
+        ("search", r"(?:{})"),
+        ("line_above", r"^[ \t]*(?P<prev>\S[^\n]*?)[ \t]*\n(?:[ \t]*\n)*[ \t]*(?:{})"),
+    )
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.fields = sorted({field for field, _, _, _ in spec})
+        self.best = {}
+        for field, score, _, _ in spec:
+            self.best[field] = max(score, self.best.get(field, 0.0))
+        self._passes = []
+        for scope, anchor in self.SCOPES:
+            entries = [(field, score, pattern) for field, score, s, pattern in spec if s == scope]
+            if not entries:
+                continue
+            compiled = re.compile(anchor.format("|".join(f"({pattern})" for _, _, pattern in entries)), re.M)
+            # match.lastindex (the entry's outer group) -> (field, score, converter, value group, is best)
+            by_group = {}
+            group = compiled.groupindex.get("prev", 0) + 1
+            for field, score, pattern in entries:
+                value_group = "prev" if scope == "line_above" else group + 1
+                by_group[group] = (field, score, CONVERTERS[field], value_group, score == self.best[field])
+                group += re.compile(pattern).groups + 1
+            fields = tuple({field for field, _, _ in entries})
+            self._passes.append((compiled, by_group, fields))
+        self._empty = (dict.fromkeys(self.fields), dict.fromkeys(self.fields, 0.0))
+
+    def scan(self, text):
+        """Returns (values, confidence) dicts; fields that were not found are None / 0.0."""
+        values, confidence = self._empty[0].copy(), self._empty[1].copy()
+        best = self.best
+        position = {}
+        text = text or ""
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        for pattern, by_group, fields in self._passes:
+            # Fields of this scope still short of their best possible match. A
+            # scope with none left is skipped (e.g. the line-above name once a
+            # labelled name was found) and a scan stops once none are left.
+            remaining = sum(confidence[field] < best[field] for field in fields)
+            if not remaining:
+                continue
+            for match in pattern.finditer(text):
+                field, score, convert, value_group, is_best = by_group[match.lastindex]
+                found = confidence[field]
+                if score < found or (score == found and match.start() >= position[field]):
+                    continue
+                value = convert(match.group(value_group))
+                if value is None:
+                    continue
+                values[field] = value
+                confidence[field] = score
+                position[field] = match.start()
+                if is_best and found < score:
+                    remaining -= 1
+                    if not remaining:
+                        break
+        return values, confidence
+
+
+marksheet_scanner = FieldScanner(MARKSHEET_SPEC)
+aadhaar_scanner = FieldScanner(AADHAAR_SPEC)
+
+def extract_marksheet_fields(text):
+    return marksheet_scanner.scan(text)
+
+def extract_aadhaar_fields(text):
+    return aadhaar_scanner.scan(text)
+
+
+# === Benchmark ===
+# The extraction corpus lives in tests/test_field_extraction.py.
+SAMPLE_MARKSHEET = (
+    "WEST BENGAL BOARD\nName: Anjali\nClass 10 PCM Percentage: 88.33\n"
+    "Class 12 PCM Percentage: 82.0\nWBJEE Rank: 2150\n"
+)
+
+def _legacy_marksheet(text):
+    # The per-field re.search extraction this module replaced, kept for comparison.
+    return (
+        re.search(r"Name:\s*([A-Z][a-z]+)", text),
+        re.search(r"Class 10 PCM Percentage:\s*([\d.]+)", text),
+        re.search(r"Class 12 PCM Percentage:\s*([\d.]+)", text),
+        re.search(r"WBJEE Rank:\s*(\d+)", text),
+    )
+
+# The scanner costs more per document than the four literal searches it
+# replaced (case-insensitive labels, name checks, confidence bookkeeping), in
+# exchange for accuracy; this is the most it may cost.
+ACCEPTED_SLOWDOWN = 4.0
+
+def benchmark(repeat=2000, rounds=5):
+    """Best-of-rounds seconds per document for the scanner vs the legacy per-field searches."""
+    import timeit
+
+    text = SAMPLE_MARKSHEET * 20  # roughly a page of marksheet text
+    scanner = min(timeit.repeat(lambda: marksheet_scanner.scan(text), number=repeat, repeat=rounds)) / repeat
+    legacy = min(timeit.repeat(lambda: _legacy_marksheet(text), number=repeat, repeat=rounds)) / repeat
+    return {"scanner_seconds": scanner, "legacy_seconds": legacy, "slowdown": scanner / legacy}
+
+
+if __name__ == "__main__":
+    print(benchmark())
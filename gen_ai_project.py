@@ -1,30 +1,88 @@
 import os
-import json
+import copy
 import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from pathlib import Path
-import re
-from typing import Optional, List
-from email.message import EmailMessage
-import smtplib
-from pydantic import BaseModel, Field
-import PyPDF2
 from datetime import datetime
-from reportlab.pdfgen import canvas
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
-from langgraph.graph import StateGraph
+# langchain/langgraph/pydantic and the PDF/OCR stacks are imported where they
+# are first needed (get_llm, get_process_app_graph, pdf_ocr), so importing this
+# module stays cheap for the Streamlit app and batch workers.
+from admission_store import AdmissionStore
+from pdf_cache import PdfTextCache, cache_key, file_sha256
+from pdf_ocr import extract_pdf_text
+from email_outbox import EmailOutbox, OutboxSender, SmtpSettings
+from job_queue import JobQueue, JobWorkerPool
+from upload_store import UploadStore, UploadRejected
+from journal import Journal
+from criteria import CriteriaRegistry
+from dedup import find_duplicate, record_duplicate
+from documents import decision_email, generate_documents
+from director_query import DirectorQueryEngine, QueryCache
+from field_extraction import extract_marksheet_fields, extract_aadhaar_fields
+from instrumentation import configure_tracing, flush_metrics, span, traced, verbose_sampled
 
 # === Credentials ===
 os.environ["OPENAI_API_KEY"] = "sk-..."  # Replace with your OpenAI API Key
 SENDER_EMAIL = "..........@............"
 SENDER_PASSWORD = ".................."
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+SMTP_USE_SSL = True
+EMAIL_RATE_PER_MINUTE = 60
+# Set to False when a separate `python email_outbox.py` process does delivery.
+START_EMAIL_SENDER = True
 
 # === Constants ===
 DATA_FILE = "admission_data_v2.json"
-BACKUP_FILE = "admission_data_backup.json"
+DB_FILE = "admission_data.sqlite3"
+# Append-only mutation journal with periodic snapshots (see journal.py); it
+# replaces the old full-file backup copy. None disables journaling.
+JOURNAL_DIR = "journal"
+JOURNAL_SEGMENT_BYTES = 16 * 1024 * 1024
+JOURNAL_SNAPSHOT_EVERY = 10000  # events between automatic snapshots
+JOURNAL_FSYNC = True
 UPLOAD_DIR = "uploaded_files"
+LOAN_AMOUNT = 5000
+# Bulk fee slips / decision letters (see documents.py), one sub-directory per batch.
+DOCUMENTS_DIR = "generated_documents"
+FEE_DUE_DAYS = 15
 Path(UPLOAD_DIR).mkdir(exist_ok=True)
+# Checked while the upload is streamed in, before any parsing.
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_UPLOAD_PAGES = 20
+# Threads that extract text from fresh uploads while the student fills in the rest of the form.
+PREFETCH_WORKERS = 2
+
+# === Application Jobs ===
+# Submissions are queued and processed by background workers; set
+# START_JOB_WORKERS to False when `python job_queue.py` runs them instead.
+JOB_WORKERS = 2
+JOB_MAX_ATTEMPTS = 3
+START_JOB_WORKERS = True
+# LangGraph checkpoints (state after every node) so failed or interrupted runs
+# resume where they stopped; None disables them. Needs the separate
+# langgraph-checkpoint-sqlite package; without it runs are not checkpointed.
+GRAPH_CHECKPOINT_DB = "graph_checkpoints.sqlite3"
+
+# === Duplicate Applications ===
+# A submission with the Aadhaar number, documents or (non-conflicting) email of
+# an earlier application is saved as its duplicate instead of being processed:
+# "merge" also fills fields the original is missing, "skip" leaves it as is and
+# None turns the check off (see dedup.py).
+DUPLICATE_POLICY = "merge"
+
+# === Tracing ===
+# JSON-lines timing events; "-" logs to stderr and None turns them off.
+TRACE_LOG_FILE = os.path.join("logs", "trace.jsonl")
+# Prometheus text-format metrics, rewritten after each application (None = off).
+METRICS_FILE = None
+# Share of runs that print extracted PDF text; set to 0.0 in production.
+VERBOSE_SAMPLE_RATE = 1.0
+configure_tracing(TRACE_LOG_FILE, METRICS_FILE, VERBOSE_SAMPLE_RATE)
 
 # === Default Structures ===
 DEFAULT_DATA_STRUCTURE = {
@@ -40,7 +98,9 @@ DEFAULT_DATA_STRUCTURE = {
     "loan_budget": 12000,
     "fee_amount": 5000,
     "director_log": [],
-    "criteria_file_path": None
+    "criteria_file_path": None,
+    "criteria_version": 0,
+    "criteria_sha256": None
 }
 
 DEFAULT_APPLICATION_STRUCTURE = {
@@ -53,6 +113,8 @@ DEFAULT_APPLICATION_STRUCTURE = {
     "aadhaar_number": None,
     "marksheet_pdf_path": None,
     "aadhaar_pdf_path": None,
+    "marksheet_sha256": None,
+    "aadhaar_sha256": None,
     "family_income_lpa": None,
     "loan_requested": False,
     "extraction_status": "Pending",
@@ -62,122 +124,196 @@ DEFAULT_APPLICATION_STRUCTURE = {
     "communication_status": "Not Sent",
     "loan_status": "Not Applicable",
     "loan_rejection_reason": None,
-    "fee_slip_status": "Not Sent"
+    "fee_slip_status": "Not Sent",
+    "duplicate_of": None
 }
 
 # === Data I/O ===
+_store = None
+_journal = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Shared AdmissionStore. On first use the legacy DATA_FILE is migrated in once.
+    """
+    global _store, _journal
+    with _store_lock:
+        if _store is None:
+            store = AdmissionStore(DB_FILE, DEFAULT_DATA_STRUCTURE)
+            if os.path.exists(DATA_FILE):
+                try:
+                    count = store.migrate_from_json(DATA_FILE)
+                    if count:
+                        print(f"✅ Migrated {count} applications from {DATA_FILE} into {DB_FILE}.")
+                except Exception as e:
+                    print(f"⚠️ Could not migrate {DATA_FILE}: {e}")
+            if JOURNAL_DIR:
+                _journal = Journal(
+                    store,
+                    JOURNAL_DIR,
+                    segment_max_bytes=JOURNAL_SEGMENT_BYTES,
+                    snapshot_every=JOURNAL_SNAPSHOT_EVERY,
+                    fsync=JOURNAL_FSYNC,
+                )
+            _store = store
+    return _store
+
+def get_journal():
+    get_store()
+    return _journal
+
+# load_data/save_data keep the old whole-document API on top of the store.
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'w') as f:
-            json.dump(DEFAULT_DATA_STRUCTURE, f, indent=4)
-        return DEFAULT_DATA_STRUCTURE
-    try:
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        with open(DATA_FILE, 'w') as f:
-            json.dump(DEFAULT_DATA_STRUCTURE, f, indent=4)
-        return DEFAULT_DATA_STRUCTURE
+    return get_store().load_all()
 
 def save_data(data):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-    with open(BACKUP_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-
-# === LangGraph State ===
-class ProcessAppState(BaseModel):
-    admission_data: dict
-    current_app_index: int
-    current_run_log: List[str] = Field(default_factory=list)
-    extracted_marksheet_data: Optional[dict] = None
-    extracted_aadhaar_data: Optional[dict] = None
+    get_store().save_all(data)
 
 # === PDF Text Extraction ===
-def extract_text_from_pdf(pdf_path):
-    try:
-        import fitz  # PyMuPDF
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        if text.strip():  # ✅ If text was found, return it
-            return text
-    except Exception as e:
-        print(f"⚠️ PyMuPDF failed: {e}")
+# Bump when extraction output changes so stale cache entries stop matching.
+PDF_EXTRACTOR_VERSION = "2"
+PDF_CACHE_FILE = os.path.join(".cache", "pdf_text_cache.sqlite3")
+PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_pdf_cache = None
+
+def get_pdf_cache():
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = PdfTextCache(PDF_CACHE_FILE, max_bytes=PDF_CACHE_MAX_BYTES)
+    return _pdf_cache
+
+# OCR fallback settings: pages are rasterized one at a time at OCR_DPI and
+# OCRed across a process pool; at most OCR_MAX_PAGES image pages per PDF.
+OCR_DPI = 200
+OCR_GRAYSCALE = True
+OCR_MAX_PAGES = 10
+OCR_WORKERS = None  # None = one per CPU
+
+# Results with these methods are incomplete and are retried rather than cached.
+UNCACHED_METHODS = {"failed", "partial"}
+
+def _extract_text_uncached(pdf_path):
+    """Returns (text, method); see pdf_ocr.extract_pdf_text for the methods."""
+    return extract_pdf_text(
+        pdf_path,
+        dpi=OCR_DPI,
+        grayscale=OCR_GRAYSCALE,
+        max_ocr_pages=OCR_MAX_PAGES,
+        workers=OCR_WORKERS,
+    )
 
-    # 🔁 OCR fallback for image-based PDFs
+def _extractor_version():
+    # OCR settings change the output, so they are part of the cache key.
+    return f"{PDF_EXTRACTOR_VERSION}:dpi={OCR_DPI}:gray={OCR_GRAYSCALE}:pages={OCR_MAX_PAGES}"
+
+def extract_text_from_pdf(pdf_path, sha256=None):
+    with span("pdf.extract", path=str(pdf_path)) as attrs:
+        try:
+            cache = get_pdf_cache()
+            key = cache_key(pdf_path, _extractor_version(), sha256)
+            cached = cache.get(key)
+        except Exception as e:
+            print(f"⚠️ PDF cache unavailable: {e}")
+            cache = cached = None
+        attrs["cache_hit"] = cached is not None
+        if cached is not None:
+            attrs["method"] = cached[1]
+            return cached[0]
+
+        text, method = _extract_text_uncached(pdf_path)
+        attrs["method"] = method
+        if cache is not None and method not in UNCACHED_METHODS:
+            try:
+                cache.put(key, text, method)
+            except Exception as e:
+                print(f"⚠️ Could not cache PDF text: {e}")
+        return text
+
+
+# === Uploads ===
+_upload_store = None
+_prefetch_pool = None
+
+def get_upload_store():
+    global _upload_store
+    if _upload_store is None:
+        _upload_store = UploadStore(UPLOAD_DIR, max_bytes=MAX_UPLOAD_BYTES, max_pages=MAX_UPLOAD_PAGES)
+    return _upload_store
+
+def _prefetch(pdf_path, sha256):
     try:
-        from pdf2image import convert_from_path
-        import pytesseract
-        # Optional: Only if poppler not in PATH, set path like below
-        # images = convert_from_path(pdf_path, poppler_path=r"C:\poppler\bin")
-        images = convert_from_path(pdf_path)
-
-        ocr_text = ""
-        for img in images:
-            ocr_text += pytesseract.image_to_string(img)
-        return ocr_text
+        extract_text_from_pdf(pdf_path, sha256)
     except Exception as e:
-        print(f"❌ OCR failed: {e}")
-        return ""
+        print(f"⚠️ Background extraction failed for {pdf_path}: {e}")
+
+def prefetch_pdf_text(pdf_path, sha256=None):
+    """Warm the PDF text cache in the background; the graph then gets a cache hit."""
+    global _prefetch_pool
+    if _prefetch_pool is None:
+        _prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="pdf-prefetch")
+    return _prefetch_pool.submit(_prefetch, pdf_path, sha256)
+
+def store_upload(stream, app_id, kind, prefetch=True):
+    """
+    Stream an uploaded PDF into the content-addressed upload store and start
+    extracting its text. Returns the UploadStore.save() result; raises
+    UploadRejected for files over the size/page limits.
+    """
+    saved = get_upload_store().save(stream, app_id, kind)
+    if saved["duplicate"]:
+        print(f"♻️ {kind} for {app_id} matches an earlier upload ({saved['sha256'][:12]}).")
+    if prefetch:
+        prefetch_pdf_text(saved["path"], saved["sha256"])
+    return saved
 
 
 # === Node: Extract Data ===
-def data_extraction_node(state: ProcessAppState) -> ProcessAppState:
-    i = state.current_app_index
-    app = state.admission_data["applications"][i]
+def data_extraction_node(state):
+    app = state.app
 
-    marksheet_text = extract_text_from_pdf(app["marksheet_pdf_path"])
-    aadhaar_text = extract_text_from_pdf(app["aadhaar_pdf_path"])
+    marksheet_text = extract_text_from_pdf(app["marksheet_pdf_path"], app.get("marksheet_sha256"))
+    aadhaar_text = extract_text_from_pdf(app["aadhaar_pdf_path"], app.get("aadhaar_sha256"))
 
-    print("📄 Extracted Marksheet Text:\n", marksheet_text[:500])
-    print("📄 Extracted Aadhaar Text:\n", aadhaar_text[:500])
+    if verbose_sampled():
+        print("📄 Extracted Marksheet Text:\n", marksheet_text[:500])
+        print("📄 Extracted Aadhaar Text:\n", aadhaar_text[:500])
 
     # MARKSHEET extraction
-    name_match = re.search(r"Name:\s*([A-Z][a-z]+)", marksheet_text)
-    pcm10_match = re.search(r"Class 10 PCM Percentage:\s*([\d.]+)", marksheet_text)
-    pcm12_match = re.search(r"Class 12 PCM Percentage:\s*([\d.]+)", marksheet_text)
-    wbjee_match = re.search(r"WBJEE Rank:\s*(\d+)", marksheet_text)
-
-    app["applicant_name_marksheet"] = name_match.group(1).strip() if name_match else "Unknown"
+    marksheet_fields, marksheet_confidence = extract_marksheet_fields(marksheet_text)
+    app["applicant_name_marksheet"] = marksheet_fields["applicant_name"] or "Unknown"
 
-    if pcm10_match:
+    if marksheet_fields["class10_pcm_perc"] is not None:
         app["marks"] = app.get("marks", {})
-        app["marks"]["class10_pcm_perc"] = float(pcm10_match.group(1))
+        app["marks"]["class10_pcm_perc"] = marksheet_fields["class10_pcm_perc"]
 
-    if pcm12_match:
+    if marksheet_fields["class12_pcm_perc"] is not None:
         app["marks"] = app.get("marks", {})
-        app["marks"]["class12_pcm_perc"] = float(pcm12_match.group(1))
+        app["marks"]["class12_pcm_perc"] = marksheet_fields["class12_pcm_perc"]
 
-    if wbjee_match:
-        app["wbjee_rank"] = int(wbjee_match.group(1))
+    if marksheet_fields["wbjee_rank"] is not None:
+        app["wbjee_rank"] = marksheet_fields["wbjee_rank"]
 
     # AADHAAR extraction
-    aadhaar_name_match = re.search(r"([A-Z][a-z]+(?:\s[A-Z][a-z]+)+)", aadhaar_text)
-    aadhaar_number_match = re.search(r"\d{4}\s\d{4}\s\d{4}", aadhaar_text)
-
-    app["aadhaar_name"] = aadhaar_name_match.group(1).strip() if aadhaar_name_match else "Unknown"
+    aadhaar_fields, aadhaar_confidence = extract_aadhaar_fields(aadhaar_text)
+    app["aadhaar_name"] = aadhaar_fields["aadhaar_name"] or "Unknown"
     # ✅ Use already provided Aadhaar number from user
     if not app.get("aadhaar_number"):
-        app["aadhaar_number"] = aadhaar_number_match.group(0).strip() if aadhaar_number_match else "XXXX-XXXX-XXXX"
+        app["aadhaar_number"] = aadhaar_fields["aadhaar_number"] or "XXXX-XXXX-XXXX"
 
+    app["extraction_confidence"] = {**marksheet_confidence, **aadhaar_confidence}
+    app["extraction_status"] = "Extracted" if all(marksheet_confidence.values()) else "Partial"
 
-    # Store extracted full text (optional)
-    state.extracted_marksheet_data = {"text": marksheet_text}
-    state.extracted_aadhaar_data = {"text": aadhaar_text}
-
-    state.admission_data["applications"][i] = app
     state.current_run_log.append("🧾 PDF data extracted.")
     return state
 
 
 
 # === Node: Validate ===
-def validation_node(state: ProcessAppState) -> ProcessAppState:
-    i = state.current_app_index
-    app = state.admission_data["applications"][i]
-    criteria = state.admission_data.get("eligibility_criteria", {})
+def validation_node(state):
+    app = state.app
+    criteria = state.criteria or current_criteria().as_dict()
 
     marks10 = app.get("marks", {}).get("class10_pcm_perc")
     marks12 = app.get("marks", {}).get("class12_pcm_perc")
@@ -197,170 +333,443 @@ def validation_node(state: ProcessAppState) -> ProcessAppState:
         app["validation_reason"] = "Marks or WBJEE rank did not meet criteria"
         state.current_run_log.append("❌ Validation failed based on marks/rank.")
 
-    state.admission_data["applications"][i] = app
     return state
 
 
-# === Node: Email Communication ===
-def communication_node(state: ProcessAppState) -> ProcessAppState:
-    i = state.current_app_index
-    app = state.admission_data["applications"][i]
-
-    msg = EmailMessage()
-    msg["Subject"] = f"Application Status - ID {app['app_id']}"
-    msg["From"] = SENDER_EMAIL
-    msg["To"] = app["applicant_email"]
-
-    # 🔍 Common part of the message
-    content = f"Hello {app.get('name') or app.get('applicant_name_marksheet')},\n\n"
-    content += f"Your application (ID: {app['app_id']}) has been {app['validation_status']}.\n"
-
-    # ✅ Valid + Loan + Income < 5
-    if app.get("validation_status") == "Valid" and app.get("loan_requested") and app.get("family_income_lpa", 10) < 5.0:
-        content += (
-            "\nSince your family income is below 5 LPA, please mail your last year ITR file and income certificate "
-            "to the loan sanction cell to complete your loan processing."
-        )
-    # ✅ Valid + Loan + Income ≥ 5
-    elif app.get("validation_status") == "Valid" and app.get("loan_requested") and app.get("family_income_lpa", 0) >= 5.0:
-        content += "\nYou are not eligible for a loan due to income being 5 LPA or above."
+# === Email Outbox ===
+_outbox = None
+_email_sender = None
 
-    # ✅ Valid + No Loan
-    elif app.get("validation_status") == "Valid" and not app.get("loan_requested"):
-        content += "\nThank you for submitting your application. You have not requested a loan."
+def get_outbox():
+    global _outbox
+    if _outbox is None:
+        _outbox = EmailOutbox(get_store())
+    return _outbox
 
-    # ❌ Invalid Case
-    elif app.get("validation_status") == "Invalid":
-        content += "\nUnfortunately, your application could not be validated due to missing or incorrect information."
+def ensure_email_sender():
+    """Start the background outbox sender for this process (once)."""
+    global _email_sender
+    if _email_sender is None:
+        settings = SmtpSettings(SMTP_HOST, SMTP_PORT, SENDER_EMAIL, SENDER_PASSWORD, use_ssl=SMTP_USE_SSL)
+        _email_sender = OutboxSender(get_outbox(), settings, rate_per_minute=EMAIL_RATE_PER_MINUTE)
+    return _email_sender.start()
 
-    content += "\n\nThank you,\nAdmissions Team"
-    msg.set_content(content)
+
+# === Node: Email Communication ===
+def queue_decision_email(app, criteria=None):
+    """
+    Queue the decision email for `app` and mark it "Queued". Delivery happens in
+    the background sender, which flips the status to "Email Sent" (or "Failed to
+    send" after retries) once the record is saved.
+    """
+    criteria = criteria or current_criteria().as_dict()
+    subject, content = decision_email(app, criteria.get("max_income_for_loan_lpa", 5.0))
+    if not app.get("applicant_email"):
+        raise ValueError("no recipient email address")
+    get_outbox().enqueue(app["app_id"], SENDER_EMAIL, app["applicant_email"], subject, content)
+    if START_EMAIL_SENDER:
+        ensure_email_sender()
+    app["communication_status"] = "Queued"
+
+def communication_node(state):
+    app = state.app
 
     try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        app["communication_status"] = "Email Sent"
-        state.current_run_log.append("📧 Email sent successfully.")
+        queue_decision_email(app, state.criteria)
+        state.current_run_log.append("📧 Email queued for delivery.")
     except Exception as e:
         print(f"❌ Email failed: {e}")
         app["communication_status"] = "Failed to send"
         state.current_run_log.append(f"❌ Email error: {e}")
 
-    state.admission_data["applications"][i] = app
     return state
 
 
 # === Node: Loan and Fee Slip ===
-def loan_processing_node(state: ProcessAppState) -> ProcessAppState:
-    i = state.current_app_index
-    app = state.admission_data["applications"][i]
-    budget = state.admission_data.get("loan_budget", 0)
-
-    if app.get("loan_requested"):
-        income = app.get("family_income_lpa", 10)
-        if income <= 5.0 and budget >= 5000:
-            app["loan_status"] = "Approved"
-            state.admission_data["loan_budget"] -= 5000
-            state.current_run_log.append("🏦 Loan approved.")
-        else:
-            app["loan_status"] = "Rejected"
-            app["loan_rejection_reason"] = "Income too high or insufficient budget"
-            state.current_run_log.append("❌ Loan rejected.")
-    else:
-        app["loan_status"] = "Not Requested"
+_loan_allocator = None
+
+def get_loan_allocator():
+    global _loan_allocator
+    if _loan_allocator is None:
+        from loan_allocator import LoanAllocator
+        _loan_allocator = LoanAllocator(get_store(), LOAN_AMOUNT)
+    return _loan_allocator
+
+def decide_loans(apps):
+    """
+    Decide loans for in-flight applications, best priority first, against what
+    is left of the budget (see LoanAllocator.decide). Earlier decisions are never
+    revisited here; that is reallocate_loans. Sets loan_status on `apps`.
+    """
+    from loan_allocator import priority_order
+    allocator = get_loan_allocator()
+    with get_store().transaction():
+        for app in priority_order([app for app in apps if app.get("loan_requested")]):
+            app["loan_status"], app["loan_rejection_reason"] = allocator.decide(app)
+    for app in apps:
+        if not app.get("loan_requested"):
+            app["loan_status"] = "Not Requested"
+
+def reallocate_loans(priority=None):
+    """
+    Admin action: re-run the allocation over every settled loan request and
+    queue an updated decision email to each applicant whose loan changed.
+    Returns the plan.
+    """
+    store = get_store()
+    allocator = get_loan_allocator()
+    criteria = current_criteria().as_dict()
+    with store.transaction():
+        plan = allocator.apply(priority) if priority else allocator.apply()
+        notified = []
+        for app_id in plan["changed"]:
+            app = store.get_application(app_id)
+            try:
+                queue_decision_email(app, criteria)
+            except Exception as e:
+                print(f"❌ Email failed for {app_id}: {e}")
+                app["communication_status"] = "Failed to send"
+            notified.append(app)
+        store.upsert_applications(notified)
+    return plan
+
+def loan_processing_node(state):
+    app = state.app
+    decide_loans([app])
+
+    if not app.get("loan_requested"):
         state.current_run_log.append("💼 Loan not requested.")
+    elif app["loan_status"] == "Approved":
+        state.current_run_log.append("🏦 Loan approved.")
+    else:
+        state.current_run_log.append(f"❌ Loan rejected: {app.get('loan_rejection_reason')}.")
 
-    state.admission_data["applications"][i] = app
     return state
 
 
 # === Build the LangGraph ===
-process_app_workflow = StateGraph(ProcessAppState)
-process_app_workflow.add_node("extract_data", data_extraction_node)
-process_app_workflow.add_node("validate_application", validation_node)
-process_app_workflow.add_node("communicate_status", communication_node)
-process_app_workflow.add_node("check_loan_request", loan_processing_node)
-process_app_workflow.set_entry_point("extract_data")
-process_app_workflow.add_edge("extract_data", "validate_application")
-process_app_workflow.add_edge("validate_application", "communicate_status")
-process_app_workflow.add_edge("communicate_status", "check_loan_request")
-process_app_workflow.set_finish_point("check_loan_request")
-compiled_process_app_graph = process_app_workflow.compile()
+_process_app_graph = None
+_graph_checkpointer = None
+_graph_lock = threading.Lock()
+# Per-run progress callback, called with each node's name as it starts.
+_graph_progress = ContextVar("graph_progress", default=None)
+
+def _graph_step(name, node):
+    timed = traced(f"node.{name}")(node)
+
+    def step(state):
+        on_progress = _graph_progress.get()
+        if on_progress is not None:
+            on_progress(name)
+        return timed(state)
+    return step
+
+def get_process_app_graph():
+    """The compiled application graph, built once on first use; checkpointed with GRAPH_CHECKPOINT_DB."""
+    global _process_app_graph, _graph_checkpointer
+    with _graph_lock:
+        if _process_app_graph is None:
+            from process_graph import build_process_app_graph, sqlite_checkpointer
+            if GRAPH_CHECKPOINT_DB:
+                try:
+                    _graph_checkpointer = sqlite_checkpointer(GRAPH_CHECKPOINT_DB)
+                except ImportError as e:
+                    print(f"⚠️ Graph checkpoints disabled ({e}); pip install langgraph-checkpoint-sqlite to resume runs.")
+            _process_app_graph = build_process_app_graph([
+                ("extract_data", _graph_step("extract_data", data_extraction_node)),
+                ("validate_application", _graph_step("validate_application", validation_node)),
+                ("communicate_status", _graph_step("communicate_status", communication_node)),
+                ("check_loan_request", _graph_step("check_loan_request", loan_processing_node)),
+            ], checkpointer=_graph_checkpointer)
+    return _process_app_graph
+
+def _graph_config(app_id):
+    return {"configurable": {"thread_id": f"app_process_{app_id}"}}
+
+def graph_checkpoint(app_id):
+    """
+    (nodes still to run, saved state values) of app_id's checkpointed run, or
+    None if it has none. No nodes left means the graph finished but its result
+    was never committed.
+    """
+    graph = get_process_app_graph()
+    if _graph_checkpointer is None:
+        return None
+    snapshot = graph.get_state(_graph_config(app_id))
+    if not snapshot.values:
+        return None
+    return tuple(snapshot.next), snapshot.values
+
+def _drop_checkpoints(app_id):
+    # A finished run needs no checkpoints, so the file only holds unfinished ones.
+    if _graph_checkpointer is not None:
+        _graph_checkpointer.delete_thread(_graph_config(app_id)["configurable"]["thread_id"])
+
+def __getattr__(name):
+    # Lazy stand-ins for names this module used to create at import time.
+    if name == "compiled_process_app_graph":
+        return get_process_app_graph()
+    if name == "ProcessAppState":
+        from process_graph import ProcessAppState
+        return ProcessAppState
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # === Main Functions for Streamlit ===
-def run_single_application_graph(student_data: dict):
-    admission_data = load_data()
-    new_app = DEFAULT_APPLICATION_STRUCTURE.copy()
+def new_application(student_data: dict) -> dict:
+    # deepcopy so the nested "marks" dict is never shared between applications
+    new_app = copy.deepcopy(DEFAULT_APPLICATION_STRUCTURE)
     new_app["app_id"] = student_data["app_id"]
     new_app["marksheet_pdf_path"] = student_data.get("marksheet_pdf_path")
     new_app["aadhaar_pdf_path"] = student_data.get("aadhaar_pdf_path")
+    new_app["marksheet_sha256"] = student_data.get("marksheet_sha256")
+    new_app["aadhaar_sha256"] = student_data.get("aadhaar_sha256")
     new_app["loan_requested"] = student_data.get("loan_requested", False)
     new_app["family_income_lpa"] = student_data.get("family_income_lpa", None)
     new_app["applicant_email"] = student_data.get("email")
     new_app["aadhaar_number"] = student_data.get("aadhaar_number")
-    admission_data["applications"].append(new_app)
-    app_index = len(admission_data["applications"]) - 1
-    state = {
-        "admission_data": admission_data,
-        "current_app_index": app_index,
-        "current_run_log": [],
-        "extracted_marksheet_data": None,
-        "extracted_aadhaar_data": None
+    return new_app
+
+def application_payload(app):
+    """student_data for a stored application (the inverse of new_application)."""
+    payload = {
+        "app_id": app["app_id"],
+        "email": app.get("applicant_email"),
+        "aadhaar_number": app.get("aadhaar_number"),
+        "loan_requested": app.get("loan_requested", False),
+        "family_income_lpa": app.get("family_income_lpa"),
     }
-    config = {"configurable": {"thread_id": f"app_process_{student_data['app_id']}"}}
+    for field in ("marksheet_pdf_path", "aadhaar_pdf_path", "marksheet_sha256", "aadhaar_sha256"):
+        payload[field] = app.get(field)
+    return payload
+
+def run_single_application_graph(student_data: dict, on_progress=None, raise_errors=False):
+    """
+    Process one submission synchronously and return the saved application.
+    Duplicates of an earlier application are saved as such without running
+    the graph (DUPLICATE_POLICY). A run that failed or was interrupted earlier
+    resumes from its checkpoint instead of starting over. On failure the error
+    goes to the director log and the pending record is kept; the exception is
+    re-raised only with raise_errors (job workers).
+    """
+    store = get_store()
+    app_id = student_data["app_id"]
+    new_app = new_application(student_data)
+    token = _graph_progress.set(on_progress)
     try:
-        final_state = compiled_process_app_graph.invoke(state, config=config)
-        save_data(final_state["admission_data"])
+        checkpoint = graph_checkpoint(app_id)
+        if checkpoint and not checkpoint[0]:
+            # The graph already finished (loan allocated, email queued); only
+            # the commit was lost, so running it again would queue the email twice.
+            print(f"↩️ Committing the finished run of application {app_id}.")
+            final_app = checkpoint[1]["app"]
+        else:
+            if checkpoint:
+                print(f"↩️ Resuming application {app_id} at {', '.join(checkpoint[0])}.")
+                graph_input = None  # continue from the saved state
+            else:
+                if DUPLICATE_POLICY:
+                    original = find_duplicate(store, new_app)
+                    if original is not None:
+                        print(f"♻️ Application {app_id} duplicates {original['app_id']}; not processed again.")
+                        return record_duplicate(store, new_app, original, merge=DUPLICATE_POLICY == "merge")
+                graph_input = {
+                    "app": copy.deepcopy(new_app),
+                    "criteria": current_criteria().as_dict(),
+                    "current_run_log": [],
+                }
+            with span("graph.run", app_id=app_id, resumed=bool(checkpoint)):
+                final_app = get_process_app_graph().invoke(graph_input, config=_graph_config(app_id))["app"]
+        # The run's delta is this one application row; the loan node has
+        # already committed the loan allocation and loan_budget.
+        store.upsert_application(final_app)
+        _drop_checkpoints(app_id)
+        return final_app
     except Exception as e:
-        admission_data["director_log"].append(f"ERROR: {e}")
-        save_data(admission_data)
+        with store.transaction():
+            saved = store.get_application(app_id)
+            if saved is None:
+                store.upsert_application(new_app)
+            store.append_director_log(f"ERROR: {app_id}: {e}")
+        if raise_errors:
+            raise
+        return saved or new_app
+    finally:
+        _graph_progress.reset(token)
+        flush_metrics()
+
+# === Background Submission ===
+_job_queue = None
+_job_pool = None
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(get_store())
+    return _job_queue
+
+def _process_job(student_data, on_progress):
+    existing = get_store().get_application(student_data["app_id"])
+    if existing and existing.get("validation_status") != "Pending":
+        return existing  # a previous attempt already committed its result
+    return run_single_application_graph(student_data, on_progress=on_progress, raise_errors=True)
+
+def make_job_pool(workers=JOB_WORKERS):
+    return JobWorkerPool(get_job_queue(), _process_job, workers=workers, max_attempts=JOB_MAX_ATTEMPTS)
+
+def ensure_job_workers():
+    """Start this process's background job workers (once)."""
+    global _job_pool
+    if _job_pool is None:
+        _job_pool = make_job_pool()
+    return _job_pool.start()
+
+def submit_application(student_data: dict):
+    """
+    Save the submission as a pending application and queue it for processing.
+    Returns immediately with the job status; submitting the same app_id again
+    does not queue a second run.
+    """
+    get_job_queue().submit(student_data["app_id"], student_data, app=new_application(student_data))
+    if START_JOB_WORKERS:
+        ensure_job_workers()
+    return application_status(student_data["app_id"])
+
+def application_status(app_id):
+    """Cheap status lookup for polling: the job row plus the key outcome fields."""
+    status = get_job_queue().status(app_id)
+    if status is not None and status["status"] in ("done", "failed"):
+        app = get_store().get_application(app_id) or {}
+        for field in ("validation_status", "loan_status", "loan_rejection_reason", "communication_status",
+                      "duplicate_of"):
+            status[field] = app.get(field)
+    return status
+
+# === Stuck Applications ===
+def stuck_applications(stale_after=900):
+    """
+    Pending applications whose graph run stopped part-way (or finished
+    without being committed) and that no worker is going to pick up: no job,
+    a failed job, or a running job that has not moved for stale_after seconds.
+    """
+    queue = get_job_queue()
+    stuck = []
+    for app in get_store().list_applications(validation_status="Pending"):
+        checkpoint = graph_checkpoint(app["app_id"])
+        if checkpoint is None:
+            continue
+        job = queue.status(app["app_id"])
+        if job and (job["status"] == "queued" or
+                    (job["status"] == "running" and job["updated_at"] > time.time() - stale_after)):
+            continue
+        stuck.append({
+            "app_id": app["app_id"],
+            "next": list(checkpoint[0]) or ["commit"],
+            "job_status": job["status"] if job else None,
+            "attempts": job["attempts"] if job else 0,
+            "last_error": job["last_error"] if job else None,
+        })
+    return stuck
+
+def resume_stuck_applications(app_ids=None):
+    """
+    Queue stuck applications (all, or only app_ids) again; each resumes from
+    its checkpoint when a worker picks it up. Returns the app_ids queued.
+    """
+    queue = get_job_queue()
+    queued = []
+    for item in stuck_applications():
+        if app_ids and item["app_id"] not in app_ids:
+            continue
+        app = get_store().get_application(item["app_id"])
+        if queue.requeue(item["app_id"], application_payload(app)):
+            queued.append(item["app_id"])
+    if queued and START_JOB_WORKERS:
+        ensure_job_workers()
+    return queued
+
+# === Director Queries ===
+DIRECTOR_LLM_MODEL = "gpt-3.5-turbo"
+DIRECTOR_CACHE_MAX_ENTRIES = 256
+DIRECTOR_CACHE_TTL_SECONDS = 600
+_director_engine = None
+_application_table = None
+
+def get_application_table():
+    """Shared typed, incrementally refreshed table behind analytics and the dashboard."""
+    global _application_table
+    if _application_table is None:
+        from analytics import ApplicationTable  # pandas is only loaded here
+        _application_table = ApplicationTable(get_store())
+    return _application_table
+
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=DIRECTOR_LLM_MODEL, temperature=0)
+
+def get_director_engine():
+    # One engine (and so one LLM client) per process, built on first use.
+    global _director_engine
+    if _director_engine is None:
+        _director_engine = DirectorQueryEngine(
+            get_store(),
+            llm_factory=get_llm,
+            model=DIRECTOR_LLM_MODEL,
+            cache=QueryCache(DIRECTOR_CACHE_MAX_ENTRIES, DIRECTOR_CACHE_TTL_SECONDS),
+            analytics=get_application_table(),
+        )
+    return _director_engine
 
 def handle_director_query(query: str):
-    try:
-        current_data = load_data()
-        data_summary = json.dumps(current_data, indent=2)
-    except Exception as e:
-        return "⚠️ Unable to load admission data."
+    return get_director_engine().answer(query)
+
+def director_cache_stats():
+    return get_director_engine().cache.stats()
+
+# === Bulk Documents ===
+def generate_bulk_documents(kind, validation_status="Valid", loan_status=None, merged=False, force=False):
+    """Fee slips or decision letters for every application in the given status; returns the manifest."""
+    return generate_documents(
+        get_store(), kind, DOCUMENTS_DIR,
+        validation_status=validation_status, loan_status=loan_status, merged=merged, force=force,
+        loan_amount=LOAN_AMOUNT, due_days=FEE_DUE_DAYS,
+    )
 
-    prompt = f"""
-    You are a smart assistant for a university.
-    Here is the current admission data:
-    {data_summary}
+# === Admission Criteria ===
+_criteria_registry = None
 
-    Now answer this question:
-    {query}
-    """
+def get_criteria_registry():
+    global _criteria_registry
+    if _criteria_registry is None:
+        _criteria_registry = CriteriaRegistry(get_store(), DEFAULT_DATA_STRUCTURE["eligibility_criteria"])
+    return _criteria_registry
 
-    try:
-        llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-        response = llm.invoke([HumanMessage(content=prompt)])
-        return response.content
-    except Exception as e:
-        return f"⚠️ Error generating response: {e}"
+def current_criteria():
+    """Active EligibilityCriteria; served from memory until the criteria change."""
+    return get_criteria_registry().current()
+
+def criteria_uploaded():
+    return get_criteria_registry().has_uploaded_criteria()
 
-def parse_criteria_pdf(pdf_path):
+def parse_criteria_pdf(pdf_path, sha256=None):
     """
     Extract and update eligibility criteria from the uploaded admission criteria PDF.
+    A PDF that was parsed before is not read again; applications are only
+    re-validated (and loans reallocated) when the criteria actually changed.
     """
-    text = extract_text_from_pdf(pdf_path)
-    data = load_data()
-
-    # Very basic rule extraction — you can improve with NLP or regex later
-    match_10 = re.search(r'10th[^\\d]*(\\d{2})%', text)
-    match_12 = re.search(r'12th[^\\d]*(\\d{2})%', text)
-    match_rank = re.search(r'WBJEE[^\\d]*(\\d+)', text)
-    match_income = re.search(r'income[^\\d]*(\\d+(\\.\\d+)?)\\s*LPA', text)
-
-    if match_10:
-        data['eligibility_criteria']['min_class10_pcm_perc'] = int(match_10.group(1))
-    if match_12:
-        data['eligibility_criteria']['min_class12_pcm_perc'] = int(match_12.group(1))
-    if match_rank:
-        data['eligibility_criteria']['max_wbjee_rank'] = int(match_rank.group(1))
-    if match_income:
-        data['eligibility_criteria']['max_income_for_loan_lpa'] = float(match_income.group(1))
-
-    save_data(data)
-    print("✅ Criteria updated from uploaded PDF.")
+    registry = get_criteria_registry()
+    sha256 = sha256 or file_sha256(pdf_path)
+    found, cached = registry.parse(sha256, lambda: extract_text_from_pdf(pdf_path, sha256))
+    criteria, changed = registry.activate(sha256, found, pdf_path)
+    print(f"✅ Criteria v{criteria.version} {'loaded from cache' if cached else 'extracted'}: {found or 'no values found'}.")
+
+    report = {"checked": 0, "changed": 0, "criteria_version": criteria.version}
+    if changed:
+        # Existing applications are re-checked against the new rules in bulk,
+        # then loans are reallocated under the new validation and income limit.
+        from revalidation import revalidate_applications
+        report.update(revalidate_applications(get_store(), criteria.as_dict()))
+        print(f"🔁 Re-validated {report['checked']} applications: {report['changed']} changed.")
+        plan = reallocate_loans()
+        report.update(loans_approved=plan["approved"], loan_decisions_changed=plan["changed"])
+        print(f"🏦 Reallocated loans: {plan['approved']} approved, {len(plan['changed'])} decisions changed.")
+    return report
@@ -0,0 +1,150 @@
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# === Configuration ===
+logger = logging.getLogger("edudoc.trace")
+logger.propagate = False
+
+_config = {"metrics_file": None, "verbose_sample_rate": 1.0}
+
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _JsonLineHandler(logging.Handler):
+    def __init__(self, path):
+        super().__init__()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+        self._lock_file = threading.Lock()
+
+    def emit(self, record):
+        with self._lock_file:
+            self._file.write(json.dumps(record.msg, default=str) + "\n")
+
+
+def configure_tracing(log_file=None, metrics_file=None, verbose_sample_rate=1.0):
+    """
+    log_file: JSON-lines event log ("-" for stderr, None to disable).
+    metrics_file: Prometheus text file rewritten by flush_metrics().
+    verbose_sample_rate: share of calls that print debug text such as extracted
+    PDF contents; set 0 in production.
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    if log_file == "-":
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    elif log_file:
+        logger.addHandler(_JsonLineHandler(log_file))
+    logger.setLevel(logging.INFO if log_file else logging.CRITICAL + 1)
+    _config["metrics_file"] = metrics_file
+    _config["verbose_sample_rate"] = verbose_sample_rate
+
+
+def verbose_sampled():
+    """True when this call should print verbose debug output."""
+    rate = _config["verbose_sample_rate"]
+    return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+
+# === Metrics ===
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.wall_sum = 0.0
+        self.cpu_sum = 0.0
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+
+    def observe(self, wall, cpu):
+        self.count += 1
+        self.wall_sum += wall
+        self.cpu_sum += cpu
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if wall <= bound:
+                self.buckets[i] += 1
+
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def record(name, wall, cpu=0.0, **attrs):
+    """Record one finished operation: metrics plus a JSON log event."""
+    with _metrics_lock:
+        _metrics.setdefault(name, _Histogram()).observe(wall, cpu)
+    if logger.isEnabledFor(logging.INFO):
+        event = {"ts": time.time(), "event": "span", "name": name,
+                 "wall_s": round(wall, 6), "cpu_s": round(cpu, 6)}
+        event.update(attrs)
+        logger.info(event)
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block (wall clock and this thread's CPU time). Attributes can be
+    added inside the block through the yielded dict.
+    """
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        if error:
+            attrs["error"] = error
+        record(name, time.perf_counter() - started, time.thread_time() - cpu_started, **attrs)
+
+def traced(name):
+    """Decorator form of span(), e.g. for LangGraph nodes."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def metrics_snapshot():
+    with _metrics_lock:
+        return {
+            name: {"count": h.count, "wall_seconds": h.wall_sum, "cpu_seconds": h.cpu_sum}
+            for name, h in _metrics.items()
+        }
+
+def prometheus_text():
+    lines = [
+        "# HELP edudoc_span_seconds Wall-clock duration of instrumented operations.",
+        "# TYPE edudoc_span_seconds histogram",
+    ]
+    cpu_lines = [
+        "# HELP edudoc_span_cpu_seconds_total CPU time spent in instrumented operations.",
+        "# TYPE edudoc_span_cpu_seconds_total counter",
+    ]
+    with _metrics_lock:
+        for name, h in sorted(_metrics.items()):
+            for bound, count in zip(HISTOGRAM_BUCKETS, h.buckets):
+                lines.append(f'edudoc_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'edudoc_span_seconds_bucket{{span="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'edudoc_span_seconds_sum{{span="{name}"}} {h.wall_sum}')
+            lines.append(f'edudoc_span_seconds_count{{span="{name}"}} {h.count}')
+            cpu_lines.append(f'edudoc_span_cpu_seconds_total{{span="{name}"}} {h.cpu_sum}')
+    return "\n".join(lines + cpu_lines) + "\n"
+
+def flush_metrics():
+    """Atomically rewrite the configured Prometheus metrics file, if any."""
+    path = _config["metrics_file"]
+    if not path:
+        return
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
@@ -0,0 +1,259 @@
+import json
+import socket
+import threading
+import time
+
+# === Job Schema ===
+# One job per app_id: submitting the same application twice never queues a
+# second run. `stage` is the last graph node started, for progress display.
+JOB_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS application_jobs (
+        app_id TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        stage TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claimed_at REAL,
+        worker TEXT,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_application_jobs_status ON application_jobs(status, next_attempt_at)",
+]
+
+STATUS_FIELDS = ("app_id", "status", "stage", "attempts", "last_error", "created_at", "updated_at", "finished_at")
+
+
+class JobQueue:
+    """
+    Durable queue of application submissions, stored next to the applications
+    in the AdmissionStore. Job bookkeeping writes use bump_version=False, so
+    they do not invalidate caches keyed on data_version.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        with store.transaction() as conn:
+            for statement in JOB_SCHEMA:
+                conn.execute(statement)
+
+    def submit(self, app_id, payload, app=None):
+        """
+        Queue `payload` (the student_data dict) for app_id and, when given, save
+        `app` as its pending application record in the same transaction. Returns
+        False if a job for app_id already exists, in which case nothing changes.
+        """
+        now = time.time()
+        with self.store.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO application_jobs (app_id, payload, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(app_id) DO NOTHING",
+                (app_id, json.dumps(payload), now, now, now),
+            )
+            created = cursor.rowcount == 1
+            if created and app is not None:
+                self.store.upsert_application(app)
+        return created
+
+    def requeue(self, app_id, payload):
+        """
+        Make app_id due again with a fresh attempt count, creating its job if it
+        never had one (an existing job keeps its payload). Returns False when the
+        job is already queued or running.
+        """
+        now = time.time()
+        with self.store.transaction(bump_version=False) as conn:
+            cursor = conn.execute(
+                "INSERT INTO application_jobs (app_id, payload, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(app_id) DO UPDATE SET status = 'queued', attempts = 0, "
+                "next_attempt_at = excluded.next_attempt_at, claimed_at = NULL, worker = NULL, "
+                "finished_at = NULL, updated_at = excluded.updated_at "
+                "WHERE application_jobs.status NOT IN ('queued', 'running')",
+                (app_id, json.dumps(payload), now, now, now),
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, worker, stale_after=900):
+        """
+        Mark the next due job as 'running' and return it, or None. Jobs whose
+        worker died (claimed more than `stale_after` seconds ago) are picked up again.
+        """
+        now = time.time()
+        with self.store.transaction(bump_version=False) as conn:
+            row = conn.execute(
+                "SELECT app_id, payload, attempts FROM application_jobs "
+                "WHERE (status = 'queued' AND next_attempt_at <= ?) OR (status = 'running' AND claimed_at < ?) "
+                "ORDER BY next_attempt_at, created_at LIMIT 1",
+                (now, now - stale_after),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE application_jobs SET status = 'running', claimed_at = ?, worker = ?, updated_at = ? "
+                "WHERE app_id = ?",
+                (now, worker, now, row[0]),
+            )
+        return {"app_id": row[0], "payload": json.loads(row[1]), "attempts": row[2]}
+
+    def set_stage(self, app_id, stage):
+        with self.store.transaction(bump_version=False) as conn:
+            conn.execute(
+                "UPDATE application_jobs SET stage = ?, claimed_at = ?, updated_at = ? WHERE app_id = ?",
+                (stage, time.time(), time.time(), app_id),
+            )
+
+    def mark_done(self, job):
+        now = time.time()
+        with self.store.transaction(bump_version=False) as conn:
+            conn.execute(
+                "UPDATE application_jobs SET status = 'done', stage = 'done', last_error = NULL, "
+                "updated_at = ?, finished_at = ? WHERE app_id = ?",
+                (now, now, job["app_id"]),
+            )
+
+    def mark_failed(self, job, error, max_attempts, backoff_seconds):
+        attempts = job["attempts"] + 1
+        now = time.time()
+        with self.store.transaction(bump_version=False) as conn:
+            if attempts >= max_attempts:
+                conn.execute(
+                    "UPDATE application_jobs SET status = 'failed', attempts = ?, last_error = ?, "
+                    "updated_at = ?, finished_at = ? WHERE app_id = ?",
+                    (attempts, str(error), now, now, job["app_id"]),
+                )
+            else:
+                conn.execute(
+                    "UPDATE application_jobs SET status = 'queued', attempts = ?, last_error = ?, "
+                    "next_attempt_at = ?, claimed_at = NULL, updated_at = ? WHERE app_id = ?",
+                    (attempts, str(error), now + backoff_seconds * (2 ** (attempts - 1)), now, job["app_id"]),
+                )
+
+    def status(self, app_id):
+        """One-row status lookup for UI polling; None for an unknown app_id."""
+        with self.store.transaction(immediate=False) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(STATUS_FIELDS)} FROM application_jobs WHERE app_id = ?", (app_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            status = dict(zip(STATUS_FIELDS, row))
+            status["queue_position"] = None
+            if status["status"] == "queued":
+                status["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM application_jobs WHERE status = 'queued' AND created_at <= ?",
+                    (status["created_at"],),
+                ).fetchone()[0]
+        return status
+
+    def counts(self):
+        with self.store.transaction(immediate=False) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM application_jobs GROUP BY status")
+            return dict(rows.fetchall())
+
+
+class JobWorkerPool:
+    """
+    `workers` threads that claim jobs and run `process(payload, on_progress)`,
+    retrying failures with exponential backoff up to `max_attempts` times.
+    `process` raises on failure; on_progress(stage) records the current stage.
+    """
+
+    def __init__(self, queue, process, workers=2, max_attempts=3, backoff_seconds=10, poll_interval=1.0):
+        self.queue = queue
+        self.process = process
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def run_job(self, job):
+        app_id = job["app_id"]
+        try:
+            self.process(job["payload"], lambda stage: self.queue.set_stage(app_id, stage))
+        except Exception as e:
+            print(f"❌ Job {app_id} failed: {e}")
+            self.queue.mark_failed(job, e, self.max_attempts, self.backoff_seconds)
+            return False
+        self.queue.mark_done(job)
+        return True
+
+    def run_once(self, worker="main"):
+        """Process one due job. Returns False when the queue had nothing due."""
+        job = self.queue.claim(worker)
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+
+    def run_forever(self, worker="main"):
+        while not self._stop.is_set():
+            try:
+                if not self.run_once(worker):
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                print(f"⚠️ Job worker error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        if not self._threads:
+            self._stop.clear()
+        host = socket.gethostname()
+        for i in range(len(self._threads), self.workers):
+            name = f"application-job-{i}"
+            thread = threading.Thread(target=self.run_forever, args=(f"{host}:{name}",), name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import gen_ai_project as backend
+
+    parser = argparse.ArgumentParser(description="Run application job workers in the foreground.")
+    parser.add_argument("--workers", type=int, default=backend.JOB_WORKERS)
+    parser.add_argument("--once", action="store_true", help="Process due jobs until the queue is empty, then exit")
+    parser.add_argument("--stuck", action="store_true", help="List applications whose run stopped part-way, then exit")
+    parser.add_argument("--resume", nargs="*", metavar="APP_ID",
+                        help="Queue stuck applications (all, or the given ones) to resume from their checkpoints")
+    args = parser.parse_args()
+    backend.START_JOB_WORKERS = False  # this process is the worker
+
+    if args.stuck:
+        stuck = backend.stuck_applications()
+        for item in stuck:
+            print(json.dumps(item))
+        print(f"✅ {len(stuck)} stuck applications.")
+        raise SystemExit(0)
+    if args.resume is not None:
+        queued = backend.resume_stuck_applications(args.resume or None)
+        print(f"↩️ Queued {len(queued)} stuck applications to resume.")
+
+    pool = backend.make_job_pool(workers=args.workers)
+    if args.once:
+        processed = 0
+        while pool.run_once():
+            processed += 1
+        print(f"✅ Processed {processed} jobs. Queue: {pool.queue.counts()}")
+    else:
+        pool.start()
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pool.stop()
@@ -0,0 +1,268 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+from admission_store import AdmissionStore, write_json_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialized
+    fcntl = None
+
+# === Journal Layout ===
+# <dir>/journal-<first seq>.jsonl   append-only segments, one event per line
+# <dir>/snapshot-<seq>.json         compacted store state as of event <seq>
+# <dir>/archive/*.jsonl.gz          segments rotated out after a snapshot
+# Events are {"seq", "ts", "type": "app" | "setting" | "log", ...} and are
+# captured by triggers in the writing transaction (see admission_store.MIGRATIONS),
+# then shipped to the active segment after each commit.
+SEGMENT_PREFIX = "journal-"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+def _seq_of(path, prefix):
+    return int(os.path.basename(path)[len(prefix):].split(".")[0])
+
+def list_segments(directory):
+    return sorted(glob.glob(os.path.join(directory, f"{SEGMENT_PREFIX}*.jsonl")),
+                  key=lambda p: _seq_of(p, SEGMENT_PREFIX))
+
+def list_snapshots(directory):
+    return sorted(glob.glob(os.path.join(directory, f"{SNAPSHOT_PREFIX}*.json")),
+                  key=lambda p: _seq_of(p, SNAPSHOT_PREFIX))
+
+def read_events(paths, after_seq=0):
+    """
+    Yield events with seq > after_seq from segment files, in order. An event
+    at or below the last seq yielded is skipped: a crash between shipping and
+    deleting the shipped rows makes the next ship append them again.
+    """
+    last = after_seq
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break  # torn final line from a crash mid-append
+                if event["seq"] > last:
+                    last = event["seq"]
+                    yield event
+
+
+class Journal:
+    """
+    Ships the store's journal table to append-only JSONL segments, takes
+    periodic snapshots and rotates covered segments into the archive.
+    """
+
+    def __init__(self, store, directory, segment_max_bytes=16 * 1024 * 1024,
+                 snapshot_every=10000, keep_snapshots=3, fsync=True):
+        self.store = store
+        self.directory = str(directory)
+        self.archive_dir = os.path.join(self.directory, "archive")
+        self.segment_max_bytes = segment_max_bytes
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._snapshotting = False
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._align_sequence()
+        store.set_meta("journal_enabled", "1")
+        store.add_commit_hook(self.ship)
+        self.ship()
+
+    @contextmanager
+    def _exclusive(self):
+        # Serializes shipping/snapshotting across threads and processes.
+        with self._lock, open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _last_shipped_seq(self):
+        last = 0
+        for event in read_events(list_segments(self.directory)[-1:]):
+            last = event["seq"]
+        return last
+
+    def _last_file_seq(self):
+        segments = list_segments(self.directory)
+        last = self._last_shipped_seq()
+        if segments:
+            last = max(last, _seq_of(segments[-1], SEGMENT_PREFIX) - 1)
+        snapshots = list_snapshots(self.directory)
+        if snapshots:
+            last = max(last, _seq_of(snapshots[-1], SNAPSHOT_PREFIX))
+        return last
+
+    def _align_sequence(self):
+        # A store rebuilt by recover() (or a fresh one pointed at an existing
+        # journal) must keep numbering after what is already on disk.
+        last = self._last_file_seq()
+        self._shipped_seq = self._last_shipped_seq()
+        with self.store.transaction(bump_version=False) as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'journal'").fetchone()
+            if row is None:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('journal', ?)", (last,))
+            elif row[0] < last:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'journal'", (last,))
+
+    def _active_segment(self, first_seq):
+        segments = list_segments(self.directory)
+        if segments and os.path.getsize(segments[-1]) < self.segment_max_bytes:
+            return segments[-1]
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}.jsonl")
+
+    def ship(self):
+        """Append committed journal rows to the active segment. Returns the last seq shipped."""
+        with self._exclusive():
+            with self.store.transaction(immediate=False) as conn:
+                rows = conn.execute("SELECT seq, created_at, event FROM journal ORDER BY seq").fetchall()
+            if not rows:
+                return None
+            # Rows left behind by a crash before the DELETE are already on disk.
+            new_rows = [row for row in rows if row[0] > self._shipped_seq]
+            if new_rows:
+                with open(self._active_segment(new_rows[0][0]), "a") as f:
+                    for seq, created_at, event in new_rows:
+                        f.write(json.dumps({"seq": seq, "ts": created_at, **json.loads(event)}) + "\n")
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+            last = rows[-1][0]
+            self._shipped_seq = max(self._shipped_seq, last)
+            with self.store.transaction(bump_version=False) as conn:
+                conn.execute("DELETE FROM journal WHERE seq <= ?", (last,))
+        if self._snapshot_due(last):
+            self._snapshot_in_background()
+        return last
+
+    def _snapshot_due(self, last_seq):
+        snapshots = list_snapshots(self.directory)
+        covered = _seq_of(snapshots[-1], SNAPSHOT_PREFIX) if snapshots else 0
+        return last_seq - covered >= self.snapshot_every
+
+    def _snapshot_in_background(self):
+        with self._lock:
+            if self._snapshotting:
+                return
+            self._snapshotting = True
+
+        def run():
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"⚠️ Journal snapshot failed: {e}")
+            finally:
+                self._snapshotting = False
+        threading.Thread(target=run, name="journal-snapshot", daemon=True).start()
+
+    def snapshot(self):
+        """
+        Write the whole store as snapshot-<seq>.json, then archive the segments
+        it covers and drop old snapshots. Returns the snapshot path.
+        """
+        with self._exclusive():
+            with self.store.transaction(immediate=False) as conn:
+                # Same read transaction: the state and the seq it corresponds to.
+                seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'journal'").fetchone()[0]
+                data = self.store.load_all()
+            path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{seq:012d}.json")
+            write_json_atomic(path, {"seq": seq, "data": data})
+            self._rotate(seq)
+        print(f"📸 Journal snapshot at event {seq}.")
+        return path
+
+    def _rotate(self, covered_seq):
+        segments = list_segments(self.directory)
+        # A segment is fully covered when the next one starts at or before covered_seq + 1.
+        for segment, following in zip(segments, segments[1:]):
+            if _seq_of(following, SEGMENT_PREFIX) > covered_seq + 1:
+                break
+            target = os.path.join(self.archive_dir, os.path.basename(segment) + ".gz")
+            with open(segment, "rb") as src, gzip.open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+        for old in list_snapshots(self.directory)[:-self.keep_snapshots]:
+            os.remove(old)
+
+
+# === Recovery & Audit ===
+def recover(directory, db_path, defaults):
+    """
+    Rebuild a store at db_path (which must not exist yet) from the newest
+    snapshot plus every later event. Returns (store, last seq replayed).
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists; recover into a new file")
+    store = AdmissionStore(db_path, defaults)
+    snapshots = list_snapshots(directory)
+    last = 0
+    with store.transaction() as conn:
+        if snapshots:
+            with open(snapshots[-1], "r") as f:
+                snapshot = json.load(f)
+            store.save_all(snapshot["data"])
+            last = snapshot["seq"]
+        apps = {}
+        for event in read_events(list_segments(directory), after_seq=last):
+            if event["type"] == "app":
+                apps[event["app_id"]] = event["data"]
+            elif event["type"] == "setting":
+                store.update_settings(**{event["key"]: event["value"]})
+            elif event["type"] == "log":
+                store.append_director_log(event["entry"])
+            last = event["seq"]
+        store.upsert_applications(list(apps.values()))
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'journal'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('journal', ?)", (last,))
+    return store, last
+
+def history(directory, app_id=None, include_archive=True):
+    """All journal events (optionally for one app_id), oldest first, for audits."""
+    paths = []
+    if include_archive:
+        paths += sorted(glob.glob(os.path.join(directory, "archive", f"{SEGMENT_PREFIX}*.jsonl.gz")),
+                        key=lambda p: _seq_of(p, SEGMENT_PREFIX))
+    paths += list_segments(directory)
+    for event in read_events(paths):
+        if app_id is None or event.get("app_id") == app_id:
+            yield event
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import gen_ai_project as backend
+
+    parser = argparse.ArgumentParser(description="Admission data journal: snapshots, recovery and audit.")
+    parser.add_argument("--dir", default=backend.JOURNAL_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("snapshot", help="Write a snapshot now and rotate covered segments")
+    recover_cmd = commands.add_parser("recover", help="Rebuild a store from snapshot + journal")
+    recover_cmd.add_argument("db_path")
+    history_cmd = commands.add_parser("history", help="Print journal events as JSON lines")
+    history_cmd.add_argument("--app-id")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        print(backend.get_journal().snapshot())
+    elif args.command == "recover":
+        store, last = recover(args.dir, args.db_path, backend.DEFAULT_DATA_STRUCTURE)
+        print(f"✅ Recovered {store.count_applications()} applications up to event {last} into {args.db_path}.")
+    else:
+        for event in history(args.dir, app_id=args.app_id):
+            print(json.dumps(event))
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRIORITY = (("income", True), ("rank", True))
+
+ALLOCATION_FIELDS = {
+    "app_id": "$.app_id",
+    "loan_requested": "$.loan_requested",
+    "validation": "$.validation_status",
+    "loan_status": "$.loan_status",
+    "income": "$.family_income_lpa",
+    "rank": "$.wbjee_rank",
+    "marks10": "$.marks.class10_pcm_perc",
+    "marks12": "$.marks.class12_pcm_perc",
+}
+
+REASON_INVALID = "Application not valid"
+REASON_INCOME = "Income too high"
+REASON_NO_FUNDS = "Insufficient budget or capacity"
+
+# Only requests whose validation is settled are (re)decided. Pending rows (a
+# run still in progress) and duplicates keep their loan_status, and what they
+# hold stays out of the pool.
+FINAL_VALIDATION = ("Valid", "Invalid")
+
+
+def request_row(app):
+    """An application dict as one ALLOCATION_FIELDS row."""
+    marks = app.get("marks") or {}
+    return {
+        "app_id": app["app_id"],
+        "loan_requested": app.get("loan_requested"),
+        "validation": app.get("validation_status"),
+        "loan_status": app.get("loan_status"),
+        "income": app.get("family_income_lpa"),
+        "rank": app.get("wbjee_rank"),
+        "marks10": marks.get("class10_pcm_perc"),
+        "marks12": marks.get("class12_pcm_perc"),
+    }
+
+def _sort_key(values, ascending):
+    key = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    if not ascending:
+        key = -key
+    return np.where(np.isnan(key), np.inf, key)  # missing values always sort last
+
+def allocate(requests, pool, loan_amount, capacity, max_income, priority=DEFAULT_PRIORITY):
+    """
+    Global loan allocation over a frame of loan requests (ALLOCATION_FIELDS).
+
+    Eligible requests (valid application, income within max_income) are ordered
+    by `priority`, a sequence of (column, ascending) pairs with submission order
+    as the final tie-break, and the first min(capacity, pool // loan_amount) are
+    approved. Returns (decisions, approved_count) where decisions maps app_id ->
+    (loan_status, rejection_reason).
+    """
+    valid = (requests["validation"] == "Valid").to_numpy()
+    income = pd.to_numeric(requests["income"], errors="coerce").to_numpy(dtype=float)
+    within_income = income <= max_income
+    eligible = valid & within_income
+
+    keys = [requests["seq"].to_numpy()]
+    for column, ascending in reversed(priority):
+        keys.append(_sort_key(requests[column], ascending))
+    order = np.lexsort(keys)  # last key is the most significant
+    order = order[eligible[order]]
+
+    slots = int(min(capacity if capacity is not None else len(order), pool // loan_amount))
+    approved = np.zeros(len(requests), dtype=bool)
+    approved[order[:slots]] = True
+
+    reasons = np.where(
+        ~valid, REASON_INVALID, np.where(~within_income, REASON_INCOME, REASON_NO_FUNDS)
+    )
+    decisions = {
+        app_id: ("Approved", None) if ok else ("Rejected", reason)
+        for app_id, ok, reason in zip(requests["app_id"].tolist(), approved.tolist(), reasons.tolist())
+    }
+    return decisions, int(approved.sum())
+
+def priority_order(apps, priority=DEFAULT_PRIORITY):
+    """`apps` sorted by `priority` (as in allocate), keeping their order as the tie-break."""
+    if not apps:
+        return []
+    requests = pd.DataFrame.from_records([request_row(app) for app in apps], columns=list(ALLOCATION_FIELDS))
+    keys = [np.arange(len(apps))]
+    for column, ascending in reversed(priority):
+        keys.append(_sort_key(requests[column], ascending))
+    return [apps[i] for i in np.lexsort(keys)]
+
+
+class LoanAllocator:
+    """
+    Loan decisions against the shared budget. `decide` settles one in-flight
+    request against what is left, leaving everyone else's decision alone;
+    `apply` is the admin reallocation that re-runs every settled request. The
+    pool for a reallocation is the remaining loan_budget plus what current
+    approvals hold, so it can be repeated (or simulated with other settings)
+    at any time.
+    """
+
+    def __init__(self, store, loan_amount):
+        self.store = store
+        self.loan_amount = loan_amount
+
+    def _requests(self):
+        rows = self.store.fetch_columns(ALLOCATION_FIELDS)
+        df = pd.DataFrame.from_records(rows, columns=["seq", "row_version"] + list(ALLOCATION_FIELDS))
+        df = df[df["loan_requested"].fillna(0).astype(bool) & df["validation"].isin(FINAL_VALIDATION)]
+        return df.reset_index(drop=True)
+
+    def _max_income(self, settings):
+        return (settings.get("eligibility_criteria") or {}).get("max_income_for_loan_lpa", 5.0)
+
+    def _plan(self, budget=None, capacity=None, max_income=None, priority=DEFAULT_PRIORITY):
+        settings = self.store.get_settings()
+        requests = self._requests()
+        if budget is None:
+            held = int((requests["loan_status"] == "Approved").sum()) * self.loan_amount
+            budget = settings.get("loan_budget", 0) + held
+        if capacity is None:
+            capacity = settings.get("university_capacity")
+        if max_income is None:
+            max_income = self._max_income(settings)
+        decisions, approved = allocate(requests, budget, self.loan_amount, capacity, max_income, priority)
+        current = dict(zip(requests["app_id"], requests["loan_status"]))
+        return {
+            "pool": budget,
+            "approved": approved,
+            "rejected": len(decisions) - approved,
+            "budget_remaining": budget - approved * self.loan_amount,
+            "decisions": decisions,
+            "changed": [app_id for app_id, (status, _) in decisions.items() if current.get(app_id) != status],
+        }
+
+    def simulate(self, budget=None, capacity=None, max_income=None, priority=DEFAULT_PRIORITY):
+        """What-if allocation; nothing is written to the store."""
+        with self.store.transaction(immediate=False):
+            return self._plan(budget, capacity, max_income, priority)
+
+    def apply(self, priority=DEFAULT_PRIORITY):
+        """
+        Reallocate every settled request with the stored budget/capacity and
+        commit the changed decisions. This can flip earlier decisions, so it
+        is an explicit admin action (see gen_ai_project.reallocate_loans).
+        """
+        with self.store.transaction():
+            plan = self._plan(priority=priority)
+            changed = set(plan["changed"])
+            self.store.patch_applications({
+                app_id: {"loan_status": status, "loan_rejection_reason": reason}
+                for app_id, (status, reason) in plan["decisions"].items()
+                if app_id in changed
+            })
+            self.store.update_settings(loan_budget=plan["budget_remaining"])
+        return plan
+
+    def decide(self, app):
+        """
+        Decide one in-flight request against the remaining budget and capacity.
+        The decision is patched onto the stored row in the same transaction, so
+        a resumed run keeps its approval instead of spending the budget twice.
+        Returns (loan_status, rejection_reason).
+        """
+        with self.store.transaction():
+            settings = self.store.get_settings()
+            stored = self.store.get_application(app["app_id"]) or {}
+            income = pd.to_numeric(pd.Series([app.get("family_income_lpa")]), errors="coerce").iloc[0]
+            holds = stored.get("loan_status") == "Approved"
+            capacity = settings.get("university_capacity")
+
+            if app.get("validation_status") != "Valid":
+                decision = ("Rejected", REASON_INVALID)
+            elif not income <= self._max_income(settings):
+                decision = ("Rejected", REASON_INCOME)
+            elif holds:
+                decision = ("Approved", None)
+            elif capacity is not None and self.store.count_applications(loan_status="Approved") >= capacity:
+                decision = ("Rejected", REASON_NO_FUNDS)
+            elif self.store.debit_loan_budget(self.loan_amount):
+                decision = ("Approved", None)
+            else:
+                decision = ("Rejected", REASON_NO_FUNDS)
+
+            if holds and decision[0] != "Approved":
+                self.store.debit_loan_budget(-self.loan_amount)
+            self.store.patch_applications({
+                app["app_id"]: {"loan_status": decision[0], "loan_rejection_reason": decision[1]}
+            })
+        return decision
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from gen_ai_project import LOAN_AMOUNT, get_store, reallocate_loans
+
+    parser = argparse.ArgumentParser(description="Reallocate the loan budget across all loan requests.")
+    parser.add_argument("--apply", action="store_true", help="Commit the allocation and email changed decisions (default: simulate)")
+    parser.add_argument("--budget", type=int, help="What-if total budget")
+    parser.add_argument("--capacity", type=int, help="What-if university capacity")
+    parser.add_argument("--priority", default="income,rank",
+                        help="Comma-separated columns; prefix with - for descending, e.g. income,-marks12")
+    args = parser.parse_args()
+
+    priority = tuple((p.lstrip("-"), not p.startswith("-")) for p in args.priority.split(","))
+    if args.apply:
+        plan = reallocate_loans(priority)
+    else:
+        plan = LoanAllocator(get_store(), LOAN_AMOUNT).simulate(budget=args.budget, capacity=args.capacity, priority=priority)
+    plan.pop("decisions")
+    print(json.dumps(plan, indent=2))
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(pdf_path, extractor_version, sha256=None):
+    """
+    Content address of a PDF: SHA-256 of its bytes plus the extractor version.
+    Pass `sha256` when it is already known (e.g. hashed during upload).
+    """
+    return f"{sha256 or file_sha256(pdf_path)}:{extractor_version}"
+
+
+class PdfTextCache:
+    """
+    Disk-backed (SQLite) cache of extracted PDF text, shared across processes.
+    Entries are evicted least-recently-used first once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, db_path, max_bytes=256 * 1024 * 1024):
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS pdf_text (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._connect().execute(
+            "CREATE INDEX IF NOT EXISTS idx_pdf_text_last_access ON pdf_text(last_access)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return (text, method) for a cached entry, or None on a miss."""
+        conn = self._connect()
+        row = conn.execute("SELECT text, method FROM pdf_text WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        conn.execute("UPDATE pdf_text SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0], row[1]
+
+    def put(self, key, text, method):
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_text (key, method, text, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, method, text, size, now, now),
+            )
+            self._evict(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_text").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM pdf_text ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM pdf_text WHERE key = ?", victims)
+
+    def clear(self):
+        self._connect().execute("DELETE FROM pdf_text")
+
+    def stats(self):
+        entries, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdf_text"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,101 @@
+import atexit
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from instrumentation import record, span
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_pool(workers=None):
+    """Shared process pool for OCR; created on first use, shut down at exit."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(_pool.shutdown)
+    return _pool
+
+
+def _ocr_page(pdf_path, page_number, dpi, grayscale):
+    # Rasterizes a single page, so a worker only ever holds one page image.
+    # Returns (text, wall seconds, cpu seconds) so the caller can record timings.
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    images = convert_from_path(
+        pdf_path, dpi=dpi, grayscale=grayscale, first_page=page_number, last_page=page_number
+    )
+    try:
+        text = "".join(pytesseract.image_to_string(img) for img in images)
+    finally:
+        for img in images:
+            img.close()
+    return text, time.perf_counter() - started, time.process_time() - cpu_started
+
+
+def text_layer_pages(pdf_path):
+    """Per-page text from PyMuPDF, or None if PyMuPDF cannot read the file."""
+    try:
+        import fitz  # PyMuPDF
+        with span("pdf.text_layer") as attrs, fitz.open(pdf_path) as doc:
+            pages = [page.get_text() for page in doc]
+            attrs["pages"] = len(pages)
+            return pages
+    except Exception as e:
+        print(f"⚠️ PyMuPDF failed: {e}")
+        return None
+
+
+def page_count(pdf_path):
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def ocr_pages(pdf_path, page_numbers, dpi=200, grayscale=True, workers=None):
+    """OCR the given 1-based page numbers, in order, across the OCR pool."""
+    if workers == 1 or len(page_numbers) <= 1:
+        results = [_ocr_page(pdf_path, n, dpi, grayscale) for n in page_numbers]
+    else:
+        pool = get_ocr_pool(workers)
+        results = list(pool.map(_ocr_page, repeat(pdf_path), page_numbers, repeat(dpi), repeat(grayscale)))
+    texts = []
+    for n, (text, wall, cpu) in zip(page_numbers, results):
+        record("ocr.page", wall, cpu, page=n, dpi=dpi)
+        texts.append(text)
+    return texts
+
+
+def extract_pdf_text(pdf_path, dpi=200, grayscale=True, max_ocr_pages=10, workers=None):
+    """
+    Text layer first, OCR only for pages that have none. Returns (text, method)
+    where method is "pymupdf", "ocr", "mixed", "partial" (OCR errored on some
+    pages) or "failed".
+    """
+    pages = text_layer_pages(pdf_path)
+    if pages is None:
+        try:
+            pages = [""] * page_count(pdf_path)
+        except Exception as e:
+            print(f"❌ OCR failed: {e}")
+            return "", "failed"
+
+    missing = [n for n, text in enumerate(pages, start=1) if not text.strip()]
+    if not missing:
+        return "".join(pages), "pymupdf"
+
+    skipped = missing[max_ocr_pages:]
+    if skipped:
+        print(f"⚠️ OCR page limit reached: skipping {len(skipped)} of {len(missing)} image pages.")
+    try:
+        for n, text in zip(missing, ocr_pages(pdf_path, missing[:max_ocr_pages], dpi, grayscale, workers)):
+            pages[n - 1] = text
+    except Exception as e:
+        print(f"❌ OCR failed: {e}")
+        return ("", "failed") if len(missing) == len(pages) else ("".join(pages), "partial")
+
+    return "".join(pages), ("ocr" if len(missing) == len(pages) else "mixed")
@@ -0,0 +1,44 @@
+import sqlite3
+from typing import List
+
+from pydantic import BaseModel, Field
+from langgraph.graph import StateGraph
+
+# Kept out of gen_ai_project so that importing the backend does not load
+# pydantic and langgraph; the graph is built on first use.
+
+
+# === LangGraph State ===
+# Only the application being processed travels through the graph, so state
+# size does not grow with the number of applicants. `criteria` is a read-only
+# snapshot taken when the run starts. Every field is checkpointed after each
+# node, so the state holds plain data only; nodes reach the store themselves.
+class ProcessAppState(BaseModel):
+    app: dict
+    criteria: dict = Field(default_factory=dict)
+    current_run_log: List[str] = Field(default_factory=list)
+
+
+# === Build the LangGraph ===
+def sqlite_checkpointer(path):
+    """
+    Checkpointer that saves the state after every node to a local SQLite file,
+    so an interrupted run continues at the node that did not finish.
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return SqliteSaver(conn)
+
+def build_process_app_graph(steps, checkpointer=None):
+    """Compile a linear graph from (node name, node function) pairs, in order."""
+    workflow = StateGraph(ProcessAppState)
+    for name, node in steps:
+        workflow.add_node(name, node)
+    names = [name for name, _ in steps]
+    workflow.set_entry_point(names[0])
+    for source, target in zip(names, names[1:]):
+        workflow.add_edge(source, target)
+    workflow.set_finish_point(names[-1])
+    return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Same reason validation_node records.
+INVALID_REASON = "Marks or WBJEE rank did not meet criteria"
+
+REVALIDATION_FIELDS = {
+    "app_id": "$.app_id",
+    "marks10": "$.marks.class10_pcm_perc",
+    "marks12": "$.marks.class12_pcm_perc",
+    "rank": "$.wbjee_rank",
+    "income": "$.family_income_lpa",
+    "loan_status": "$.loan_status",
+    "status": "$.validation_status",
+}
+
+
+def _column(df, name):
+    # Missing values become NaN, and every comparison against NaN is False.
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+def evaluate(df, criteria):
+    """Vectorized validation_node: boolean "valid" array for a frame of applications."""
+    return (
+        (_column(df, "marks10") >= criteria.get("min_class10_pcm_perc", 60))
+        & (_column(df, "marks12") >= criteria.get("min_class12_pcm_perc", 60))
+        & (_column(df, "rank") <= criteria.get("max_wbjee_rank", 10000))
+    )
+
+def revalidate_applications(store, criteria=None, dry_run=False):
+    """
+    Re-apply the eligibility criteria to every already-validated application in
+    one vectorized pass, writing back only rows whose status changed. Approved
+    loans that became invalid or whose income is now above
+    max_income_for_loan_lpa are only reported; loans are re-decided by the
+    allocator (gen_ai_project.reallocate_loans). Returns a diff report.
+    """
+    started = time.perf_counter()
+    criteria = criteria if criteria is not None else store.get_setting("eligibility_criteria")
+    rows = store.fetch_columns(REVALIDATION_FIELDS)
+    df = pd.DataFrame.from_records(rows, columns=["seq", "row_version"] + list(REVALIDATION_FIELDS))
+    df = df[df["status"].isin(["Valid", "Invalid"])]
+
+    valid = evaluate(df, criteria)
+    new_status = np.where(valid, "Valid", "Invalid")
+    changed = df["status"].to_numpy() != new_status
+    changed_ids = df["app_id"].to_numpy()[changed]
+    changed_status = new_status[changed]
+
+    approved = df["loan_status"].to_numpy() == "Approved"
+    now_invalid = changed & approved & (new_status == "Invalid")
+
+    income = _column(df, "income")
+    over_income = approved & ~now_invalid & (
+        income > criteria.get("max_income_for_loan_lpa", 5.0)
+    )
+
+    if not dry_run and len(changed_ids):
+        updates = {
+            app_id: {
+                "validation_status": status,
+                "validation_reason": None if status == "Valid" else INVALID_REASON,
+            }
+            for app_id, status in zip(changed_ids.tolist(), changed_status.tolist())
+        }
+        store.patch_applications(updates)
+
+    return {
+        "checked": int(len(df)),
+        "changed": int(changed.sum()),
+        "newly_valid": changed_ids[changed_status == "Valid"].tolist(),
+        "newly_invalid": changed_ids[changed_status == "Invalid"].tolist(),
+        "approved_loans_now_invalid": df["app_id"].to_numpy()[now_invalid].tolist(),
+        "approved_loans_over_income": df["app_id"].to_numpy()[over_income].tolist(),
+        "dry_run": dry_run,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from gen_ai_project import get_store, reallocate_loans
+
+    parser = argparse.ArgumentParser(description="Re-validate all applications against the current criteria.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without writing it")
+    args = parser.parse_args()
+    report = revalidate_applications(get_store(), dry_run=args.dry_run)
+    if not args.dry_run:
+        plan = reallocate_loans()
+        report.update(loans_approved=plan["approved"], loan_decisions_changed=plan["changed"])
+    print(json.dumps(report, indent=2))
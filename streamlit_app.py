@@ -3,10 +3,19 @@ from pathlib import Path
 import uuid
 import os
 import re
-from iem_gen_ai_project import run_single_application_graph, handle_director_query, load_data, parse_criteria_pdf
+import time
+from iem_gen_ai_project import submit_application, application_status, handle_director_query, parse_criteria_pdf
+from iem_gen_ai_project import store_upload, UploadRejected, criteria_uploaded
 
 UPLOAD_DIR = Path("uploaded_files")
 UPLOAD_DIR.mkdir(exist_ok=True)
+STATUS_POLL_SECONDS = 1.5
+STAGE_LABELS = {
+    "extract_data": "Reading your documents",
+    "validate_application": "Checking eligibility",
+    "communicate_status": "Sending your status email",
+    "check_loan_request": "Reviewing your loan request",
+}
 
 # === Session Reset ===
 def reset_chat():
@@ -40,21 +49,23 @@ if 'criteria_uploaded' not in st.session_state:
     st.session_state.criteria_uploaded = False
 
 # === Admission Criteria Upload ===
-if 'criteria_uploaded' not in st.session_state:
-    st.session_state.criteria_uploaded = False
+# Criteria parsed in any earlier session are shared through the store.
+if not st.session_state.criteria_uploaded and criteria_uploaded():
+    st.session_state.criteria_uploaded = True
 
 if not st.session_state.criteria_uploaded:
     st.title("📄 Upload Admission Criteria")
     criteria_file = st.file_uploader("Please upload the admission criteria PDF", type='pdf')
 
     if criteria_file:
-        criteria_path = Path("uploaded_files") / "admission_criteria.pdf"
-        with open(criteria_path, "wb") as f:
-            f.write(criteria_file.getbuffer())
+        criteria_file.seek(0)
+        try:
+            saved = store_upload(criteria_file, "admission", "criteria", prefetch=False)
+        except UploadRejected as e:
+            st.warning(f"❌ {e}")
+            st.stop()
 
-        # Import + parse logic
-        from iem_gen_ai_project import parse_criteria_pdf
-        parse_criteria_pdf(criteria_path)
+        parse_criteria_pdf(saved["path"], saved["sha256"])
 
         st.session_state.criteria_uploaded = True
         st.success("✅ Admission criteria uploaded and extracted successfully.")
@@ -123,22 +134,32 @@ if st.session_state.step == 'get_email':
 if st.session_state.step == 'upload_marksheet':
     marksheet = st.file_uploader("Upload your Marksheet (PDF only):", type='pdf')
     if marksheet:
-        filename = f"{st.session_state.student_data['app_id']}_marksheet.pdf"
-        path = UPLOAD_DIR / filename
-        with open(path, "wb") as f:
-            f.write(marksheet.getbuffer())
-        st.session_state.student_data["marksheet_pdf_path"] = str(path)
+        # Streamed and hashed in chunks; text extraction starts in the
+        # background while the remaining form steps are filled in.
+        marksheet.seek(0)
+        try:
+            saved = store_upload(marksheet, st.session_state.student_data['app_id'], "marksheet")
+        except UploadRejected as e:
+            st.warning(f"❌ {e}")
+            st.stop()
+        st.session_state.student_data["marksheet_pdf_path"] = saved["path"]
+        st.session_state.student_data["marksheet_sha256"] = saved["sha256"]
         st.session_state.step = 'upload_aadhaar_pdf'
         st.rerun()
 
 if st.session_state.step == 'upload_aadhaar_pdf':
     aadhaar = st.file_uploader("Upload your Aadhaar Card (PDF only):", type='pdf')
     if aadhaar:
-        filename = f"{st.session_state.student_data['app_id']}_aadhaar.pdf"
-        path = UPLOAD_DIR / filename
-        with open(path, "wb") as f:
-            f.write(aadhaar.getbuffer())
-        st.session_state.student_data["aadhaar_pdf_path"] = str(path)
+        # Streamed and hashed in chunks; text extraction starts in the
+        # background while the remaining form steps are filled in.
+        aadhaar.seek(0)
+        try:
+            saved = store_upload(aadhaar, st.session_state.student_data['app_id'], "aadhaar")
+        except UploadRejected as e:
+            st.warning(f"❌ {e}")
+            st.stop()
+        st.session_state.student_data["aadhaar_pdf_path"] = saved["path"]
+        st.session_state.student_data["aadhaar_sha256"] = saved["sha256"]
         st.session_state.step = 'enter_aadhaar_number'
         st.rerun()
         
@@ -170,22 +191,46 @@ if st.session_state.step == 'ask_loan':
         
 if st.session_state.step == 'confirm_submission':
     if st.button("📨 Submit Application"):
-        run_single_application_graph(st.session_state.student_data)
-        st.success("✅ Your application has been submitted or rejected based on criteria.")
-        st.session_state.step = 'another_application'
+        submit_application(st.session_state.student_data)
+        st.session_state.step = 'processing'
         st.rerun()
 
 if st.session_state.step == 'ask_income':
     income = st.text_input("Enter your family income (in LPA):")
     if income:
         st.session_state.student_data["family_income_lpa"] = float(income)
-        run_single_application_graph(st.session_state.student_data)
-        if float(income) <= 5.0:
+        submit_application(st.session_state.student_data)
+        st.session_state.step = 'processing'
+        st.rerun()
+
+# === Submission Progress ===
+# Processing runs in background workers; this step polls the job status.
+if st.session_state.step == 'processing':
+    status = application_status(st.session_state.student_data["app_id"])
+    if status is None or status["status"] in ("queued", "running"):
+        if status and status["status"] == "queued":
+            st.info(f"⏳ Your application is in the queue (position {status['queue_position']}).")
+        else:
+            stage = STAGE_LABELS.get((status or {}).get("stage"), "Processing")
+            st.info(f"⏳ {stage}...")
+        time.sleep(STATUS_POLL_SECONDS)
+        st.rerun()
+    elif status["status"] == "failed":
+        st.error("❌ We could not process your application. The admissions team has been notified.")
+        st.session_state.step = 'another_application'
+    elif status.get("duplicate_of"):
+        st.warning(f"♻️ We already have this application (reference {status['duplicate_of']}), "
+                   "so it was not processed again.")
+        st.session_state.step = 'another_application'
+    else:
+        if not st.session_state.student_data.get("loan_requested"):
+            st.success("✅ Your application has been submitted or rejected based on criteria.")
+        elif status.get("loan_status") == "Approved":
             st.success("✅ Application submitted. Please email your ITR & income certificate to loan cell.")
         else:
-            st.success("✅ Application submitted. (Loan not approved due to income.)")
+            reason = status.get("loan_rejection_reason") or "not approved"
+            st.success(f"✅ Application submitted. (Loan not approved: {reason}.)")
         st.session_state.step = 'another_application'
-        st.rerun()
 
 if st.session_state.step == 'another_application':
     st.markdown("### 📝 Do you want to submit another application?")
@@ -202,31 +247,82 @@ if st.session_state.step == 'another_application':
 
 
 # === Admin Dashboard ===
+@st.cache_resource
+def get_dashboard_model():
+    # One model per server process; it refreshes itself when the store changes.
+    from dashboard_model import DashboardModel
+    from iem_gen_ai_project import get_store, get_application_table
+    return DashboardModel(get_store(), table=get_application_table())
+
 if st.session_state.step == 'admin_dashboard':
     st.header("📊 Admin Dashboard")
-    data = load_data()
-    st.metric("Total Applications", len(data['applications']))
-    approved = [app for app in data['applications'] if app.get('loan_status') == "Approved"]
-    st.metric("Loans Approved", len(approved))
-
-    from pandas import DataFrame
-    display_data = []
-    for app in data['applications']:
-        display_data.append({
-            "App ID": app.get("app_id"),
-            "Name": app.get("name") or app.get("applicant_name_marksheet"),
-            "Email": app.get("applicant_email"),
-            "10th %": app.get("marks", {}).get("class10_pcm_perc"),
-            "12th %": app.get("marks", {}).get("class12_pcm_perc"),
-            "WBJEE Rank": app.get("wbjee_rank"),
-            "Aadhaar Name": app.get("name") or app.get("applicant_name_marksheet"),
-            "Aadhaar Number": str(app.get("aadhaar_number")) if app.get("aadhaar_number") else "",
-            "Validation": app.get("validation_status"),
-            "Loan": app.get("loan_status")
-        })
+    model = get_dashboard_model()
+    metrics = model.metrics()
+    st.metric("Total Applications", metrics["total"])
+    st.metric("Loans Approved", metrics["loans_approved"])
+
+    with st.expander("📄 Admission Criteria"):
+        from iem_gen_ai_project import current_criteria
+        criteria = current_criteria()
+        st.caption(f"Version {criteria.version}")
+        st.json(criteria.as_dict())
+        new_criteria = st.file_uploader("Replace admission criteria PDF", type='pdf', key="replace_criteria")
+        if new_criteria and st.button("Apply criteria"):
+            try:
+                saved = store_upload(new_criteria, "admission", "criteria", prefetch=False)
+            except UploadRejected as e:
+                st.warning(f"❌ {e}")
+            else:
+                report = parse_criteria_pdf(saved["path"], saved["sha256"])
+                st.success(f"✅ Criteria v{report['criteria_version']} applied; {report['changed']} applications changed.")
+
+    with st.expander("🧾 Fee Slips & Decision Letters"):
+        from iem_gen_ai_project import generate_bulk_documents
+        kind = st.selectbox("Document", ["fee_slip", "decision_letter"])
+        doc_status = st.selectbox("Applicants", ["Valid", "Invalid"])
+        merged = st.checkbox("One merged PDF")
+        if st.button("Generate"):
+            manifest = generate_bulk_documents(kind, validation_status=doc_status, merged=merged)
+            if manifest["count"]:
+                st.success(f"✅ {manifest['count']} documents written to {manifest['directory']}.")
+            else:
+                st.info("No applications need this document.")
+
+    st.subheader("📈 Analytics")
+    charts = model.charts()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.caption("Validation funnel")
+        st.bar_chart(charts["funnel"])
+    with col2:
+        st.caption("Loan approval rate by income (LPA)")
+        st.bar_chart(charts["loan_approval_by_income"])
+    with col3:
+        st.caption("WBJEE rank distribution")
+        st.bar_chart(charts["rank_histogram"])
 
     st.subheader("📋 Application Summary")
-    st.dataframe(DataFrame(display_data))
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        validation = st.selectbox("Validation", ["All"] + model.status_options("validation"))
+    with col2:
+        loan = st.selectbox("Loan", ["All"] + model.status_options("loan"))
+    with col3:
+        sort_by = st.selectbox("Sort by", ["WBJEE Rank", "12th %", "10th %", "Name"])
+    page_size = 50
+    page, total = model.page(
+        page=st.session_state.get("dashboard_page", 1),
+        page_size=page_size,
+        validation=None if validation == "All" else validation,
+        loan=None if loan == "All" else loan,
+        sort_by=sort_by,
+        ascending=sort_by in ("WBJEE Rank", "Name"),
+    )
+    page_count = max(1, -(-total // page_size))
+    if st.session_state.get("dashboard_page", 1) > page_count:
+        st.session_state.dashboard_page = page_count
+    st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="dashboard_page")
+    st.dataframe(page)
 
 # === Debug Info ===
 with st.expander("🛠 Debug: Show Collected Student Data"):
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from admission_store import AdmissionStore  # noqa: E402
+
+DEFAULTS = {
+    "eligibility_criteria": {},
+    "university_capacity": 100,
+    "loan_budget": 10000,
+    "fee_amount": 1000,
+    "criteria_file_path": None,
+    "criteria_version": 0,
+    "criteria_sha256": None,
+    "applications": [],
+    "director_log": [],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AdmissionStore(tmp_path / "admission.db", DEFAULTS)
+    store.update_settings(**{k: v for k, v in DEFAULTS.items() if k not in ("applications", "director_log")})
+    yield store
+    store.close()
+
+
+def make_app(app_id, **fields):
+    app = {
+        "app_id": app_id,
+        "name": f"Student {app_id}",
+        "applicant_email": f"{app_id}@example.com",
+        "validation_status": "Pending",
+        "loan_status": "Not Requested",
+        "communication_status": "Pending",
+    }
+    app.update(fields)
+    return app
@@ -0,0 +1,14 @@
+from admission_store import AdmissionStore
+from conftest import DEFAULTS, make_app
+
+
+def test_save_all_round_trips_every_setting(store, tmp_path):
+    store.update_settings(criteria_version=3, criteria_sha256="abc", loan_budget=500)
+    store.upsert_application(make_app("a1"))
+    store.append_director_log("first")
+
+    copy = AdmissionStore(tmp_path / "copy.db", DEFAULTS)
+    copy.save_all(store.load_all())
+    assert copy.load_all() == store.load_all()
+    assert copy.get_setting("criteria_sha256") == "abc"
+    copy.close()
@@ -0,0 +1,76 @@
+import pytest
+
+from conftest import make_app
+
+pytest.importorskip("pandas")
+
+from analytics import ApplicationTable, export_columnar, read_export  # noqa: E402
+
+
+def scored_app(app_id, rank, income, loan_status="Not Requested", **fields):
+    return make_app(app_id, wbjee_rank=rank, family_income_lpa=income, loan_status=loan_status,
+                    loan_requested=loan_status in ("Approved", "Rejected"),
+                    marks={"class10_pcm_perc": 80, "class12_pcm_perc": 80}, **fields)
+
+
+@pytest.fixture
+def apps(store):
+    store.upsert_applications([
+        scored_app("a1", 500, 2.0, "Approved", validation_status="Valid", extraction_status="Extracted",
+                   communication_status="Email Sent"),
+        scored_app("a2", 3000, 3.0, "Rejected", validation_status="Valid", extraction_status="Extracted"),
+        scored_app("a3", 12000, 9.0, validation_status="Invalid", extraction_status="Partial"),
+        scored_app("a4", None, None),
+    ])
+    return store
+
+
+def test_aggregates(apps):
+    aggregates = ApplicationTable(apps).aggregates()
+
+    assert aggregates["funnel"] == {"submitted": 4, "extracted": 3, "valid": 2, "loan_requested": 2,
+                                    "loan_approved": 1, "email_sent": 1}
+    bands = aggregates["loan_approval_by_income_lpa"]
+    assert bands["<2.5"] == {"requests": 1, "approved": 1, "approval_rate": 1.0}
+    assert bands["2.5-5"] == {"requests": 1, "approved": 0, "approval_rate": 0.0}
+    assert bands["8+"] == {"requests": 0, "approved": 0, "approval_rate": None}
+    assert aggregates["rank_histogram"]["1-1000"] == 1
+    assert aggregates["rank_histogram"]["2501-5000"] == 1
+    assert aggregates["rank_histogram"]["10001-20000"] == 1
+    assert sum(aggregates["rank_histogram"].values()) == 3  # a4 has no rank
+
+
+def test_table_refreshes_only_changed_rows(apps):
+    table = ApplicationTable(apps)
+    assert table.aggregates()["funnel"]["loan_approved"] == 1
+
+    apps.update_application_fields("a2", loan_status="Approved")
+    apps.upsert_application(scored_app("a5", 800, 1.0, validation_status="Valid"))
+
+    df = table.frame()
+    assert list(df.index) == ["a1", "a2", "a3", "a4", "a5"]
+    assert table.aggregates()["funnel"]["loan_approved"] == 2
+    assert table.aggregates()["funnel"]["valid"] == 3
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_writes_incremental_parts(apps, tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    directory = str(tmp_path / "export")
+
+    first = export_columnar(apps, directory, fmt=fmt)
+    assert (first["since"], first["rows"]) == (0, 4)
+    assert export_columnar(apps, directory, fmt=fmt) is None  # nothing changed
+
+    apps.update_application_fields("a3", validation_status="Valid")
+    second = export_columnar(apps, directory, fmt=fmt)
+    assert (second["since"], second["rows"]) == (first["until"], 1)
+
+    df = read_export(directory)
+    assert sorted(df.index) == ["a1", "a2", "a3", "a4"]
+    assert df.loc["a3", "validation"] == "Valid"
+
+    full = export_columnar(apps, directory, fmt=fmt, full=True)
+    assert full["rows"] == 4
+    assert sorted(p.name for p in (tmp_path / "export").iterdir()) == ["manifest.json", full["file"]]
+    assert read_export(directory).loc["a3", "validation"] == "Valid"
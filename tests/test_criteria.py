@@ -0,0 +1,59 @@
+import pytest
+
+from criteria import parse_criteria_text
+
+# (lines of a criteria document, expected parse)
+CRITERIA_CORPUS = [
+    (["Admission Criteria 2025",
+      "Minimum 10th PCM marks: 60%",
+      "Minimum 12th PCM marks: 65%",
+      "WBJEE rank must be within 10000",
+      "Loans are available for family income up to 5 LPA"],
+     {"min_class10_pcm_perc": 60.0, "min_class12_pcm_perc": 65.0, "max_wbjee_rank": 10000,
+      "max_income_for_loan_lpa": 5.0}),
+    (["ELIGIBILITY",
+      "Class 10 PCM percentage of at least 72.5 %",
+      "Class 12 PCM percentage of at least 70%",
+      "WBJEE 2025 Rank: up to 8,500",
+      "Annual family income below 4.5 lakhs per annum for education loans"],
+     {"min_class10_pcm_perc": 72.5, "min_class12_pcm_perc": 70.0, "max_wbjee_rank": 8500,
+      "max_income_for_loan_lpa": 4.5}),
+    (["Candidates need 12th (PCM) 55% and a WBJEE rank below 15000."],
+     {"min_class12_pcm_perc": 55.0, "max_wbjee_rank": 15000}),
+    (["General information about the campus and hostel facilities.",
+      "Contact: admissions@example.edu, phone 033 2400 1234"],
+     {}),
+]
+
+
+@pytest.fixture
+def criteria_pdf(tmp_path):
+    """Writes `lines` as a one-page text PDF with reportlab and returns its path."""
+    canvas_module = pytest.importorskip("reportlab.pdfgen.canvas")
+    from reportlab.lib.pagesizes import A4
+
+    def write(lines, name="criteria.pdf"):
+        path = tmp_path / name
+        c = canvas_module.Canvas(str(path), pagesize=A4)
+        y = A4[1] - 72
+        for line in lines:
+            c.drawString(72, y, line)
+            y -= 20
+        c.save()
+        return path
+    return write
+
+
+@pytest.mark.parametrize("lines, expected", CRITERIA_CORPUS)
+def test_corpus_text(lines, expected):
+    assert parse_criteria_text("\n".join(lines)) == expected
+
+
+@pytest.mark.parametrize("lines, expected", CRITERIA_CORPUS)
+def test_corpus_pdf(criteria_pdf, lines, expected):
+    pytest.importorskip("fitz")
+    from pdf_ocr import extract_pdf_text
+
+    text, method = extract_pdf_text(criteria_pdf(lines))
+    assert method == "pymupdf"
+    assert parse_criteria_text(text) == expected
@@ -0,0 +1,25 @@
+from conftest import make_app
+from dedup import dedup_applications, find_duplicate
+
+
+def test_pending_original_is_not_a_duplicate_target(store):
+    # A first attempt whose job failed stays Pending; the resubmission must be processed.
+    store.upsert_application(make_app("failed-run", aadhaar_number="1234 5678 9012"))
+    resubmission = make_app("retry", aadhaar_number="123456789012")
+    assert find_duplicate(store, resubmission) is None
+
+    store.update_application_fields("failed-run", validation_status="Invalid")
+    assert find_duplicate(store, resubmission)["app_id"] == "failed-run"
+
+
+def test_dedup_applications_only_uses_decided_originals(store):
+    store.upsert_applications([
+        make_app("pending", aadhaar_number="1234 5678 9012"),
+        make_app("valid", aadhaar_number="123456789012", validation_status="Valid"),
+        make_app("later", aadhaar_number="123456789012", validation_status="Valid"),
+    ])
+    report = dedup_applications(store)
+
+    assert report["groups"] == {"valid": ["later"]}
+    assert store.get_application("pending").get("duplicate_of") is None
+    assert store.get_application("later")["duplicate_of"] == "valid"
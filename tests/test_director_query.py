@@ -0,0 +1,107 @@
+import pytest
+
+from conftest import make_app
+from director_query import DirectorQueryEngine, QueryCache, direct_answer
+
+pytest.importorskip("langchain_core")
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[0].content)
+        return StubResponse(f"answer {len(self.prompts)}")
+
+
+@pytest.fixture
+def engine(store):
+    store.upsert_applications(
+        [make_app(f"v{i}", validation_status="Valid") for i in range(3)]
+        + [make_app("x1", validation_status="Invalid"),
+           make_app("l1", validation_status="Valid", loan_status="Approved")]
+    )
+    llm = StubLLM()
+    engine = DirectorQueryEngine(store, lambda: llm, model="stub", cache=QueryCache(), max_records=2)
+    engine.stub = llm
+    return engine
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("How many applications?", "📋 5 applications received."),
+    ("how many applications were received", "📋 5 applications received."),
+    ("How many valid applications?", "✅ 4 applications are valid."),
+    ("How many applications are invalid?", "❌ 1 applications are invalid."),
+    ("How many loans were approved?", "🏦 1 loans approved."),
+    ("How much loan budget is left?", "💰 Loan budget remaining: 10000."),
+])
+def test_templated_questions_are_answered_without_the_llm(engine, question, expected):
+    assert engine.answer(question) == expected
+    assert engine.stub.prompts == []
+
+
+@pytest.mark.parametrize("question", [
+    "How many applications were approved?",
+    "How many female students applied?",
+    "How many students are eligible for a loan?",
+    "How many loans are pending?",
+    "How many valid applications have rank below 5000?",
+])
+def test_other_questions_are_not_answered_directly(engine, question):
+    summary = {"total_applications": 5, "validation_status": {"Pending": 2}, "loan_status": {},
+               "communication_status": {}, "loan_budget_remaining": 0, "university_capacity": 0}
+    assert direct_answer(question, summary) is None
+
+
+def test_llm_prompt_is_bounded_to_max_records(engine):
+    assert engine.answer("Which applicants look strongest?") == "answer 1"
+    (prompt,) = engine.stub.prompts
+    assert "Relevant applications (2 of 5" in prompt
+    assert prompt.count('"id":') == 2
+
+
+def test_cache_hit_and_miss(engine, store):
+    question = "Summarise the valid applications"
+    assert engine.answer(question) == "answer 1"
+    assert engine.answer(question.upper()) == "answer 1"  # normalized key
+    assert engine.cache.stats()["hits"] == 1
+
+    # Any committed write moves data_version, so the cached answer is unreachable.
+    store.upsert_application(make_app("new"))
+    assert engine.answer(question) == "answer 2"
+    assert engine.cache.stats()["misses"] == 2
+    assert len(engine.stub.prompts) == 2
+
+
+@pytest.mark.parametrize("question, prefix", [
+    ("Show the funnel", "📊 Funnel: submitted 5"),
+    ("What is the drop-off by stage?", "📊 Funnel:"),
+    ("Loan approval rate by income band?", "🏦 Loan approvals by income band"),
+    ("What is the rank distribution?", "📈 WBJEE rank distribution"),
+])
+def test_analytics_questions_are_answered_from_the_table(store, engine, question, prefix):
+    pytest.importorskip("pandas")
+    from analytics import ApplicationTable
+
+    engine.analytics = ApplicationTable(store)
+    assert engine.answer(question).startswith(prefix)
+    assert engine.stub.prompts == []
+
+
+@pytest.mark.parametrize("question", [
+    "Why did Riya drop off?",
+    "Which approved applicants have income above 5 LPA?",
+    "Is the rank distribution fair to rural students?",
+])
+def test_open_analytics_questions_go_to_the_llm(store, engine, question):
+    pytest.importorskip("pandas")
+    from analytics import ApplicationTable
+
+    engine.analytics = ApplicationTable(store)
+    assert engine.answer(question) == "answer 1"
@@ -0,0 +1,28 @@
+from conftest import make_app
+from documents import decision_email, decision_outcome, document_fields
+
+
+def loan_app(**fields):
+    return make_app("A1", validation_status="Valid", loan_requested=True, family_income_lpa=4.0, **fields)
+
+
+def test_decided_loans_follow_loan_status():
+    assert decision_outcome(loan_app(loan_status="Approved")) == "loan_approved"
+    assert decision_outcome(loan_app(loan_status="Rejected", loan_rejection_reason="Income too high")) == "loan_ineligible"
+    rejected = loan_app(loan_status="Rejected", loan_rejection_reason="Insufficient budget or capacity")
+    assert decision_outcome(rejected) == "loan_rejected"
+    assert "(Insufficient budget or capacity)" in decision_email(rejected)[1]
+
+
+def test_undecided_loans_use_the_criteria_income_limit():
+    assert decision_outcome(loan_app(loan_status="Pending")) == "loan_documents"
+    assert decision_outcome(loan_app(loan_status="Pending"), max_income=3.5) == "loan_ineligible"
+    assert "above 3.5 LPA" in decision_email(loan_app(loan_status="Pending"), max_income=3.5)[1]
+
+
+def test_letter_paragraph_uses_loan_status():
+    context = {"issued_on": "01 Jan 2026", "max_income": 8.0}
+    fields = document_fields("decision_letter", loan_app(loan_status="Approved"), context)
+    assert fields["paragraph"].startswith("Your education loan has been approved.")
+    fields = document_fields("decision_letter", make_app("A2", validation_status="Invalid"), context)
+    assert "could not be validated" in fields["paragraph"]
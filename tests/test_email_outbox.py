@@ -0,0 +1,121 @@
+import socket
+import time
+
+import pytest
+
+from conftest import make_app
+from email_outbox import EmailOutbox, OutboxSender, SmtpSettings
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+
+class Handler:
+    """Collects delivered messages; rejects the first `fail` deliveries."""
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail:
+            self.fail -= 1
+            return "451 Try again later"
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    def start(fail=0):
+        handler = Handler(fail)
+        port = free_port()
+        controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        started.append(controller)
+        return handler, SmtpSettings("127.0.0.1", port, use_ssl=False, timeout=5)
+    started = []
+    yield start
+    for controller in started:
+        controller.stop()
+
+
+def queue_email(store, outbox, app_id="a1"):
+    store.upsert_application(make_app(app_id, communication_status="Queued"))
+    return outbox.enqueue(app_id, "office@example.com", f"{app_id}@example.com", "Decision", "Hello")
+
+
+def outbox_row(store, message_id):
+    with store.transaction(immediate=False) as conn:
+        return conn.execute(
+            "SELECT status, attempts, next_attempt_at FROM email_outbox WHERE id = ?", (message_id,)
+        ).fetchone()
+
+
+def test_delivers_and_marks_email_sent(store, smtp):
+    handler, settings = smtp()
+    outbox = EmailOutbox(store)
+    message_id = queue_email(store, outbox)
+
+    assert OutboxSender(outbox, settings, rate_per_minute=0).run_once() == 1
+    assert [m.rcpt_tos for m in handler.messages] == [["a1@example.com"]]
+    assert outbox_row(store, message_id)[0] == "sent"
+    assert store.get_application("a1")["communication_status"] == "Email Sent"
+
+
+def test_not_sent_before_the_application_is_queued(store, smtp):
+    handler, settings = smtp()
+    outbox = EmailOutbox(store)
+    store.upsert_application(make_app("a1"))
+    outbox.enqueue("a1", "office@example.com", "a1@example.com", "Decision", "Hello")
+
+    assert OutboxSender(outbox, settings, rate_per_minute=0).run_once() == 0
+    assert handler.messages == []
+
+
+def test_failed_send_is_retried_after_backoff(store, smtp):
+    handler, settings = smtp(fail=1)
+    outbox = EmailOutbox(store)
+    message_id = queue_email(store, outbox)
+    sender = OutboxSender(outbox, settings, rate_per_minute=0, backoff_seconds=60)
+
+    before = time.time()
+    assert sender.run_once() == 0
+    status, attempts, next_attempt_at = outbox_row(store, message_id)
+    assert (status, attempts) == ("queued", 1)
+    assert next_attempt_at >= before + 60
+    assert sender.run_once() == 0  # not due yet
+
+    with store.transaction() as conn:
+        conn.execute("UPDATE email_outbox SET next_attempt_at = 0 WHERE id = ?", (message_id,))
+    assert sender.run_once() == 1
+    assert len(handler.messages) == 1
+    assert store.get_application("a1")["communication_status"] == "Email Sent"
+
+
+def test_gives_up_after_max_attempts(store, smtp):
+    handler, settings = smtp(fail=10)
+    outbox = EmailOutbox(store)
+    message_id = queue_email(store, outbox)
+    sender = OutboxSender(outbox, settings, rate_per_minute=0, max_attempts=2, backoff_seconds=0)
+
+    assert sender.run_once() == 0
+    assert outbox_row(store, message_id)[:2] == ("queued", 1)
+    assert sender.run_once() == 0
+    assert outbox_row(store, message_id)[:2] == ("failed", 2)
+    assert store.get_application("a1")["communication_status"] == "Failed to send"
+    assert handler.messages == []
+
+
+def test_outbox_bookkeeping_does_not_move_data_version(store):
+    outbox = EmailOutbox(store)
+    store.upsert_application(make_app("a1", communication_status="Queued"))
+    version = store.data_version()
+    outbox.enqueue("a1", "office@example.com", "a1@example.com", "Decision", "Hello")
+    assert len(outbox.claim()) == 1
+    assert store.data_version() == version
@@ -0,0 +1,78 @@
+import pytest
+
+from field_extraction import ACCEPTED_SLOWDOWN, _legacy_marksheet, aadhaar_scanner, benchmark, marksheet_scanner
+
+# (document type, text, expected values)
+EXTRACTION_CORPUS = [
+    ("marksheet",
+     "WEST BENGAL BOARD\nName: Anjali\nClass 10 PCM Percentage: 88.33\n"
+     "Class 12 PCM Percentage: 82.0\nWBJEE Rank: 2150\n",
+     {"applicant_name": "Anjali", "class10_pcm_perc": 88.33, "class12_pcm_perc": 82.0, "wbjee_rank": 2150}),
+    ("marksheet",
+     "Father's Name: Rakesh Kumar Sen\nStudent Name: Riya Sen\nClass 10 PCM Percentage: 91 %\n"
+     "Class 12 PCM Percentage: 79.5%\nWBJEE Rank: 10432",
+     {"applicant_name": "Riya Sen", "class10_pcm_perc": 91.0, "class12_pcm_perc": 79.5, "wbjee_rank": 10432}),
+    ("marksheet",
+     "NAME - Arjun Das Gupta\n10th PCM Marks: 67.25\n12th PCM Marks: 71\nWBJEE rank: 845",
+     {"applicant_name": "Arjun Das Gupta", "class10_pcm_perc": 67.25, "class12_pcm_perc": 71.0, "wbjee_rank": 845}),
+    ("marksheet",
+     "Name: Riya Sen Roll No: 1234\nCandidate Name: Riya Sen  Class XII\nClass 12 PCM Percentage: 85\n",
+     {"applicant_name": "Riya Sen", "class10_pcm_perc": None, "class12_pcm_perc": 85.0, "wbjee_rank": None}),
+    ("marksheet",
+     "Name: Priya\nClass 12 PCM Percentage: 140\n",
+     {"applicant_name": "Priya", "class10_pcm_perc": None, "class12_pcm_perc": None, "wbjee_rank": None}),
+    ("aadhaar",
+     "Government of India\nAnjali Sharma\nDOB: 12/04/2006\nFemale\n2268 1622 3671\n",
+     {"aadhaar_name": "Anjali Sharma", "aadhaar_number": "2268 1622 3671"}),
+    ("aadhaar",
+     "Government of India\r\nAnjali Sharma\r\n\r\nDOB: 12/04/2006\r\n2268 1622 3671\r\n",
+     {"aadhaar_name": "Anjali Sharma", "aadhaar_number": "2268 1622 3671"}),
+    ("aadhaar",
+     "Unique Identification Authority of India\nName: Sourav Ganguly\nYear of Birth: 2005\n226816223671",
+     {"aadhaar_name": "Sourav Ganguly", "aadhaar_number": "226816223671"}),
+]
+
+SCANNERS = {"marksheet": marksheet_scanner, "aadhaar": aadhaar_scanner}
+
+
+@pytest.mark.parametrize("doc_type, text, expected", EXTRACTION_CORPUS)
+def test_corpus(doc_type, text, expected):
+    values, _ = SCANNERS[doc_type].scan(text)
+    assert values == expected
+
+
+@pytest.mark.parametrize("line, name", [
+    ("Name: Riya Sen Roll No: 1234", "Riya Sen"),
+    ("Name: Riya Sen Date of Birth: 01/02/2006", "Riya Sen"),
+    ("Name: Riya Sen  Roll 1234", "Riya Sen"),
+    ("Name: Riya Sen\tRoll 1234", "Riya Sen"),
+    ("Student Name: Mary-Jane O'Neil", "Mary-Jane O'Neil"),
+    ("Name: Arjun Das Gupta", "Arjun Das Gupta"),
+])
+def test_name_stops_at_the_next_label(line, name):
+    assert marksheet_scanner.scan(line)[0]["applicant_name"] == name
+
+
+def test_patterns_do_not_match_across_lines():
+    values, confidence = marksheet_scanner.scan("Class 10\nPCM Percentage: 88\n")
+    assert values["class10_pcm_perc"] is None and confidence["class10_pcm_perc"] == 0.0
+
+
+def test_scanner_is_more_accurate_than_legacy_searches():
+    fields = ("applicant_name", "class10_pcm_perc", "class12_pcm_perc", "wbjee_rank")
+    converters = (str, float, float, int)
+    legacy = scanner = total = 0
+    for doc_type, text, expected in EXTRACTION_CORPUS:
+        if doc_type != "marksheet":
+            continue
+        values, _ = marksheet_scanner.scan(text)
+        for field, convert, match in zip(fields, converters, _legacy_marksheet(text)):
+            total += 1
+            legacy += (convert(match.group(1)) if match else None) == expected[field]
+            scanner += values[field] == expected[field]
+    assert scanner == total
+    assert legacy < total
+
+
+def test_scanner_stays_within_its_accepted_slowdown():
+    assert benchmark(repeat=200)["slowdown"] <= ACCEPTED_SLOWDOWN
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("langgraph.checkpoint.sqlite")
+
+import gen_ai_project as backend  # noqa: E402
+
+
+@pytest.fixture
+def graph_backend(store, tmp_path, monkeypatch):
+    # The backend's singletons, pointed at the test store and a temp checkpoint file.
+    for name in ("_journal", "_outbox", "_email_sender", "_criteria_registry", "_loan_allocator",
+                 "_process_app_graph", "_graph_checkpointer"):
+        monkeypatch.setattr(backend, name, None)
+    monkeypatch.setattr(backend, "_store", store)
+    monkeypatch.setattr(backend, "GRAPH_CHECKPOINT_DB", str(tmp_path / "graph_checkpoints.sqlite3"))
+    monkeypatch.setattr(backend, "START_EMAIL_SENDER", False)
+    monkeypatch.setattr(backend, "DUPLICATE_POLICY", None)
+
+    def extract(state):  # stands in for PDF extraction
+        state.app.update(marks={"class10_pcm_perc": 90, "class12_pcm_perc": 85}, wbjee_rank=120,
+                         applicant_name_marksheet="Riya Sen")
+        return state
+    monkeypatch.setattr(backend, "data_extraction_node", extract)
+    yield backend
+    if backend._graph_checkpointer is not None:
+        backend._graph_checkpointer.conn.close()
+
+
+def test_interrupted_run_resumes_at_loan_without_a_second_email(graph_backend, store, monkeypatch):
+    store.update_settings(loan_budget=5000, eligibility_criteria={"max_income_for_loan_lpa": 5.0})
+    decide = graph_backend.loan_processing_node
+    calls = []
+
+    def crash_once(state):
+        calls.append(state.app["app_id"])
+        if len(calls) == 1:
+            raise RuntimeError("worker killed")
+        return decide(state)
+    monkeypatch.setattr(graph_backend, "loan_processing_node", crash_once)
+
+    student = {"app_id": "A1", "email": "riya@example.com", "loan_requested": True, "family_income_lpa": 3.0}
+    graph_backend.run_single_application_graph(student)
+    assert graph_backend.graph_checkpoint("A1")[0] == ("check_loan_request",)
+    assert graph_backend.get_outbox().counts() == {"queued": 1}
+
+    app = graph_backend.run_single_application_graph(student)
+    assert len(calls) == 2
+    assert (app["validation_status"], app["loan_status"]) == ("Valid", "Approved")
+    assert graph_backend.get_outbox().counts() == {"queued": 1}
+    assert store.get_application("A1")["loan_status"] == "Approved"
+    assert store.get_setting("loan_budget") == 0
+    assert graph_backend.graph_checkpoint("A1") is None
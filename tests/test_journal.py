@@ -0,0 +1,38 @@
+import json
+
+from conftest import DEFAULTS, make_app
+from journal import Journal, list_segments, read_events, recover
+
+
+def test_crash_before_delete_does_not_duplicate_events(store, tmp_path):
+    journal_dir = tmp_path / "journal"
+    journal = Journal(store, journal_dir, fsync=False)
+    store.upsert_application(make_app("a1"))
+    store.append_director_log("first entry")
+    shipped = list(read_events(list_segments(str(journal_dir))))
+
+    # Crash after the segment was written but before the shipped rows were
+    # deleted: the rows are still in the journal table at restart.
+    with store.transaction(bump_version=False) as conn:
+        conn.executemany(
+            "INSERT INTO journal (seq, created_at, event) VALUES (?, ?, ?)",
+            [(e["seq"], e["ts"], json.dumps({k: v for k, v in e.items() if k not in ("seq", "ts")}))
+             for e in shipped],
+        )
+    journal = Journal(store, journal_dir, fsync=False)
+    store.append_director_log("second entry")
+
+    events = list(read_events(list_segments(str(journal_dir))))
+    assert [e["seq"] for e in events] == sorted({e["seq"] for e in events})
+    recovered, _ = recover(str(journal_dir), str(tmp_path / "recovered.db"), DEFAULTS)
+    assert recovered.director_log() == ["first entry", "second entry"]
+    recovered.close()
+
+
+def test_read_events_skips_duplicated_lines(tmp_path):
+    segment = tmp_path / "journal-000000000001.jsonl"
+    lines = [{"seq": 1, "type": "log", "entry": "a"}, {"seq": 2, "type": "log", "entry": "b"}]
+    segment.write_text("".join(json.dumps(e) + "\n" for e in lines + lines + [{"seq": 3, "type": "log", "entry": "c"}]))
+
+    assert [e["seq"] for e in read_events([str(segment)])] == [1, 2, 3]
+    assert [e["seq"] for e in read_events([str(segment)], after_seq=1)] == [2, 3]
@@ -0,0 +1,90 @@
+import pytest
+
+from conftest import make_app
+
+pytest.importorskip("pandas")
+
+from loan_allocator import LoanAllocator  # noqa: E402
+
+
+def loan_app(app_id, validation_status, rank, income=3.0, loan_status="Not Applicable"):
+    return make_app(app_id, validation_status=validation_status, wbjee_rank=rank, family_income_lpa=income,
+                    loan_requested=True, loan_status=loan_status)
+
+
+def test_pending_and_duplicate_requests_are_left_alone(store):
+    store.update_settings(loan_budget=10000, eligibility_criteria={"max_income_for_loan_lpa": 5.0})
+    store.upsert_applications([
+        loan_app("pending", "Pending", rank=1),
+        loan_app("dup", "Duplicate", rank=2, loan_status="Approved"),
+        loan_app("valid", "Valid", rank=500),
+        loan_app("rich", "Valid", rank=10, income=9.0),
+        loan_app("invalid", "Invalid", rank=20),
+    ])
+
+    plan = LoanAllocator(store, 5000).apply()
+
+    assert set(plan["decisions"]) == {"valid", "rich", "invalid"}
+    assert plan["pool"] == 10000  # the duplicate's approval is not pooled
+    status = {app_id: store.get_application(app_id)["loan_status"] for app_id in ("pending", "dup", "valid", "rich", "invalid")}
+    assert status == {"pending": "Not Applicable", "dup": "Approved", "valid": "Approved",
+                      "rich": "Rejected", "invalid": "Rejected"}
+    assert store.get_setting("loan_budget") == 5000
+
+
+def test_decide_settles_only_the_in_flight_request(store):
+    store.update_settings(loan_budget=5000, eligibility_criteria={"max_income_for_loan_lpa": 5.0})
+    store.upsert_applications([
+        loan_app("early", "Valid", rank=900, loan_status="Approved"),
+        loan_app("late", "Pending", rank=100),  # saved at submission, still being processed
+    ])
+    allocator = LoanAllocator(store, 5000)
+
+    # A better rank does not take the loan away from an earlier approval.
+    assert allocator.decide(loan_app("late", "Valid", rank=100)) == ("Approved", None)
+    assert store.get_application("late")["loan_status"] == "Approved"
+    assert store.get_application("early")["loan_status"] == "Approved"
+    assert store.get_setting("loan_budget") == 0
+
+    # Re-deciding (e.g. a resumed graph run) does not spend the budget twice.
+    assert allocator.decide(loan_app("late", "Valid", rank=100)) == ("Approved", None)
+    assert store.get_setting("loan_budget") == 0
+
+    store.upsert_applications([loan_app("next", "Pending", rank=1)])
+    assert allocator.decide(loan_app("next", "Valid", rank=1)) == ("Rejected", "Insufficient budget or capacity")
+    assert allocator.decide(loan_app("rich", "Valid", rank=1, income=9.0)) == ("Rejected", "Income too high")
+
+
+def test_decide_respects_capacity_and_releases_a_lost_approval(store):
+    store.update_settings(loan_budget=10000, university_capacity=1,
+                          eligibility_criteria={"max_income_for_loan_lpa": 5.0})
+    store.upsert_applications([loan_app("held", "Valid", rank=5, loan_status="Approved")])
+    allocator = LoanAllocator(store, 5000)
+    assert allocator.decide(loan_app("new", "Valid", rank=1))[0] == "Rejected"
+    assert store.get_setting("loan_budget") == 10000
+
+    # A resumed run that now finds the application invalid gives the loan back.
+    assert allocator.decide(loan_app("held", "Invalid", rank=5)) == ("Rejected", "Application not valid")
+    assert store.get_application("held")["loan_status"] == "Rejected"
+    assert store.get_setting("loan_budget") == 15000
+
+
+def test_reallocation_reorders_by_priority(store):
+    store.update_settings(loan_budget=0, eligibility_criteria={"max_income_for_loan_lpa": 5.0})
+    store.upsert_applications([
+        loan_app("early", "Valid", rank=900, loan_status="Approved"),
+        loan_app("late", "Valid", rank=100, loan_status="Rejected"),
+    ])
+    plan = LoanAllocator(store, 5000).apply()
+    assert sorted(plan["changed"]) == ["early", "late"]
+    assert store.get_application("late")["loan_status"] == "Approved"
+    assert store.get_application("early")["loan_status"] == "Rejected"
+    assert store.get_setting("loan_budget") == 0
+
+
+def test_priority_order_puts_missing_values_last():
+    from loan_allocator import priority_order
+
+    apps = [loan_app("a", "Valid", rank=None, income=None), loan_app("b", "Valid", rank=50, income=4.0),
+            loan_app("c", "Valid", rank=10, income=4.0), loan_app("d", "Valid", rank=20, income=1.0)]
+    assert [app["app_id"] for app in priority_order(apps)] == ["d", "c", "b", "a"]
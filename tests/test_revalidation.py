@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import make_app
+
+pytest.importorskip("pandas")
+
+from revalidation import revalidate_applications  # noqa: E402
+
+CRITERIA = {"min_class10_pcm_perc": 60, "min_class12_pcm_perc": 60, "max_wbjee_rank": 5000,
+            "max_income_for_loan_lpa": 5.0}
+
+
+def scored_app(app_id, rank, **fields):
+    return make_app(app_id, validation_status="Valid", wbjee_rank=rank,
+                    marks={"class10_pcm_perc": 80, "class12_pcm_perc": 80}, **fields)
+
+
+@pytest.fixture
+def apps(store):
+    store.update_settings(loan_budget=1000)
+    store.upsert_applications([
+        scored_app("keeps", 100, loan_requested=True, loan_status="Approved", family_income_lpa=3),
+        scored_app("loses", 4000, loan_requested=True, loan_status="Approved", family_income_lpa=3),
+        scored_app("no_loan", 4500),
+    ])
+    return store
+
+
+def test_newly_invalid_approved_loans_are_reported(apps):
+    report = revalidate_applications(apps, {**CRITERIA, "max_wbjee_rank": 3000})
+
+    assert report["newly_invalid"] == ["loses", "no_loan"]
+    assert report["approved_loans_now_invalid"] == ["loses"]
+    loses = apps.get_application("loses")
+    assert (loses["validation_status"], loses["loan_status"]) == ("Invalid", "Approved")
+    assert apps.get_setting("loan_budget") == 1000
+
+
+def test_reallocation_after_revalidation_releases_the_loan(apps):
+    from loan_allocator import LoanAllocator
+
+    apps.update_settings(eligibility_criteria={**CRITERIA, "max_wbjee_rank": 3000})
+    revalidate_applications(apps)
+    plan = LoanAllocator(apps, 5000).apply()
+
+    assert plan["changed"] == ["loses"]
+    loses = apps.get_application("loses")
+    assert (loses["loan_status"], loses["loan_rejection_reason"]) == ("Rejected", "Application not valid")
+    assert apps.get_application("keeps")["loan_status"] == "Approved"
+    assert apps.get_setting("loan_budget") == 6000
+
+
+def test_dry_run_writes_nothing(apps):
+    version = apps.data_version()
+    revalidate_applications(apps, {**CRITERIA, "max_wbjee_rank": 3000}, dry_run=True)
+    assert apps.data_version() == version
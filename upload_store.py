@@ -0,0 +1,104 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from pdf_cache import CHUNK_SIZE
+
+
+class UploadRejected(ValueError):
+    """An upload broke a size/page limit or is not a PDF; the message is user-facing."""
+
+
+def pdf_page_count(path):
+    """Page count from the PDF's page tree only; no text or image is decoded."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        from pdf_ocr import page_count
+        return page_count(path)
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+class UploadStore:
+    """
+    Content-addressed storage for uploaded PDFs. Uploads are streamed to disk in
+    chunks while being hashed, checked against the limits, and kept once under
+    <root>/.blobs/<sha256>.pdf; each application gets a hard link at
+    <root>/<app_id>_<kind>.pdf (a copy where hard links are not supported).
+    """
+
+    def __init__(self, root, max_bytes=10 * 1024 * 1024, max_pages=20):
+        self.root = str(root)
+        self.blob_dir = os.path.join(self.root, ".blobs")
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256[:2], f"{sha256}.pdf")
+
+    def _receive(self, stream):
+        # Returns (temp path, sha256, size); the temp file lives in blob_dir so
+        # the final rename stays on one filesystem.
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    if size == 0 and not chunk.startswith(b"%PDF-"):
+                        raise UploadRejected("The file is not a PDF.")
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadRejected(f"The file is larger than {self.max_bytes / (1024 * 1024):g} MB.")
+                    digest.update(chunk)
+                    f.write(chunk)
+            if size == 0:
+                raise UploadRejected("The file is empty.")
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    def _check_pages(self, path):
+        try:
+            pages = pdf_page_count(path)
+        except Exception:
+            raise UploadRejected("The PDF could not be read.")
+        if pages > self.max_pages:
+            raise UploadRejected(f"The PDF has {pages} pages; at most {self.max_pages} are allowed.")
+        return pages
+
+    def _link(self, blob, link_path):
+        tmp_link = f"{link_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(blob, tmp_link)
+        except OSError:
+            shutil.copyfile(blob, tmp_link)
+        os.replace(tmp_link, link_path)
+
+    def save(self, stream, app_id, kind):
+        """
+        Store an uploaded file object (anything with read(n)) for app_id and
+        return {"path", "sha256", "size", "pages", "duplicate"}. Raises
+        UploadRejected when a limit is broken; nothing is kept in that case.
+        """
+        tmp_path, sha256, size = self._receive(stream)
+        try:
+            pages = self._check_pages(tmp_path)
+            blob = self.blob_path(sha256)
+            with self._lock:
+                duplicate = os.path.exists(blob)
+                if not duplicate:
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    os.replace(tmp_path, blob)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        link_path = os.path.join(self.root, f"{app_id}_{kind}.pdf")
+        self._link(blob, link_path)
+        return {"path": link_path, "sha256": sha256, "size": size, "pages": pages, "duplicate": duplicate}